@@ -0,0 +1,122 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BenchmarkCase:
+
+	def __init__(self, name: str, run: Callable[[Any], Any], setup: Callable[[], Any], nbytes: Callable[[Any], int], teardown: Optional[Callable[[Any], None]]=None):
+		self.name: str = name
+		self.run: Callable[[Any], Any] = run
+		self.setup: Callable[[], Any] = setup
+		self.nbytes: Callable[[Any], int] = nbytes # bytes processed by one run, used to report throughput
+		self.teardown: Optional[Callable[[Any], None]] = teardown # releases what setup created, such as temporary files
+
+
+# throughput is the best of 'repeat' timed runs; peak memory and retained blocks come from one extra run, since tracing slows the code down.
+# CPython keeps no count of allocations made outside debug builds, so allocations are reported as the blocks the traced run allocated
+# and still holds once it is over, mostly its result, which tracemalloc counts exactly where the process-wide block count is noisy
+def measure(case: BenchmarkCase, repeat: int=3) -> Dict[str, float]:
+	data = case.setup()
+	try:
+		best: float = float('inf')
+		for _ in range(repeat):
+			start = time.perf_counter()
+			case.run(data)
+			best = min(best, time.perf_counter() - start)
+
+		gc.collect()
+		tracemalloc.start()
+		result = case.run(data)
+		peak: int = tracemalloc.get_traced_memory()[1]
+		retained: int = sum(statistic.count for statistic in tracemalloc.take_snapshot().statistics('filename'))
+		tracemalloc.stop()
+		del result
+
+		return {
+			'throughput': case.nbytes(data) / best / (1024 * 1024),
+			'peak': peak / (1024 * 1024),
+			'retained': retained
+		}
+	finally:
+		if case.teardown is not None:
+			case.teardown(data)
+
+
+def loadBaselines(path: str) -> Dict[str, Dict[str, float]]:
+	if not os.path.exists(path):
+		return {}
+
+	with open(path, 'r') as file:
+		return json.load(file)['cases']
+
+
+def saveBaselines(path: str, results: Dict[str, Dict[str, float]]) -> None:
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	with open(path, 'w') as file:
+		json.dump({ 'python': platform.python_version(), 'machine': platform.machine(), 'cases': results }, file, indent='\t', sort_keys=True)
+		file.write('\n')
+
+	return
+
+
+# throughput regresses when it drops below the baseline, peak memory and retained blocks when they grow above it, by more than 'threshold'
+def compareBaselines(results: Dict[str, Dict[str, float]], baselines: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+	regressions: List[str] = []
+	for name, metrics in results.items():
+		baseline = baselines.get(name)
+		if baseline is None:
+			continue
+
+		if metrics['throughput'] < baseline['throughput'] * (1 - threshold):
+			regressions.append(f'{name}: throughput {metrics["throughput"]:.2f} MB/s, baseline {baseline["throughput"]:.2f} MB/s')
+		if metrics['peak'] > baseline['peak'] * (1 + threshold):
+			regressions.append(f'{name}: peak memory {metrics["peak"]:.2f} MB, baseline {baseline["peak"]:.2f} MB')
+		if metrics['retained'] > baseline.get('retained', float('inf')) * (1 + threshold) + 16: # a few blocks of slack for interpreter caches
+			regressions.append(f'{name}: retained blocks {metrics["retained"]:.0f}, baseline {baseline["retained"]:.0f}')
+
+	return regressions
+
+
+def main(cases: List[BenchmarkCase], baselinePath: str, argv: Optional[List[str]]=None) -> int:
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--filter', default='', help='only run cases whose name contains this text')
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--save', action='store_true', help='store the results as the new baselines')
+	parser.add_argument('--check', action='store_true', help='exit with an error if any case regressed against the baselines')
+	parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative regression before --check fails')
+	args = parser.parse_args(argv)
+
+	baselines = loadBaselines(baselinePath)
+	results: Dict[str, Dict[str, float]] = {}
+	print(f'{"case":36s} {"MB/s":>10s} {"baseline":>10s} {"peak MB":>10s} {"retained":>10s}')
+	for case in cases:
+		if args.filter not in case.name:
+			continue
+
+		metrics = measure(case, args.repeat)
+		results[case.name] = metrics
+		baseline = baselines.get(case.name, {}).get('throughput')
+		print(f'{case.name:36s} {metrics["throughput"]:10.2f} {baseline if baseline is not None else float("nan"):10.2f} {metrics["peak"]:10.2f} {metrics["retained"]:10.0f}')
+
+	if args.save:
+		saveBaselines(baselinePath, { **baselines, **results })
+		print(f'baselines saved to {baselinePath}')
+
+	if args.check:
+		regressions = compareBaselines(results, baselines, args.threshold)
+		for regression in regressions:
+			print(f'REGRESSION {regression}')
+
+		if len(regressions) > 0:
+			print(f'{len(regressions)} regression(s) beyond {args.threshold:.0%} of the baselines')
+			return 1
+
+		print('no regressions')
+
+	return 0
@@ -0,0 +1,534 @@
+import asyncio
+import heapq
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from localutils.ds.heap import Heap, HeapArity, HeapType, IndexedHeap, PairingHeap, TopK, mergeSorted
+from localutils.ds.workqueue import AsyncPriorityWorkQueue, PriorityWorkQueue
+from localutils.threadutils import ThreadWait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# the int-only heap used before the generic Heap, kept here as the reference for comparisons
+class LegacyHeap:
+
+	def __init__(self, heaptype: HeapType=HeapType.MinHeap):
+		self.values: List[int] = []
+		self.numvalues: int = 0
+
+		if heaptype == HeapType.MinHeap:
+			self.comparator: Callable[[int, int], bool] = lambda x,y: x < y
+		else:
+			self.comparator: Callable[[int, int], bool] = lambda x,y: x > y
+
+	@staticmethod
+	def getParentIndex(index: int) -> Optional[int]:
+		if index == 0:
+			return None
+
+		_offset:int = 2 if index % 2 == 0 else 1
+		return int((index - _offset) / 2)
+
+	def getLeftIndex(self, index: int) -> Optional[int]:
+		_left: int = (index * 2) + 1
+		return _left if _left < self.numvalues else None
+
+	def getRightIndex(self, index: int) -> Optional[int]:
+		_right: int = (index * 2) + 2
+		return _right if _right < self.numvalues else None
+
+	def getChildIndex(self, index: int) -> Optional[int]:
+		_left: int = self.getLeftIndex(index)
+		if _left is None:
+			return None
+
+		_right: int = self.getRightIndex(index)
+		if _right is None:
+			return _left
+
+		return _left if self.comparator(self.values[_left], self.values[_right]) else _right
+
+	def swapValues(self, indexA: int, indexB: int) -> None:
+		_tmp: int = self.values[indexA]
+		self.values[indexA] = self.values[indexB]
+		self.values[indexB] = _tmp
+		return
+
+	def pop(self) -> Optional[int]:
+		if self.numvalues == 0:
+			return None
+
+		_last: int = self.numvalues - 1
+		_value: int = self.values[0]
+		self.swapValues(0, _last)
+		self.numvalues -= 1
+		self.heapifyDown()
+		return _value
+
+	def push(self, value: int) -> None:
+		if self.numvalues == len(self.values):
+			self.values.append(value)
+		else:
+			self.values[self.numvalues] = value
+
+		self.numvalues += 1
+		self.heapifyUp()
+		return
+
+	def heapifyUp(self) -> None:
+		_index: int = self.numvalues - 1
+		_parent: Optional[int] = LegacyHeap.getParentIndex(_index)
+		while _parent is not None and self.comparator(self.values[_index], self.values[_parent]):
+			self.swapValues(_index, _parent)
+			_index = _parent
+			_parent = LegacyHeap.getParentIndex(_parent)
+
+		return
+
+	def heapifyDown(self) -> None:
+		_index: int = 0
+		_child: Optional[int] = self.getChildIndex(_index)
+		while _child is not None and self.comparator(self.values[_child], self.values[_index]):
+			self.swapValues(_child, _index)
+			_index = _child
+			_child = self.getChildIndex(_index)
+
+		return
+
+
+def timed(fn: Callable[[], object]) -> float:
+	start = time.perf_counter()
+	fn()
+	return time.perf_counter() - start
+
+
+def pushPop(heap, values: List[object]) -> None:
+	for value in values:
+		heap.push(value)
+	for _ in values:
+		heap.pop()
+
+	return
+
+
+def heapqPushPop(values: List[object]) -> None:
+	heap: List[object] = []
+	for value in values:
+		heapq.heappush(heap, value)
+	for _ in values:
+		heapq.heappop(heap)
+
+	return
+
+
+def benchmarkOperations(items: int=200000) -> None:
+	values: List[int] = list(range(items))
+	random.Random(1).shuffle(values)
+	print(f'workload: {items} pushes then {items} pops')
+
+	for heaptype in [ HeapType.MinHeap, HeapType.MaxHeap ]:
+		legacy = timed(lambda: pushPop(LegacyHeap(heaptype), values))
+		current = timed(lambda: pushPop(Heap(heaptype), values))
+		print(f'push+pop  {heaptype.name}  legacy  {legacy * 1000:10.1f} ms')
+		print(f'push+pop  {heaptype.name}  current {current * 1000:10.1f} ms  ({legacy / current:.1f}x)')
+
+	print(f'push+pop  heapq           {timed(lambda: heapqPushPop(values)) * 1000:10.1f} ms')
+	return
+
+
+def benchmarkBuild(items: int=1000000) -> None:
+	values: List[int] = list(range(items))
+	random.Random(1).shuffle(values)
+	print(f'workload: {items} items')
+
+	def pushAll(heap) -> None:
+		for value in values:
+			heap.push(value)
+
+	for heaptype in [ HeapType.MinHeap, HeapType.MaxHeap ]:
+		legacy = timed(lambda: pushAll(LegacyHeap(heaptype)))
+		pushes = timed(lambda: pushAll(Heap(heaptype)))
+		heapify = timed(lambda: Heap.heapify(values, heaptype))
+		print(f'build  {heaptype.name}  legacy push     {legacy * 1000:10.1f} ms')
+		print(f'build  {heaptype.name}  current push    {pushes * 1000:10.1f} ms  ({legacy / pushes:.1f}x)')
+		print(f'build  {heaptype.name}  Heap.heapify    {heapify * 1000:10.1f} ms  ({legacy / heapify:.1f}x)')
+
+	print(f'build  heapq.heapify          {timed(lambda: heapq.heapify(values[:])) * 1000:10.1f} ms')
+
+	heap = Heap.heapify(values)
+	popMany = timed(lambda: heap.popMany(items // 10))
+	heap = Heap.heapify(values)
+	pops = timed(lambda: [ heap.pop() for _ in range(items // 10) ])
+	print(f'drain  pop x {items // 10}          {pops * 1000:10.1f} ms')
+	print(f'drain  popMany({items // 10})       {popMany * 1000:10.1f} ms')
+	return
+
+
+# records ordered by a field: the key function heap against the legacy heap fed (key, order, record) tuples and plain heapq
+def benchmarkKey(items: int=200000) -> None:
+	rnd = random.Random(1)
+	records = [ { 'id': i, 'priority': rnd.random() } for i in range(items) ]
+	print(f'workload: {items} records')
+
+	def legacyRun() -> None:
+		heap = LegacyHeap()
+		for i, record in enumerate(records):
+			heap.push((record['priority'], i, record))
+		while heap.pop() is not None:
+			pass
+
+	def currentRun() -> None:
+		heap = Heap(key=lambda record: record['priority'])
+		for record in records:
+			heap.push(record)
+		while heap.pop() is not None:
+			pass
+
+	def heapqRun() -> None:
+		heap: List[object] = []
+		for i, record in enumerate(records):
+			heapq.heappush(heap, (record['priority'], i, record))
+		while heap:
+			heapq.heappop(heap)
+
+	legacy = timed(legacyRun)
+	current = timed(currentRun)
+	print(f'key  legacy tuples  {legacy * 1000:10.1f} ms')
+	print(f'key  Heap(key=)     {current * 1000:10.1f} ms  ({legacy / current:.1f}x)')
+	print(f'key  heapq tuples   {timed(heapqRun) * 1000:10.1f} ms')
+
+	stream = [ rnd.random() for _ in range(items) ]
+	for heaptype in [ HeapType.MinHeap, HeapType.MaxHeap ]:
+		heap = Heap.heapify(stream[:1000], heaptype)
+		pushpop = timed(lambda: [ heap.pushpop(value) for value in stream ])
+		heap = Heap.heapify(stream[:1000], heaptype)
+		separate = timed(lambda: [ (heap.push(value), heap.pop()) for value in stream ])
+		print(f'pushpop  {heaptype.name}  push, pop {separate * 1000:10.1f} ms')
+		print(f'pushpop  {heaptype.name}  pushpop   {pushpop * 1000:10.1f} ms  ({separate / pushpop:.1f}x)')
+
+	return
+
+
+# Dijkstra over a random graph: decrease-key on an IndexedHeap against pushing duplicates and skipping the stale ones on pop
+def benchmarkIndexed(nodes: int=100000, degree: int=8) -> None:
+	rnd = random.Random(1)
+	edges: List[List[Tuple[int, int]]] = [ [ (rnd.randrange(nodes), rnd.randrange(1, 100)) for _ in range(degree) ] for _ in range(nodes) ]
+	print(f'workload: {nodes} nodes, {nodes * degree} edges')
+
+	def lazy() -> Tuple[Dict[int, int], int]:
+		distances = { 0: 0 }
+		done = set()
+		heap = Heap(key=lambda entry: entry[0])
+		heap.push((0, 0))
+		largest = 1
+		while heap.numvalues > 0:
+			distance, node = heap.pop()
+			if node in done:
+				continue
+			done.add(node)
+			for target, weight in edges[node]:
+				if target not in distances or distance + weight < distances[target]:
+					distances[target] = distance + weight
+					heap.push((distance + weight, target))
+			largest = max(largest, heap.numvalues)
+
+		return distances, largest
+
+	def indexed() -> Tuple[Dict[int, int], int]:
+		distances = { 0: 0 }
+		heap = IndexedHeap()
+		heap.push(0, 0)
+		largest = 1
+		while heap.numvalues > 0:
+			node = heap.pop()
+			distance = distances[node]
+			for target, weight in edges[node]:
+				if target not in distances or distance + weight < distances[target]:
+					distances[target] = distance + weight
+					heap.update(target, distance + weight)
+			largest = max(largest, heap.numvalues)
+
+		return distances, largest
+
+	results = {}
+	for name, run in [ ('lazy deletion', lazy), ('IndexedHeap  ', indexed) ]:
+		start = time.perf_counter()
+		results[name], largest = run()
+		print(f'dijkstra  {name}  {(time.perf_counter() - start) * 1000:10.1f} ms  largest heap {largest:8}')
+
+	if len(set(map(lambda distances: tuple(sorted(distances.items())), results.values()))) != 1:
+		raise Exception('Shortest path distances differ')
+
+	# timers: every step reschedules or cancels a pending timer, and every fourth step fires the earliest one
+	steps = nodes * 4
+	actions = [ (rnd.randrange(nodes), rnd.random(), rnd.random()) for _ in range(steps) ]
+
+	def lazyTimers() -> int:
+		deadlines: Dict[int, float] = {}
+		heap = Heap(key=lambda entry: entry[0])
+		largest = 0
+		for step, (timer, deadline, action) in enumerate(actions):
+			if action < 0.8:
+				deadlines[timer] = step + deadline * nodes
+				heap.push((deadlines[timer], timer))
+			else:
+				deadlines.pop(timer, None)
+			if step % 4 == 0:
+				while heap.numvalues > 0:
+					when, fired = heap.pop()
+					if deadlines.get(fired) == when:
+						del deadlines[fired]
+						break
+			largest = max(largest, heap.numvalues)
+
+		return largest
+
+	def indexedTimers() -> int:
+		heap = IndexedHeap()
+		largest = 0
+		for step, (timer, deadline, action) in enumerate(actions):
+			if action < 0.8:
+				heap.update(timer, step + deadline * nodes)
+			else:
+				heap.remove(timer)
+			if step % 4 == 0:
+				heap.pop()
+			largest = max(largest, heap.numvalues)
+
+		return largest
+
+	for name, run in [ ('lazy deletion', lazyTimers), ('IndexedHeap  ', indexedTimers) ]:
+		start = time.perf_counter()
+		largest = run()
+		print(f'timers    {name}  {(time.perf_counter() - start) * 1000:10.1f} ms  largest heap {largest:8}')
+
+	return
+
+
+# the heap shapes on the same traces: push-heavy (mostly pushes), pop-heavy (heap built up front, then drained), mixed (random
+# pushes and pops around a steady size) and merge-heavy (many small heaps merged into one, then drained)
+def benchmarkVariants(items: int=200000) -> None:
+	rnd = random.Random(1)
+	values: List[int] = [ rnd.randrange(items * 10) for _ in range(items) ]
+	mixed: List[bool] = [ rnd.random() < 0.5 for _ in range(items) ]
+	print(f'workload: {items} items')
+
+	def pushHeavy(heap) -> None:
+		for i, value in enumerate(values):
+			heap.push(value)
+			if i % 10 == 0:
+				heap.pop()
+
+	def popHeavy(heap) -> None:
+		heap.pushMany(values)
+		while heap.pop() is not None:
+			pass
+
+	def mixedTrace(heap) -> None:
+		heap.pushMany(values[:items // 2])
+		for value, push in zip(values, mixed):
+			if push:
+				heap.push(value)
+			else:
+				heap.pop()
+
+	def mergeHeavy(make) -> None:
+		heap = make()
+		for start in range(0, items, 50):
+			part = make()
+			part.pushMany(values[start:start + 50])
+			heap.merge(part)
+		while heap.pop() is not None:
+			pass
+
+	for heaptype in [ HeapType.MinHeap, HeapType.MaxHeap ]:
+		variants = [ (f'Heap {arity.name:10}', lambda arity=arity: Heap(heaptype, arity=arity)) for arity in HeapArity ]
+		variants.append(('PairingHeap    ', lambda: PairingHeap(heaptype)))
+		for name, make in variants:
+			times = [ timed(lambda: trace(make())) for trace in [ pushHeavy, popHeavy, mixedTrace ] ] + [ timed(lambda: mergeHeavy(make)) ]
+			print(f'{heaptype.name}  {name}  push {times[0] * 1000:8.1f} ms  pop {times[1] * 1000:8.1f} ms  mixed {times[2] * 1000:8.1f} ms  merge {times[3] * 1000:8.1f} ms')
+
+	return
+
+
+# producer threads put timestamped jobs in bursts while consumers take them: a Heap behind a lock polled with ThreadWait
+# backoff, against the blocking PriorityWorkQueue and an event loop consuming from the AsyncPriorityWorkQueue
+def benchmarkQueue(jobs: int=20000, producers: int=4, consumers: int=2, burst: int=20) -> None:
+	print(f'workload: {jobs} jobs from {producers} producer threads in bursts of {burst}')
+
+	def produce(put: Callable[[object], None]) -> None:
+		for _ in range(jobs // producers // burst):
+			for _ in range(burst):
+				put((time.perf_counter(), 0))
+			time.sleep(0.001)
+
+	def report(name: str, latencies: List[float], seconds: float) -> None:
+		latencies.sort()
+		print(f'queue  {name}  {len(latencies) / seconds:10,.0f} jobs/s  latency mean {sum(latencies) / len(latencies) * 1e6:9.1f} us  p99 {latencies[int(len(latencies) * 0.99)] * 1e6:9.1f} us')
+
+	def polled() -> None:
+		heap = Heap(key=lambda job: job[0])
+		lock = threading.Lock()
+		latencies: List[float] = []
+		remaining = [ jobs - jobs % (producers * burst) ]
+
+		def put(job) -> None:
+			with lock:
+				heap.push(job)
+
+		def consume() -> None:
+			wait = ThreadWait(1)
+			while True:
+				with lock:
+					if remaining[0] == 0:
+						return
+					job = heap.pop()
+					if job is not None:
+						remaining[0] -= 1
+						latencies.append(time.perf_counter() - job[0])
+				if job is None:
+					wait.waitnext()
+				else:
+					wait.reset()
+
+		threads = [ threading.Thread(target=consume) for _ in range(consumers) ] + [ threading.Thread(target=produce, args=(put,)) for _ in range(producers) ]
+		start = time.perf_counter()
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		report('ThreadWait polling   ', latencies, time.perf_counter() - start)
+
+	def blocking() -> None:
+		queue = PriorityWorkQueue(key=lambda job: job[0], maxsize=1000)
+		latencies: List[float] = []
+
+		def consume() -> None:
+			while True:
+				job = queue.get()
+				if job[1] < 0:
+					return
+				latencies.append(time.perf_counter() - job[0])
+
+		workers = [ threading.Thread(target=consume) for _ in range(consumers) ]
+		threads = [ threading.Thread(target=produce, args=(queue.put,)) for _ in range(producers) ]
+		start = time.perf_counter()
+		for thread in workers + threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		for _ in workers:
+			queue.put((float('inf'), -1)) # sorts after every job, so it stops a consumer once the queue is drained
+		for worker in workers:
+			worker.join()
+		report('PriorityWorkQueue    ', latencies, time.perf_counter() - start)
+
+	async def asynchronous() -> None:
+		queue = AsyncPriorityWorkQueue(PriorityWorkQueue(key=lambda job: job[0], maxsize=1000))
+		latencies: List[float] = []
+		threads = [ threading.Thread(target=produce, args=(queue.queue.put,)) for _ in range(producers) ]
+		expected = jobs - jobs % (producers * burst)
+		start = time.perf_counter()
+		for thread in threads:
+			thread.start()
+		while len(latencies) < expected:
+			for job in await queue.getMany(64):
+				latencies.append(time.perf_counter() - job[0])
+		for thread in threads:
+			thread.join()
+		report('AsyncPriorityWorkQueue', latencies, time.perf_counter() - start)
+
+	polled()
+	blocking()
+	asyncio.run(asynchronous())
+	return
+
+
+# top 1000 of a generated stream of scored rows, and a merge of sorted partitions: the collector and merge generator against
+# the same jobs hand-rolled around Heap push/pop, heapq.nlargest and heapq.merge. Streams are generated lazily so memory
+# stays flat; peak memory comes from a separate traced run, since tracing slows the code down
+def benchmarkStreams(rows: int=5000000, k: int=1000, partitions: int=200) -> None:
+	def stream() -> Iterator[Tuple[float, int]]:
+		rnd = random.Random(1)
+		score = rnd.random
+		for i in range(rows):
+			yield (score(), i)
+
+	def handRolled() -> List[Tuple[float, int]]:
+		heap = Heap()
+		for row in stream():
+			heap.push(row)
+			if heap.numvalues > k:
+				heap.pop()
+		return sorted(heap.values, reverse=True)
+
+	def collector() -> List[Tuple[float, int]]:
+		top = TopK(k)
+		top.addAll(stream())
+		return top.result()
+
+	def keyed() -> List[Tuple[float, int]]:
+		top = TopK(k, key=lambda row: row[0])
+		top.addAll(stream())
+		return top.result()
+
+	print(f'workload: top {k} of {rows} rows')
+	baseline = timed(lambda: sum(1 for _ in stream()))
+	print(f'topk  stream only       {baseline * 1000:10.1f} ms')
+	results = []
+	for name, run in [ ('Heap push/pop', handRolled), ('heapq.nlargest', lambda: heapq.nlargest(k, stream())), ('TopK', collector), ('TopK key=', keyed) ]:
+		seconds = timed(lambda: results.append(run()))
+		tracemalloc.start()
+		run()
+		peak = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+		print(f'topk  {name:15}  {seconds * 1000:10.1f} ms  peak {peak / 1024:8.0f} KiB')
+
+	if any(result != results[0] for result in results):
+		raise Exception('Top-k results differ')
+
+	size = rows // partitions
+	rnd = random.Random(2)
+	parts = [ sorted(rnd.random() for _ in range(size)) for _ in range(partitions) ]
+	print(f'workload: merge {partitions} sorted partitions of {size} rows')
+
+	def handMerge() -> int:
+		heap = Heap()
+		iterators = [ iter(part) for part in parts ]
+		for index, iterator in enumerate(iterators):
+			heap.push((next(iterator), index))
+		count = 0
+		while heap.numvalues > 0:
+			_, index = heap.pop()
+			count += 1
+			for value in iterators[index]:
+				heap.push((value, index))
+				break
+		return count
+
+	for name, run in [ ('Heap push/pop', handMerge), ('heapq.merge', lambda: sum(1 for _ in heapq.merge(*parts))), ('mergeSorted', lambda: sum(1 for _ in mergeSorted(parts))), ('mergeSorted key=', lambda: sum(1 for _ in mergeSorted(parts, key=lambda value: value))), ('mergeSorted reverse', lambda: sum(1 for _ in mergeSorted([ part[::-1] for part in parts ], reverse=True))) ]:
+		print(f'merge {name:19}  {timed(run) * 1000:10.1f} ms')
+
+	return
+
+
+if __name__ == '__main__':
+	benchmark: str = sys.argv[1] if len(sys.argv) > 1 else 'operations'
+	if benchmark == 'operations':
+		benchmarkOperations(int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
+	elif benchmark == 'build':
+		benchmarkBuild(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+	elif benchmark == 'key':
+		benchmarkKey(int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
+	elif benchmark == 'indexed':
+		benchmarkIndexed(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+	elif benchmark == 'variants':
+		benchmarkVariants(int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
+	elif benchmark == 'queue':
+		benchmarkQueue(int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
+	elif benchmark == 'streams':
+		benchmarkStreams(int(sys.argv[2]) if len(sys.argv) > 2 else 5000000)
+	else:
+		raise Exception(f'Unknown benchmark: {benchmark}')
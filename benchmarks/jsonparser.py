@@ -0,0 +1,306 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from localutils.jsonparser import JsonParser, JsonSerializer, JsonToken, JsonTokenStream, JsonTypeBinder
+from typing import Any, Callable, Dict, List, Union
+
+
+# the character-by-character tokenizer JsonParser used before JsonTokenStream, kept here as the reference for comparisons
+def legacyTokenize(text: str) -> List[JsonToken]:
+	_WS = [ ' ', '\t', '\n', '\r' ]
+	_TK = [ '{', '}', '[', ']', ',', ':' ]
+
+	stream: List[JsonToken] = []
+	n: int = len(text)
+	i: int = 0
+	isEscaped: bool = False
+
+	while i < n:
+		if text[i] in _WS:
+			i += 1
+			continue
+
+		if text[i] in _TK:
+			stream.append(JsonToken(text[i], text[i]))
+
+		elif text[i] == '"':
+			_id = []
+			i += 1
+			while i < n:
+				if text[i] == '\\':
+					isEscaped = not isEscaped
+
+				if text[i] == '"' and not isEscaped:
+					break
+
+				if text[i] == '"' and isEscaped:
+					_id[-1] = '"'
+				else:
+					_id.append(text[i])
+
+				if text[i] != '\\':
+					isEscaped = False
+
+				i += 1
+
+			stream.append(JsonToken('ID', ''.join(_id)))
+
+		else:
+			_lit = text[i]
+			i += 1
+			while i < n:
+				if text[i] in [ ',', ']', '}' ]:
+					i -= 1
+					break
+				elif text[i] not in _WS:
+					_lit += text[i]
+
+				i += 1
+
+			stream.append(JsonToken('LIT', _lit))
+
+		i += 1
+
+	return stream
+
+
+# the reflection-based binder parseToType used before JsonTypeBinder
+def legacyBind(resultobj: Union[List[Any], Dict[str, Any]], userType: type) -> Any:
+	if not isinstance(resultobj, list) and not isinstance(resultobj, dict):
+		return None
+
+	if isinstance(resultobj, list):
+		return resultobj
+
+	t = userType()
+	for key in resultobj:
+		if hasattr(t, key):
+			attr = getattr(t, key)
+			if isinstance(resultobj[key], dict) and not isinstance(attr, dict):
+				setattr(t, key, legacyBind(resultobj[key], type(attr)))
+			else:
+				setattr(t, key, resultobj[key])
+
+	return t
+
+
+# the recursive string-building serializer used before JsonSerializer
+def legacySerialize(value: Any, indent: int=0) -> str:
+	if type(value) is dict:
+		ret = [ '{' ]
+		if indent > 0:
+			ret.append('\n')
+
+		keys = list(value.keys())
+		for i in range(len(keys)):
+			ret.append('{0}"{1}": {2}'.format('\t' * indent, keys[i], legacySerializeValue(value[keys[i]], indent)))
+			if i < len(keys) - 1:
+				ret.append(',')
+			if indent > 0:
+				ret.append('\n')
+
+		ret.append('{0}}}'.format('\t' * (indent-1)))
+		return ''.join(ret)
+
+	ret = [ '[' ]
+	if indent > 0:
+		ret.append('\n')
+
+	for i, item in enumerate(value):
+		ret.append('\t' * indent)
+		ret.append(legacySerializeValue(item, indent))
+		if i < len(value) - 1:
+			ret.append(',')
+		if indent > 0:
+			ret.append('\n')
+
+	ret.append('{0}]'.format('\t' * (indent-1)))
+	return ''.join(ret)
+
+
+def legacySerializeValue(value: Any, indent: int=0) -> str:
+	if type(value) is dict or type(value) is list or type(value) is set:
+		return legacySerialize(value, indent+1 if indent > 0 else indent)
+	elif type(value) is str:
+		return '"{0}"'.format(value)
+	elif type(value) is bool:
+		return 'true' if value else 'false'
+	elif value is None:
+		return 'null'
+	else:
+		return str(value)
+
+
+class Position:
+	def __init__(self):
+		self.x: int = 0
+		self.y: int = 0
+
+
+class Record:
+	def __init__(self):
+		self.id: int = 0
+		self.name: str = ''
+		self.description: str = ''
+		self.price: float = 0.
+		self.active: bool = False
+		self.parent = None
+		self.tags: list = []
+		self.position: Position = Position()
+
+
+def makeRecords(records: int, seed: int=1) -> List[Dict[str, Any]]:
+	rnd = random.Random(seed)
+	items = []
+	for i in range(records):
+		items.append({
+			'id': i,
+			'name': f'record-{i}',
+			'description': 'lorem ipsum dolor sit amet, "quoted" ' * rnd.randint(1, 4),
+			'price': round(rnd.random() * 1000, 4),
+			'active': rnd.random() > 0.5,
+			'parent': None,
+			'tags': [ f'tag-{rnd.randint(0, 50)}' for _ in range(rnd.randint(0, 5)) ],
+			'position': { 'x': rnd.randint(-1000, 1000), 'y': rnd.randint(-1000, 1000) }
+		})
+
+	return items
+
+
+def makePayload(records: int, seed: int=1) -> str:
+	return JsonParser.serializeJsonObject(makeRecords(records, seed))
+
+
+def throughput(fn: Callable[[], object], nbytes: int, repeat: int=3) -> float:
+	best: float = float('inf')
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - start)
+
+	return nbytes / best / (1024 * 1024)
+
+
+def benchmarkTokenizer(records: int=20000) -> None:
+	text: str = makePayload(records)
+	nbytes: int = len(text.encode('utf-8'))
+	print(f'payload: {records} records, {nbytes / (1024 * 1024):.2f} MB')
+
+	legacy = throughput(lambda: legacyTokenize(text), nbytes)
+	current = throughput(lambda: JsonTokenStream(text), nbytes)
+	print(f'tokenize  legacy  {legacy:8.2f} MB/s')
+	print(f'tokenize  stream  {current:8.2f} MB/s  ({current / legacy:.1f}x)')
+
+	parse = throughput(lambda: JsonParser(text).parse(), nbytes)
+	print(f'parse     full    {parse:8.2f} MB/s')
+	return
+
+
+def benchmarkBinding(records: int=100000) -> None:
+	result: List[Dict[str, Any]] = JsonParser(makePayload(records)).parse()
+	print(f'payload: {records} records')
+
+	def rate(fn: Callable[[], object]) -> float:
+		best: float = float('inf')
+		for _ in range(3):
+			start = time.perf_counter()
+			fn()
+			best = min(best, time.perf_counter() - start)
+		return records / best
+
+	legacy = rate(lambda: [ legacyBind(item, Record) for item in result ])
+	binder = rate(lambda: JsonTypeBinder.forType(List[Record]).bind(result))
+	print(f'bind      legacy  {legacy:12,.0f} records/s')
+	print(f'bind      binder  {binder:12,.0f} records/s  ({binder / legacy:.1f}x)')
+	return
+
+
+def benchmarkMemory(records: int=50000) -> None:
+	text: str = makePayload(records)
+	print(f'payload: {records} records, {len(text) / (1024 * 1024):.2f} MB')
+
+	for name, options in [ ('dicts     ', { 'internKeys': False }), ('interned  ', { 'internKeys': True }), ('records   ', { 'records': True }) ]:
+		tracemalloc.start()
+		result = JsonParser(text, **options).parse() # the parser and its token list are released, leaving only the result
+		retained, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+
+		elapsed = throughput(lambda: JsonParser(text, **options).parse(), len(text))
+		print(f'memory    {name}  retained {retained / (1024 * 1024):8.2f} MB  peak {peak / (1024 * 1024):8.2f} MB  {elapsed:8.2f} MB/s')
+		del result
+
+	return
+
+
+def benchmarkSerializer(records: int=50000) -> None:
+	items: List[Dict[str, Any]] = makeRecords(records)
+	for item in items:
+		item['description'] = item['description'].replace('"', '') # the legacy serializer does not escape strings
+	nbytes: int = len(JsonParser.serializeJsonObject(items).encode('utf-8'))
+	print(f'payload: {records} records, {nbytes / (1024 * 1024):.2f} MB')
+
+	results = [
+		('legacy     indented', lambda: legacySerialize(items, 1)),
+		('serializer indented', lambda: JsonSerializer(indent='\t').serialize(items)),
+		('stdlib     indented', lambda: json.dumps(items, indent='\t')),
+		('legacy     compact ', lambda: legacySerialize(items, 0)),
+		('serializer compact ', lambda: JsonSerializer(indent=None).serialize(items)),
+		('stdlib     compact ', lambda: json.dumps(items, separators=(',', ': '))),
+		('serializer file    ', lambda: JsonSerializer(open(os.devnull, 'w'), indent=None).dump(items))
+	]
+
+	legacy: float = 0.
+	for name, fn in results:
+		rate = throughput(fn, nbytes)
+		legacy = rate if name.startswith('legacy') else legacy
+		print(f'serialize {name}  {rate:8.2f} MB/s  ({rate / legacy:.1f}x)')
+
+	return
+
+
+def benchmarkLines(lines: int=1000000, processes: int=os.cpu_count() or 1) -> None:
+	with tempfile.TemporaryDirectory() as folder:
+		rnd = random.Random(1)
+		path: str = os.path.join(folder, 'bench.ndjson')
+		records = ({ 'id': i, 'event': f'event-{rnd.randint(0, 100)}', 'value': rnd.random(), 'ok': i % 3 == 0, 'tags': [ 'a', 'b' ] } for i in range(lines))
+		JsonParser.serializeLines(records, path)
+		nbytes: int = os.path.getsize(path)
+		print(f'payload: {lines} lines, {nbytes / (1024 * 1024):.2f} MB')
+
+		def perLine():
+			with open(path, 'r') as file:
+				for line in file:
+					JsonParser(line).parse()
+
+		def consume(iterator):
+			for _ in iterator:
+				pass
+
+		legacy = throughput(perLine, nbytes, repeat=1)
+		single = throughput(lambda: consume(JsonParser.parseLines(path)), nbytes, repeat=1)
+		parallel = throughput(lambda: consume(JsonParser.parseLines(path, processes=processes)), nbytes, repeat=1)
+		print(f'lines     per-line parser        {legacy:8.2f} MB/s')
+		print(f'lines     parseLines             {single:8.2f} MB/s  ({single / legacy:.1f}x)')
+		print(f'lines     parseLines {processes:2d} procs     {parallel:8.2f} MB/s  ({parallel / legacy:.1f}x)')
+
+	return
+
+
+if __name__ == '__main__':
+	benchmark: str = sys.argv[1] if len(sys.argv) > 1 else 'tokenizer'
+	if benchmark == 'tokenizer':
+		benchmarkTokenizer(int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
+	elif benchmark == 'binding':
+		benchmarkBinding(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+	elif benchmark == 'memory':
+		benchmarkMemory(int(sys.argv[2]) if len(sys.argv) > 2 else 50000)
+	elif benchmark == 'serializer':
+		benchmarkSerializer(int(sys.argv[2]) if len(sys.argv) > 2 else 50000)
+	elif benchmark == 'lines':
+		benchmarkLines(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+	else:
+		raise Exception(f'Unknown benchmark: {benchmark}')
@@ -0,0 +1,90 @@
+import os
+import random
+import shutil
+import sys
+import tempfile
+from benchmarks.harness import BenchmarkCase, main
+from benchmarks.jsonparser import Record, makeRecords
+from localutils.jsonparser import JsonParser
+from typing import Any, Dict, List, Tuple
+
+
+BASELINES: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'jsonparser.json')
+
+
+def makeDeep(documents: int=400, depth: int=150) -> List[Any]:
+	items: List[Any] = []
+	for i in range(documents):
+		value: Any = i
+		for level in range(depth):
+			value = { 'level': level, 'child': value } if level % 2 == 0 else [ level, value ]
+		items.append(value)
+
+	return items
+
+
+def makeWide(objects: int=40, keys: int=2500) -> List[Dict[str, Any]]:
+	return [ { f'field-{i}-{k}': k if k % 3 else f'value-{k}' for k in range(keys) } for i in range(objects) ]
+
+
+def makeStrings(strings: int=4000) -> List[str]:
+	rnd = random.Random(1)
+	parts = [ 'plain text ', 'say "hi" ', 'tab\there ', 'line\nbreak ', 'back\\slash ', 'unicode é中 ' ]
+	return [ ''.join(rnd.choice(parts) for _ in range(rnd.randint(20, 80))) for _ in range(strings) ]
+
+
+def makeNumbers(count: int=300000) -> Dict[str, List[Any]]:
+	rnd = random.Random(1)
+	return { 'ints': [ rnd.randint(-10 ** 9, 10 ** 9) for _ in range(count) ], 'floats': [ rnd.random() * 10 ** rnd.randint(-5, 5) for _ in range(count) ] }
+
+
+def makeLines(lines: int=200000) -> str:
+	rnd = random.Random(1)
+	path: str = os.path.join(tempfile.mkdtemp(), 'suite.ndjson')
+	JsonParser.serializeLines(({ 'id': i, 'event': f'event-{rnd.randint(0, 100)}', 'value': rnd.random(), 'ok': i % 3 == 0, 'tags': [ 'a', 'b' ] } for i in range(lines)), path)
+	return path
+
+
+def removeLines(path: str) -> None:
+	shutil.rmtree(os.path.dirname(path))
+	return
+
+
+SHAPES: List[Tuple[str, Any]] = [
+	('deep', makeDeep),
+	('wide', makeWide),
+	('strings', makeStrings),
+	('numbers', makeNumbers),
+	('records', lambda: makeRecords(20000))
+]
+
+
+def textSize(text: str) -> int:
+	return len(text.encode('utf-8'))
+
+
+def consume(iterator) -> int:
+	count: int = 0
+	for _ in iterator:
+		count += 1
+
+	return count
+
+
+def buildCases() -> List[BenchmarkCase]:
+	cases: List[BenchmarkCase] = []
+	for shape, make in SHAPES:
+		cases.append(BenchmarkCase(f'parse/{shape}', lambda text: JsonParser(text).parse(), lambda make=make: JsonParser.serializeJsonObject(make(), noformat=True), textSize))
+		cases.append(BenchmarkCase(f'serialize-compact/{shape}', lambda value: JsonParser.serializeJsonObject(value, noformat=True), make, lambda value: textSize(JsonParser.serializeJsonObject(value, noformat=True))))
+		cases.append(BenchmarkCase(f'serialize-indented/{shape}', lambda value: JsonParser.serializeJsonObject(value), make, lambda value: textSize(JsonParser.serializeJsonObject(value))))
+
+	cases.append(BenchmarkCase('parse-numeric/numbers', lambda text: JsonParser(text, numericArrays=True).parse(), lambda: JsonParser.serializeJsonObject(makeNumbers(), noformat=True), textSize))
+	cases.append(BenchmarkCase('parse-records/records', lambda text: JsonParser(text, records=True).parse(), lambda: JsonParser.serializeJsonObject(makeRecords(20000), noformat=True), textSize))
+	cases.append(BenchmarkCase('parseToType/records', lambda text: JsonParser(text).parseToType(List[Record]), lambda: JsonParser.serializeJsonObject(makeRecords(20000), noformat=True), textSize))
+	cases.append(BenchmarkCase('parseLines/ndjson', lambda path: consume(JsonParser.parseLines(path)), makeLines, os.path.getsize, removeLines))
+	return cases
+
+
+if __name__ == '__main__':
+	sys.setrecursionlimit(10000)
+	sys.exit(main(buildCases(), BASELINES))
@@ -0,0 +1,432 @@
+import bisect
+import gc
+import os
+import shutil
+import tempfile
+import threading
+import random
+import sys
+import time
+import tracemalloc
+from localutils.ds.blocktree import BlockTreeMap
+from localutils.ds.compacttree import CompactTreeMap
+from localutils.ds.concurrenttree import ConcurrentTreeMap
+from localutils.ds.disktree import DiskTreeMap
+from localutils.ds.persistenttree import PersistentTreeMap
+from localutils.ds.tree import KeyValueNode, TreeBase, TreeMap, TreeNode, TreeSet
+from typing import Callable, List
+
+
+# the recursive insert TreeMap used before the iterative insert/retrace, kept here as the reference for comparisons
+class LegacyTreeMap(TreeMap):
+
+	def add(self, key: object, value: object):
+		self.root = self.__insertNode(self.root, KeyValueNode(key, value))
+		self.root.parent = None
+
+	def __insertNode(self, root: TreeNode, node: TreeNode) -> TreeNode:
+		if root is None:
+			root = node
+			self.size += 1
+			return root
+
+		if node.key < root.key:
+			root.left = self.__insertNode(root.left, node)
+			root.left.parent = root
+		elif node.key > root.key:
+			root.right = self.__insertNode(root.right, node)
+			root.right.parent = root
+		else:
+			node.copyTo(root)
+
+		lheight = root.left.height if root.left is not None else 0
+		rheight = root.right.height if root.right is not None else 0
+		root.height = 1 + (lheight if lheight > rheight else rheight)
+
+		balance = (root.left.height if root.left is not None else 0) - (root.right.height if root.right is not None else 0)
+
+		if balance > 1 and node.key < root.left.key:
+			root = self._rotate(root, 'right')
+		elif balance < -1 and node.key > root.right.key:
+			root = self._rotate(root, 'left')
+		elif balance > 1 and node.key > root.left.key:
+			root.left = self._rotate(root.left, 'left')
+			root = self._rotate(root, 'right')
+		elif balance < -1 and node.key < root.right.key:
+			root.right = self._rotate(root.right, 'right')
+			root = self._rotate(root, 'left')
+
+		if root.left is not None: root.left.parent = root
+		if root.right is not None: root.right.parent = root
+
+		return root
+
+
+def rate(fn: Callable[[], object], operations: int) -> float:
+	start = time.perf_counter()
+	fn()
+	return operations / (time.perf_counter() - start)
+
+
+def fill(tree: TreeBase, keys: List[int]) -> TreeBase:
+	for key in keys:
+		tree.add(key, key)
+
+	return tree
+
+
+def drain(tree: TreeBase, keys: List[int]) -> None:
+	for key in keys:
+		tree.remove(key)
+
+	return
+
+
+def benchmarkInsertDelete(keys: int=1000000) -> None:
+	shuffled: List[int] = list(range(keys))
+	random.Random(1).shuffle(shuffled)
+	print(f'workload: {keys} keys')
+
+	for name, order in [ ('random    ', shuffled), ('sequential', list(range(keys))) ]:
+		legacy = rate(lambda: fill(LegacyTreeMap(), order), keys)
+		current = rate(lambda: fill(TreeMap(), order), keys)
+		print(f'insert  {name}  legacy  {legacy:12,.0f} ops/s')
+		print(f'insert  {name}  current {current:12,.0f} ops/s  ({current / legacy:.1f}x)')
+
+		tree = fill(TreeMap(), order)
+		removal = rate(lambda: drain(tree, order), keys)
+		print(f'remove  {name}  current {removal:12,.0f} ops/s')
+
+	return
+
+
+def benchmarkBulkLoad(keys: int=1000000) -> None:
+	items = [ (key, key) for key in range(keys) ]
+	shuffled = items[:]
+	random.Random(1).shuffle(shuffled)
+	print(f'workload: {keys} keys')
+
+	def timed(fn: Callable[[], object]) -> float:
+		start = time.perf_counter()
+		fn()
+		return time.perf_counter() - start
+
+	def addAll():
+		tree = TreeMap()
+		for key, value in items:
+			tree.add(key, value)
+
+	add = timed(addAll)
+	sortedLoad = timed(lambda: TreeMap.fromSorted(items))
+	unsortedLoad = timed(lambda: TreeMap.fromIterable(shuffled))
+	setLoad = timed(lambda: TreeSet.fromSorted(range(keys)))
+	print(f'build   add per key         {add * 1000:10.1f} ms')
+	print(f'build   TreeMap.fromSorted  {sortedLoad * 1000:10.1f} ms  ({add / sortedLoad:.1f}x)')
+	print(f'build   TreeMap.fromIterable{unsortedLoad * 1000:10.1f} ms  ({add / unsortedLoad:.1f}x)')
+	print(f'build   TreeSet.fromSorted  {setLoad * 1000:10.1f} ms')
+	return
+
+
+def benchmarkRange(keys: int=1000000, queries: int=200, window: int=20) -> None:
+	tree = TreeMap.fromSorted((key * 10, key) for key in range(keys))
+	rnd = random.Random(1)
+	bounds = [ rnd.randrange(0, keys * 10) for _ in range(queries) ]
+	print(f'workload: {keys} keys, {queries} windows of {window} keys')
+
+	def copied():
+		for lo in bounds:
+			[ key for key in tree.getKeys() if lo <= key < lo + window * 10 ]
+
+	def ranged():
+		for lo in bounds:
+			[ node.key for node in tree.range(lo, lo + window * 10) ]
+
+	full = rate(copied, queries)
+	lazy = rate(ranged, queries)
+	print(f'window  getKeys + filter  {full:12,.1f} queries/s')
+	print(f'window  range             {lazy:12,.1f} queries/s  ({lazy / full:,.0f}x)')
+	return
+
+
+def benchmarkOrderStatistics(keys: int=200000, queries: int=200) -> None:
+	order: List[int] = list(range(keys))
+	random.Random(1).shuffle(order)
+	print(f'workload: {keys} keys, {queries} queries')
+
+	plain = rate(lambda: fill(TreeMap(), order), keys)
+	counted = rate(lambda: fill(TreeMap(orderStatistics=True), order), keys)
+	print(f'insert  plain                 {plain:12,.0f} ops/s')
+	print(f'insert  orderStatistics       {counted:12,.0f} ops/s  ({counted / plain:.2f}x)')
+
+	tree = fill(TreeMap(orderStatistics=True), order)
+	rnd = random.Random(2)
+	bounds = [ sorted((rnd.randrange(keys), rnd.randrange(keys))) for _ in range(queries) ]
+
+	def bisected():
+		for lo, hi in bounds:
+			allKeys = tree.getKeys()
+			bisect.bisect_left(allKeys, hi) - bisect.bisect_left(allKeys, lo)
+			allKeys[len(allKeys) * 95 // 100]
+
+	def counts():
+		for lo, hi in bounds:
+			tree.countRange(lo, hi)
+			tree.select(tree.size * 95 // 100)
+
+	full = rate(bisected, queries)
+	fast = rate(counts, queries)
+	print(f'query   getKeys + bisect      {full:12,.1f} queries/s')
+	print(f'query   countRange + select   {fast:12,.1f} queries/s  ({fast / full:,.0f}x)')
+	return
+
+
+# the keys and values are built up front and shared by both trees, so the traced memory is the storage overhead per entry
+def benchmarkCompact(keys: int=1000000, lookups: int=1000000) -> None:
+	order: List[int] = list(range(keys))
+	random.Random(1).shuffle(order)
+	probes: List[int] = [ order[i % keys] for i in range(lookups) ]
+	print(f'workload: {keys} keys, {lookups} lookups')
+
+	def traced(fn: Callable[[], object]):
+		tracemalloc.start()
+		result = fn()
+		size = tracemalloc.get_traced_memory()[0]
+		tracemalloc.stop()
+		return result, size
+
+	objects, objectsSize = traced(lambda: fill(TreeMap(), order))
+	compact, compactSize = traced(lambda: fill(CompactTreeMap(), order))
+	print(f'memory  TreeMap             {objectsSize / keys:10.1f} bytes/entry')
+	print(f'memory  CompactTreeMap      {compactSize / keys:10.1f} bytes/entry  ({objectsSize / compactSize:.1f}x smaller)')
+
+	def probe(lookup: Callable[[int], object]) -> None:
+		for key in probes:
+			lookup(key)
+
+	for name, tree in [ ('TreeMap       ', objects), ('CompactTreeMap', compact) ]:
+		contains = rate(lambda: probe(tree.contains), lookups)
+		find = rate(lambda: probe(tree.find), lookups)
+		print(f'lookup  {name}  contains {1e9 / contains:8.0f} ns  find {1e9 / find:8.0f} ns')
+
+	for name, cls in [ ('TreeMap       ', TreeMap), ('CompactTreeMap', CompactTreeMap) ]:
+		insert = rate(lambda: fill(cls(), order), keys)
+		print(f'insert  {name}  {insert:12,.0f} ops/s')
+
+	return
+
+
+def benchmarkBlocks(keys: int=1000000, blockSizes: List[int]=[ 64, 512, 2048 ]) -> None:
+	order: List[int] = list(range(keys))
+	random.Random(1).shuffle(order)
+	bounds: List[int] = order[:1000]
+	print(f'workload: {keys} keys')
+
+	def lookups(tree) -> None:
+		for key in order:
+			tree.contains(key)
+
+	def scan(tree) -> None:
+		for _ in tree.items():
+			pass
+
+	def ranges(tree) -> None:
+		for lo in bounds:
+			for _ in tree.range(lo, lo + 100):
+				pass
+
+	candidates = [ ('TreeMap           ', TreeMap) ] + [ (f'BlockTreeMap({size:4d})', lambda size=size: BlockTreeMap(size)) for size in blockSizes ]
+	reference: List[float] = []
+	for name, make in candidates:
+		tree = fill(make(), order)
+		results = [ rate(lambda: fill(make(), order), keys), rate(lambda: lookups(tree), keys), rate(lambda: scan(tree), keys), rate(lambda: ranges(tree), len(bounds)), rate(lambda: drain(tree, order), keys) ]
+		reference = reference or results
+		print(f'{name}  ' + '  '.join(f'{label} {value:11,.0f}/s ({value / base:4.1f}x)' for label, value, base in zip([ 'insert', 'contains', 'scan', 'range', 'remove' ], results, reference)))
+
+	return
+
+
+# the per-element versions are what callers wrote before TreeSet had batch and set operations
+def benchmarkSetAlgebra(keys: int=200000) -> None:
+	rnd = random.Random(1)
+	base: List[int] = rnd.sample(range(keys * 4), keys)
+	print(f'workload: {keys} keys against batches of m keys')
+
+	def timed(fn: Callable[[object], object], setup: Callable[[], object]=lambda: None) -> float:
+		data = setup()
+		gc.collect()
+		start = time.perf_counter()
+		fn(data)
+		return time.perf_counter() - start
+
+	def perElementUnion(a: TreeSet, b: TreeSet) -> TreeSet:
+		result = TreeSet.fromSorted(a.getKeys())
+		for key in b.getKeys():
+			result.add(key)
+		return result
+
+	def perElementIntersection(a: TreeSet, b: TreeSet) -> TreeSet:
+		result = TreeSet()
+		for key in a.getKeys():
+			if b.contains(key):
+				result.add(key)
+		return result
+
+	def perElementAddAll(a: TreeSet, keys: List[int]) -> None:
+		for key in keys:
+			a.add(key)
+
+	for m in [ 1000, keys // 10, keys ]:
+		batch = rnd.sample(range(keys * 4), m)
+		a, b = TreeSet.fromIterable(base), TreeSet.fromIterable(batch)
+		copy = lambda: TreeSet.fromIterable(base)
+		for name, legacy, current, setup in [
+			('union       ', lambda _: perElementUnion(a, b), lambda _: a.union(b), lambda: None),
+			('intersection', lambda _: perElementIntersection(a, b), lambda _: a.intersection(b), lambda: None),
+			('addAll      ', lambda tree: perElementAddAll(tree, batch), lambda tree: tree.addAll(batch), copy),
+			('removeAll   ', lambda tree: drain(tree, batch), lambda tree: tree.removeAll(batch), copy)
+		]:
+			before, after = timed(legacy, setup), timed(current, setup)
+			print(f'm={m:<7d} {name}  per element {before * 1000:8.1f} ms  batch {after * 1000:8.1f} ms  ({before / after:.1f}x)')
+
+	return
+
+
+# a consistent view for readers used to mean copying the whole TreeMap; a persistent snapshot is O(1) and the writer pays by copying paths
+def benchmarkPersistent(keys: int=200000) -> None:
+	order: List[int] = list(range(keys))
+	random.Random(1).shuffle(order)
+	print(f'workload: {keys} keys')
+
+	def snapshotting(every: int) -> Callable[[], object]:
+		def run():
+			tree = PersistentTreeMap()
+			for i, key in enumerate(order):
+				tree.add(key, key)
+				if i % every == 0:
+					tree.snapshot()
+		return run
+
+	plain = rate(lambda: fill(TreeMap(), order), keys)
+	print(f'insert  TreeMap                         {plain:12,.0f} ops/s')
+	for every in [ keys, 100, 1 ]:
+		persistent = rate(snapshotting(every), keys)
+		print(f'insert  PersistentTreeMap, snapshot/{every:<7d} {persistent:12,.0f} ops/s  ({persistent / plain:.2f}x)')
+
+	tree = fill(TreeMap(), order)
+	persistentTree = PersistentTreeMap.fromSorted((key, key) for key in range(keys))
+	copy = rate(lambda: TreeMap.fromSorted(tree.items()), 1)
+	snapshot = rate(lambda: [ persistentTree.snapshot() for _ in range(1000) ], 1000)
+	print(f'view    TreeMap copy                    {1e6 / copy:12,.1f} us')
+	print(f'view    PersistentTreeMap.snapshot      {1e6 / snapshot:12,.1f} us  ({snapshot / copy:,.0f}x)')
+	return
+
+
+# startup compares rebuilding the TreeMap from its entries with reopening the saved file; memory is what Python allocates
+# for the structure, the mapped file itself only occupies page cache
+def benchmarkDisk(keys: int=1000000, lookups: int=100000) -> None:
+	items = [ (key * 2, f'value-{key}') for key in range(keys) ]
+	probes = [ random.Random(1).randrange(keys * 2) for _ in range(lookups) ]
+	folder = tempfile.mkdtemp()
+	path = os.path.join(folder, 'tree.dat')
+	print(f'workload: {keys} keys, {lookups} lookups')
+
+	# timed without tracing, which slows allocation down several times, then traced once more for the memory
+	def traced(fn: Callable[[], object]):
+		gc.collect()
+		start = time.perf_counter()
+		fn()
+		tree.flush()
+		elapsed = time.perf_counter() - start
+		tracemalloc.start()
+		result = fn()
+		size = tracemalloc.get_traced_memory()[0]
+		tracemalloc.stop()
+		return result, elapsed, size
+
+	def probe(tree) -> None:
+		for key in probes:
+			tree.find(key)
+
+	try:
+		tree, rebuild, treeSize = traced(lambda: TreeMap.fromSorted(items))
+		save = rate(lambda: DiskTreeMap.save(tree, path).close(), 1)
+		disk, reopen, diskSize = traced(lambda: DiskTreeMap(path))
+		disk.close()
+		disk = DiskTreeMap(path)
+		print(f'startup TreeMap.fromSorted     {rebuild * 1000:10.1f} ms  {treeSize / 1024 / 1024:8.1f} MB')
+		print(f'startup DiskTreeMap open       {reopen * 1000:10.1f} ms  {diskSize / 1024 / 1024:8.1f} MB  ({rebuild / reopen:,.0f}x faster, file {os.path.getsize(path) / 1024 / 1024:.1f} MB)')
+
+		memory = rate(lambda: probe(tree), lookups)
+		mapped = rate(lambda: probe(disk), lookups)
+		print(f'find    TreeMap                {1e6 / memory:10.1f} us')
+		print(f'find    DiskTreeMap            {1e6 / mapped:10.1f} us')
+
+		delta = TreeMap.fromSorted((key * 2000 + 1, 'delta') for key in range(1000))
+		merge = rate(lambda: disk.merge(delta), 1)
+		print(f'update  DiskTreeMap.save       {1000 / save:10.1f} ms')
+		print(f'update  merge of 1000 keys     {1000 / merge:10.1f} ms  ({merge / save:.1f}x)')
+		disk.close()
+
+	finally:
+		shutil.rmtree(folder)
+
+	return
+
+
+def benchmarkConcurrent(operations: int=200000, threads: int=8, writeShare: float=0.2) -> None:
+	print(f'workload: {operations} operations on {threads} threads, {writeShare:.0%} writes')
+
+	def worker(tree: ConcurrentTreeMap, seed: int) -> None:
+		rnd = random.Random(seed)
+		for _ in range(operations // threads):
+			key = rnd.randrange(operations)
+			if rnd.random() < writeShare:
+				tree.add(key, key)
+			else:
+				tree.find(key)
+
+	for batchSize in [ 0, 64 ]:
+		tree = ConcurrentTreeMap(batchSize=batchSize)
+		workers = [ threading.Thread(target=worker, args=(tree, seed)) for seed in range(threads) ]
+		start = time.perf_counter()
+		for thread in workers:
+			thread.start()
+		for thread in workers:
+			thread.join()
+		tree.flush()
+		elapsed = time.perf_counter() - start
+
+		statistics = tree.statistics()
+		print(f'batch {batchSize:3d}  {operations / elapsed:10,.0f} ops/s')
+		print(f'          writes {statistics["writes"]:7,.0f}  contended {statistics["writesContended"]:6,.0f}  waited {statistics["writeWaitSeconds"] * 1000:6.0f} ms  '
+			f'held {statistics["writeHoldSeconds"] * 1000:5.0f} ms  max hold {statistics["maxWriteHoldSeconds"] * 1e6:6.0f} us')
+		print(f'          reads  {statistics["reads"]:7,.0f}  contended {statistics["readsContended"]:6,.0f}  waited {statistics["readWaitSeconds"] * 1000:6.0f} ms  '
+			f'held {statistics["readHoldSeconds"] * 1000:5.0f} ms')
+
+	return
+
+
+if __name__ == '__main__':
+	benchmark: str = sys.argv[1] if len(sys.argv) > 1 else 'insert'
+	if benchmark == 'insert':
+		benchmarkInsertDelete(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+	elif benchmark == 'bulk':
+		benchmarkBulkLoad(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+	elif benchmark == 'stats':
+		benchmarkOrderStatistics(int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
+	elif benchmark == 'concurrent':
+		benchmarkConcurrent(int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
+	elif benchmark == 'disk':
+		benchmarkDisk(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+	elif benchmark == 'persistent':
+		benchmarkPersistent(int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
+	elif benchmark == 'algebra':
+		benchmarkSetAlgebra(int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
+	elif benchmark == 'blocks':
+		benchmarkBlocks(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+	elif benchmark == 'compact':
+		benchmarkCompact(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+	elif benchmark == 'range':
+		benchmarkRange(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+	else:
+		raise Exception(f'Unknown benchmark: {benchmark}')
@@ -0,0 +1,357 @@
+from bisect import bisect_left, bisect_right
+from localutils.ds.tree import KeyNode, KeyValueNode, TreeNode
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+### Sorted-block ordered map implementations ###
+
+# a two level B+-tree: the entries live in sorted blocks of at most 'blockSize' keys, and 'maxes' holds the last key of
+# every block, so a lookup is one bisect over the maxes and one over a block. Blocks split in half when they grow past
+# 'blockSize' and merge with a neighbour when they shrink below a quarter of it.
+class BlockTreeBase(object):
+
+	def __new__(cls, *args, **kwargs):
+		if cls is BlockTreeBase:
+			raise TypeError('BlockTreeBase can not be instantiated directly.')
+		return object.__new__(cls)
+
+	def __init__(self, hasValues: bool, blockSize: int=512):
+		if blockSize < 4:
+			raise Exception(f'Block size must be at least 4, got {blockSize}')
+
+		self.size: int = 0
+		self.blockSize: int = blockSize
+		self.maxes: List[object] = []
+		self.keyBlocks: List[List[object]] = []
+		self.valueBlocks: Optional[List[List[object]]] = [] if hasValues else None
+
+	def _node(self, i: int, j: int) -> TreeNode:
+		if self.valueBlocks is None:
+			return KeyNode(self.keyBlocks[i][j])
+		return KeyValueNode(self.keyBlocks[i][j], self.valueBlocks[i][j])
+
+	# the entry at block i, position j, stepping into the neighbouring block when j falls just outside block i
+	def _entry(self, i: int, j: int) -> Optional[TreeNode]:
+		if j < 0:
+			if i == 0:
+				return None
+			i -= 1
+			j = len(self.keyBlocks[i]) - 1
+		elif j == len(self.keyBlocks[i]):
+			if i + 1 == len(self.keyBlocks):
+				return None
+			i += 1
+			j = 0
+
+		return self._node(i, j)
+
+	def _locate(self, key: object) -> Tuple[int, int]:
+		i = bisect_left(self.maxes, key)
+		if i == len(self.maxes):
+			return -1, -1
+
+		block = self.keyBlocks[i]
+		j = bisect_left(block, key)
+		if key < block[j]:
+			return -1, -1
+		return i, j
+
+	def _split(self, i: int) -> None:
+		block = self.keyBlocks[i]
+		half = len(block) // 2
+		self.keyBlocks.insert(i + 1, block[half:])
+		del block[half:]
+		if self.valueBlocks is not None:
+			values = self.valueBlocks[i]
+			self.valueBlocks.insert(i + 1, values[half:])
+			del values[half:]
+
+		self.maxes.insert(i, block[-1])
+		return
+
+	def _merge(self, i: int) -> None:
+		if i + 1 == len(self.keyBlocks):
+			i -= 1
+
+		self.keyBlocks[i].extend(self.keyBlocks[i + 1])
+		del self.keyBlocks[i + 1]
+		if self.valueBlocks is not None:
+			self.valueBlocks[i].extend(self.valueBlocks[i + 1])
+			del self.valueBlocks[i + 1]
+
+		del self.maxes[i]
+		if len(self.keyBlocks[i]) > self.blockSize:
+			self._split(i)
+
+		return
+
+	def _insert(self, key: object, value: object) -> None:
+		maxes = self.maxes
+		if not maxes:
+			maxes.append(key)
+			self.keyBlocks.append([ key ])
+			if self.valueBlocks is not None:
+				self.valueBlocks.append([ value ])
+			self.size = 1
+			return
+
+		i = bisect_left(maxes, key)
+		if i == len(maxes):
+			# past the current maximum, append to the last block
+			i -= 1
+			block = self.keyBlocks[i]
+			block.append(key)
+			if self.valueBlocks is not None:
+				self.valueBlocks[i].append(value)
+			maxes[i] = key
+		else:
+			block = self.keyBlocks[i]
+			j = bisect_left(block, key)
+			if not key < block[j]:
+				block[j] = key # replace if key found
+				if self.valueBlocks is not None:
+					self.valueBlocks[i][j] = value
+				return
+
+			block.insert(j, key)
+			if self.valueBlocks is not None:
+				self.valueBlocks[i].insert(j, value)
+
+		self.size += 1
+		if len(block) > self.blockSize:
+			self._split(i)
+
+		return
+
+	def _delete(self, key: object) -> bool:
+		i, j = self._locate(key)
+		if i < 0:
+			return False
+
+		block = self.keyBlocks[i]
+		del block[j]
+		if self.valueBlocks is not None:
+			del self.valueBlocks[i][j]
+		self.size -= 1
+
+		if not block:
+			del self.keyBlocks[i]
+			del self.maxes[i]
+			if self.valueBlocks is not None:
+				del self.valueBlocks[i]
+		else:
+			if j == len(block):
+				self.maxes[i] = block[-1]
+			if len(block) < self.blockSize // 4 and len(self.keyBlocks) > 1:
+				self._merge(i)
+
+		return True
+
+	def _loadSorted(self, entries: Iterable[Tuple[object, object]]) -> None:
+		keys: List[object] = []
+		values: List[object] = []
+		for key, value in entries:
+			if keys and not keys[-1] < key:
+				if key < keys[-1]:
+					raise Exception(f'Keys must be in ascending order, found {key} after {keys[-1]}')
+				values[-1] = value
+				continue
+
+			keys.append(key)
+			values.append(value)
+
+		# blocks are filled to half their capacity, leaving room for inserts before the first splits
+		step = max(self.blockSize // 2, 1)
+		self.keyBlocks = [ keys[i:i + step] for i in range(0, len(keys), step) ]
+		if self.valueBlocks is not None:
+			self.valueBlocks = [ values[i:i + step] for i in range(0, len(values), step) ]
+		self.maxes = [ block[-1] for block in self.keyBlocks ]
+		self.size = len(keys)
+		return
+
+	def find(self, key: object) -> Optional[TreeNode]:
+		i, j = self._locate(key)
+		return self._node(i, j) if i >= 0 else None
+
+	def contains(self, key: object) -> bool:
+		return self._locate(key)[0] >= 0
+
+	def remove(self, key: object) -> bool:
+		return self._delete(key)
+
+	def minimum(self) -> Optional[TreeNode]:
+		return self._node(0, 0) if self.size > 0 else None
+
+	def maximum(self) -> Optional[TreeNode]:
+		return self._node(-1, -1) if self.size > 0 else None
+
+	def next(self, node: TreeNode) -> Optional[TreeNode]:
+		return self.higher(node.key)
+
+	def previous(self, node: TreeNode) -> Optional[TreeNode]:
+		return self.lower(node.key)
+
+	# greatest node with a key <= key
+	def floor(self, key: object) -> Optional[TreeNode]:
+		if self.size == 0:
+			return None
+
+		i = bisect_left(self.maxes, key)
+		if i == len(self.maxes):
+			return self.maximum()
+		return self._entry(i, bisect_right(self.keyBlocks[i], key) - 1)
+
+	# smallest node with a key >= key
+	def ceiling(self, key: object) -> Optional[TreeNode]:
+		i = bisect_left(self.maxes, key)
+		if i == len(self.maxes):
+			return None
+		return self._node(i, bisect_left(self.keyBlocks[i], key))
+
+	# greatest node with a key < key
+	def lower(self, key: object) -> Optional[TreeNode]:
+		if self.size == 0:
+			return None
+
+		i = bisect_left(self.maxes, key)
+		if i == len(self.maxes):
+			return self.maximum()
+		return self._entry(i, bisect_left(self.keyBlocks[i], key) - 1)
+
+	# smallest node with a key > key
+	def higher(self, key: object) -> Optional[TreeNode]:
+		i = bisect_right(self.maxes, key)
+		if i == len(self.maxes):
+			return None
+		return self._node(i, bisect_right(self.keyBlocks[i], key))
+
+	# position of the first entry >= key, or when reversed of the last entry < key (<= key if inclusive); a None key starts at the end
+	def _start(self, key: Optional[object], reverse: bool=False, inclusive: bool=False) -> Tuple[int, int]:
+		blocks = self.keyBlocks
+		if key is None:
+			i = len(blocks) if reverse else 0
+		else:
+			i = bisect_left(self.maxes, key)
+
+		if not reverse:
+			return i, bisect_left(blocks[i], key) if key is not None and i < len(blocks) else 0
+		elif i == len(blocks):
+			return i - 1, len(blocks[i - 1]) - 1 if i > 0 else -1
+		return i, (bisect_right if inclusive else bisect_left)(blocks[i], key) - 1
+
+	def _positions(self, i: int, j: int, reverse: bool=False) -> Iterator[Tuple[int, int]]:
+		blocks = self.keyBlocks
+		if reverse:
+			while i >= 0:
+				while j >= 0:
+					yield i, j
+					j -= 1
+				i -= 1
+				j = len(blocks[i]) - 1 if i >= 0 else -1
+		else:
+			while i < len(blocks):
+				while j < len(blocks[i]):
+					yield i, j
+					j += 1
+				i += 1
+				j = 0
+
+	def nodes(self, reverse: bool=False, start: Optional[TreeNode]=None) -> Iterator[TreeNode]:
+		i, j = self._start(start.key if start is not None else None, reverse, True)
+		for i, j in self._positions(i, j, reverse):
+			yield self._node(i, j)
+
+	def keys(self, reverse: bool=False) -> Iterator[object]:
+		blocks = reversed(self.keyBlocks) if reverse else self.keyBlocks
+		for block in blocks:
+			yield from (reversed(block) if reverse else block)
+
+	def values(self, reverse: bool=False) -> Iterator[object]:
+		if self.valueBlocks is None:
+			yield from self.keys(reverse)
+			return
+
+		blocks = reversed(self.valueBlocks) if reverse else self.valueBlocks
+		for block in blocks:
+			yield from (reversed(block) if reverse else block)
+
+	def items(self, reverse: bool=False) -> Iterator[Tuple[object, object]]:
+		if self.valueBlocks is None:
+			for key in self.keys(reverse):
+				yield key, key
+			return
+
+		for keys, values in (zip(reversed(self.keyBlocks), reversed(self.valueBlocks)) if reverse else zip(self.keyBlocks, self.valueBlocks)):
+			yield from (zip(reversed(keys), reversed(values)) if reverse else zip(keys, values))
+
+	# nodes with lo <= key < hi, either bound may be None; both ends are found by bisection and the blocks are sliced in between
+	def range(self, lo: Optional[object]=None, hi: Optional[object]=None, reverse: bool=False) -> Iterator[TreeNode]:
+		blocks = self.keyBlocks
+		if reverse:
+			first, start = self._start(hi, True)
+			last, stop = self._start(lo, True) if lo is not None else (0, -1)
+			spans = ((i, stop + 1 if i == last else 0, start + 1 if i == first else len(blocks[i])) for i in range(first, last - 1, -1))
+		else:
+			first, start = self._start(lo)
+			last, stop = self._start(hi) if hi is not None else (len(blocks), 0)
+			spans = ((i, start if i == first else 0, stop if i == last else len(blocks[i])) for i in range(first, min(last, len(blocks) - 1) + 1))
+
+		for i, begin, end in spans:
+			if begin >= end:
+				continue
+
+			keys = blocks[i][begin:end]
+			if self.valueBlocks is None:
+				nodes = map(KeyNode, keys)
+			else:
+				nodes = map(KeyValueNode, keys, self.valueBlocks[i][begin:end])
+			yield from (reversed(list(nodes)) if reverse else nodes)
+
+	# the blocks have no tree shape, so only the in-order (sorted) traversal exists
+	def getKeys(self, traversal: str='inorder') -> List[object]:
+		if traversal != 'inorder':
+			raise Exception(f'Invalid block tree traversal order: {traversal}')
+
+		return [ key for block in self.keyBlocks for key in block ]
+
+
+class BlockTreeMap(BlockTreeBase):
+
+	hasValues: bool = True
+
+	def __init__(self, blockSize: int=512):
+		BlockTreeBase.__init__(self, True, blockSize)
+
+	@classmethod
+	def fromSorted(cls, items: Iterable[Tuple[object, object]], blockSize: int=512) -> 'BlockTreeMap':
+		tree = cls(blockSize)
+		tree._loadSorted(items)
+		return tree
+
+	@classmethod
+	def fromIterable(cls, items: Iterable[Tuple[object, object]], blockSize: int=512) -> 'BlockTreeMap':
+		return cls.fromSorted(sorted(items, key=lambda item: item[0]), blockSize)
+
+	def add(self, key: object, value: object):
+		self._insert(key, value)
+
+
+class BlockTreeSet(BlockTreeBase):
+
+	hasValues: bool = False
+
+	def __init__(self, blockSize: int=512):
+		BlockTreeBase.__init__(self, False, blockSize)
+
+	@classmethod
+	def fromSorted(cls, keys: Iterable[object], blockSize: int=512) -> 'BlockTreeSet':
+		tree = cls(blockSize)
+		tree._loadSorted((key, None) for key in keys)
+		return tree
+
+	@classmethod
+	def fromIterable(cls, keys: Iterable[object], blockSize: int=512) -> 'BlockTreeSet':
+		return cls.fromSorted(sorted(keys), blockSize)
+
+	def add(self, key: object):
+		self._insert(key, None)
@@ -0,0 +1,387 @@
+import gc
+from array import array
+from collections import deque
+from localutils.ds.tree import KeyNode, KeyValueNode, TreeNode
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+### Array-backed AVL-Tree implementations ###
+
+# nodes are integer ids into parallel columns; id 0 is a sentinel with height 0 that stands in for every missing child,
+# so heights can be read without None checks. Deleted ids are chained through the 'lefts' column and reused by later inserts.
+# There is no parent column: insert and delete remember the path they walked down and retrace along it.
+class CompactTreeBase(object):
+
+	def __new__(cls, *args, **kwargs):
+		if cls is CompactTreeBase:
+			raise TypeError('CompactTreeBase can not be instantiated directly.')
+		return object.__new__(cls)
+
+	def __init__(self, hasValues: bool):
+		self.size: int = 0
+		self.root: int = 0
+		self.nodeKeys: List[object] = [ None ]
+		self.nodeValues: Optional[List[object]] = [ None ] if hasValues else None
+		self.heights: array = array('b', [ 0 ])
+		self.lefts: array = array('i', [ 0 ])
+		self.rights: array = array('i', [ 0 ])
+		self.free: int = 0
+
+	def _allocate(self, key: object, value: object) -> int:
+		node = self.free
+		if node != 0:
+			self.free = self.lefts[node]
+			self.nodeKeys[node] = key
+			if self.nodeValues is not None:
+				self.nodeValues[node] = value
+			self.heights[node] = 1
+			self.lefts[node] = 0
+			self.rights[node] = 0
+			return node
+
+		self.nodeKeys.append(key)
+		if self.nodeValues is not None:
+			self.nodeValues.append(value)
+		self.heights.append(1)
+		self.lefts.append(0)
+		self.rights.append(0)
+		return len(self.nodeKeys) - 1
+
+	def _release(self, node: int) -> None:
+		self.nodeKeys[node] = None
+		if self.nodeValues is not None:
+			self.nodeValues[node] = None
+		self.rights[node] = 0
+		self.lefts[node] = self.free
+		self.free = node
+		return
+
+	def _detach(self, node: int) -> Optional[TreeNode]:
+		if node == 0:
+			return None
+		elif self.nodeValues is None:
+			return KeyNode(self.nodeKeys[node])
+		else:
+			return KeyValueNode(self.nodeKeys[node], self.nodeValues[node])
+
+	def _rotate(self, node: int, direction: str) -> int:
+		heights = self.heights
+		lefts = self.lefts
+		rights = self.rights
+
+		if direction == 'right':
+			newroot = lefts[node]
+			lefts[node] = rights[newroot]
+			rights[newroot] = node
+		else:
+			newroot = rights[node]
+			rights[node] = lefts[newroot]
+			lefts[newroot] = node
+
+		lheight, rheight = heights[lefts[node]], heights[rights[node]]
+		heights[node] = 1 + (lheight if lheight > rheight else rheight)
+		lheight, rheight = heights[lefts[newroot]], heights[rights[newroot]]
+		heights[newroot] = 1 + (lheight if lheight > rheight else rheight)
+		return newroot
+
+	# 'path' holds the nodes from the root down to the parent of the change; the walk stops once a subtree keeps its old height
+	def _retrace(self, path: List[int]) -> None:
+		heights = self.heights
+		lefts = self.lefts
+		rights = self.rights
+
+		while path:
+			node = path.pop()
+			left, right = lefts[node], rights[node]
+			lheight, rheight = heights[left], heights[right]
+			oldheight = heights[node]
+
+			if lheight - rheight > 1:
+				if heights[lefts[left]] < heights[rights[left]]:
+					lefts[node] = self._rotate(left, 'left')
+				subtree = self._rotate(node, 'right')
+			elif rheight - lheight > 1:
+				if heights[rights[right]] < heights[lefts[right]]:
+					rights[node] = self._rotate(right, 'right')
+				subtree = self._rotate(node, 'left')
+			else:
+				heights[node] = 1 + (lheight if lheight > rheight else rheight)
+				subtree = node
+
+			if subtree != node:
+				if not path:
+					self.root = subtree
+				elif lefts[path[-1]] == node:
+					lefts[path[-1]] = subtree
+				else:
+					rights[path[-1]] = subtree
+
+			if heights[subtree] == oldheight:
+				break
+
+		return
+
+	def _insert(self, key: object, value: object) -> None:
+		keys = self.nodeKeys
+		lefts = self.lefts
+		rights = self.rights
+		path: List[int] = []
+		node = self.root
+
+		while node != 0:
+			current = keys[node]
+			if key < current:
+				path.append(node)
+				node = lefts[node]
+			elif current < key:
+				path.append(node)
+				node = rights[node]
+			else:
+				keys[node] = key # replace if key found
+				if self.nodeValues is not None:
+					self.nodeValues[node] = value
+				return
+
+		node = self._allocate(key, value)
+		if not path:
+			self.root = node
+		elif key < keys[path[-1]]:
+			lefts[path[-1]] = node
+		else:
+			rights[path[-1]] = node
+
+		self.size += 1
+		self._retrace(path)
+		return
+
+	def _delete(self, key: object) -> bool:
+		keys = self.nodeKeys
+		lefts = self.lefts
+		rights = self.rights
+		path: List[int] = []
+		node = self.root
+
+		while node != 0:
+			current = keys[node]
+			if key < current:
+				path.append(node)
+				node = lefts[node]
+			elif current < key:
+				path.append(node)
+				node = rights[node]
+			else:
+				break
+
+		if node == 0:
+			return False
+
+		# a node with two children takes over its in-order predecessor's entry, and the predecessor is unlinked instead
+		if lefts[node] != 0 and rights[node] != 0:
+			path.append(node)
+			predecessor = lefts[node]
+			while rights[predecessor] != 0:
+				path.append(predecessor)
+				predecessor = rights[predecessor]
+
+			keys[node] = keys[predecessor]
+			if self.nodeValues is not None:
+				self.nodeValues[node] = self.nodeValues[predecessor]
+			node = predecessor
+
+		child = lefts[node] if lefts[node] != 0 else rights[node]
+		if not path:
+			self.root = child
+		elif lefts[path[-1]] == node:
+			lefts[path[-1]] = child
+		else:
+			rights[path[-1]] = child
+
+		self._release(node)
+		self.size -= 1
+		self._retrace(path)
+		return True
+
+	def _findNode(self, key: object) -> int:
+		keys = self.nodeKeys
+		lefts = self.lefts
+		rights = self.rights
+		node = self.root
+
+		while node != 0:
+			current = keys[node]
+			if key < current:
+				node = lefts[node]
+			elif current < key:
+				node = rights[node]
+			else:
+				return node
+
+		return 0
+
+	# sorted entries are linked around their midpoints, giving a perfectly balanced tree in O(N)
+	def _loadSorted(self, entries: Iterable[Tuple[object, object]]) -> None:
+		gcEnabled = gc.isenabled()
+		gc.disable() # only reachable objects are allocated, see TreeBase._fromSortedNodes
+
+		try:
+			for key, value in entries:
+				if self.size > 0 and not self.nodeKeys[-1] < key:
+					if key < self.nodeKeys[-1]:
+						raise Exception(f'Keys must be in ascending order, found {key} after {self.nodeKeys[-1]}')
+					if self.nodeValues is not None:
+						self.nodeValues[-1] = value
+					continue
+
+				self._allocate(key, value)
+				self.size += 1
+
+		finally:
+			if gcEnabled:
+				gc.enable()
+
+		heights = self.heights
+		lefts = self.lefts
+		rights = self.rights
+		stack: List[Tuple[int, int, int, bool]] = [ (1, self.size + 1, 0, True) ] # (start, end, parent, is left child)
+		while stack:
+			start, end, parent, isLeft = stack.pop()
+			if start >= end:
+				continue
+
+			mid = (start + end) // 2
+			heights[mid] = (end - start).bit_length()
+			if parent == 0:
+				self.root = mid
+			elif isLeft:
+				lefts[parent] = mid
+			else:
+				rights[parent] = mid
+
+			stack.append((start, mid, mid, True))
+			stack.append((mid + 1, end, mid, False))
+
+		return
+
+	def find(self, key: object) -> Optional[TreeNode]:
+		return self._detach(self._findNode(key))
+
+	def contains(self, key: object) -> bool:
+		return self._findNode(key) != 0
+
+	def remove(self, key: object) -> bool:
+		return self._delete(key)
+
+	def minimum(self) -> Optional[TreeNode]:
+		node = self.root
+		while node != 0 and self.lefts[node] != 0:
+			node = self.lefts[node]
+		return self._detach(node)
+
+	def maximum(self) -> Optional[TreeNode]:
+		node = self.root
+		while node != 0 and self.rights[node] != 0:
+			node = self.rights[node]
+		return self._detach(node)
+
+	def _walk(self, reverse: bool=False) -> Iterator[int]:
+		first, second = (self.rights, self.lefts) if reverse else (self.lefts, self.rights)
+		stack: List[int] = []
+		node = self.root
+		while stack or node != 0:
+			while node != 0:
+				stack.append(node)
+				node = first[node]
+			node = stack.pop()
+			yield node
+			node = second[node]
+
+	def keys(self, reverse: bool=False) -> Iterator[object]:
+		keys = self.nodeKeys
+		for node in self._walk(reverse):
+			yield keys[node]
+
+	def values(self, reverse: bool=False) -> Iterator[object]:
+		values = self.nodeValues if self.nodeValues is not None else self.nodeKeys
+		for node in self._walk(reverse):
+			yield values[node]
+
+	def items(self, reverse: bool=False) -> Iterator[Tuple[object, object]]:
+		keys = self.nodeKeys
+		values = self.nodeValues if self.nodeValues is not None else self.nodeKeys
+		for node in self._walk(reverse):
+			yield keys[node], values[node]
+
+	def getKeys(self, traversal: str='inorder') -> List[object]:
+		if traversal not in ['inorder','preorder','postorder','breadthfirst']:
+			raise Exception(f'Invalid tree traversal order: {traversal}')
+
+		keys = self.nodeKeys
+		lefts = self.lefts
+		rights = self.rights
+		if self.root == 0:
+			return []
+
+		if traversal == 'inorder':
+			return [ keys[node] for node in self._walk() ]
+
+		order: List[int] = []
+		if traversal == 'breadthfirst':
+			queue = deque([ self.root ])
+			while queue:
+				node = queue.popleft()
+				order.append(node)
+				if lefts[node] != 0:
+					queue.append(lefts[node])
+				if rights[node] != 0:
+					queue.append(rights[node])
+
+		else:
+			# pre-order pushes right before left; post-order is the reverse of a root-right-left walk
+			first, second = (rights, lefts) if traversal == 'preorder' else (lefts, rights)
+			stack = [ self.root ]
+			while stack:
+				node = stack.pop()
+				order.append(node)
+				if first[node] != 0:
+					stack.append(first[node])
+				if second[node] != 0:
+					stack.append(second[node])
+
+			if traversal == 'postorder':
+				order.reverse()
+
+		return [ keys[node] for node in order ]
+
+
+class CompactTreeMap(CompactTreeBase):
+
+	hasValues: bool = True
+
+	def __init__(self):
+		CompactTreeBase.__init__(self, True)
+
+	@classmethod
+	def fromSorted(cls, items: Iterable[Tuple[object, object]]) -> 'CompactTreeMap':
+		tree = cls()
+		tree._loadSorted(items)
+		return tree
+
+	def add(self, key: object, value: object):
+		self._insert(key, value)
+
+
+class CompactTreeSet(CompactTreeBase):
+
+	hasValues: bool = False
+
+	def __init__(self):
+		CompactTreeBase.__init__(self, False)
+
+	@classmethod
+	def fromSorted(cls, keys: Iterable[object]) -> 'CompactTreeSet':
+		tree = cls()
+		tree._loadSorted((key, None) for key in keys)
+		return tree
+
+	def add(self, key: object):
+		self._insert(key, None)
@@ -0,0 +1,121 @@
+from collections import deque
+from contextlib import contextmanager
+from localutils.ds.tree import KeyValueNode, TreeMap, TreeNode
+from localutils.threadutils import ReadWriteLock
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+
+### Thread-safe TreeMap wrapper ###
+
+# lookups share a read lock and updates take the write lock. Nodes handed out are detached copies, since a live node's key can
+# change when a removal moves its successor into it. With a batch size, add() only queues the entry and the queue is applied
+# under one write lock once it fills up, on flush() and before a remove; until then reads do not see the queued entries
+class ConcurrentTreeMap(object):
+
+	def __init__(self, tree: Optional[TreeMap]=None, batchSize: int=0):
+		self.tree: TreeMap = tree if tree is not None else TreeMap()
+		self.lock: ReadWriteLock = ReadWriteLock()
+		self.batchSize: int = batchSize
+		self.pending: Deque[Tuple[object, object]] = deque()
+		self.batches: int = 0
+		self.batchedWrites: int = 0
+
+	@staticmethod
+	def _detach(node: Optional[TreeNode]) -> Optional[TreeNode]:
+		return KeyValueNode(node.key, node.getValue()) if node is not None else None
+
+	# must be called with the write lock held
+	def _drain(self) -> None:
+		if not self.pending:
+			return
+
+		count = 0
+		while self.pending:
+			key, value = self.pending.popleft()
+			self.tree.add(key, value)
+			count += 1
+
+		self.batches += 1
+		self.batchedWrites += count
+		return
+
+	def flush(self) -> None:
+		if self.pending:
+			with self.lock.writing():
+				self._drain()
+
+		return
+
+	# the wrapped tree under a held read lock, for lazy iteration without copying; the tree must not be changed or kept
+	@contextmanager
+	def reading(self) -> Iterator[TreeMap]:
+		with self.lock.reading():
+			yield self.tree
+
+	def add(self, key: object, value: object) -> None:
+		if self.batchSize > 0:
+			self.pending.append((key, value))
+			if len(self.pending) >= self.batchSize:
+				self.flush()
+			return
+
+		with self.lock.writing():
+			self.tree.add(key, value)
+
+		return
+
+	def remove(self, key: object) -> bool:
+		with self.lock.writing():
+			self._drain()
+			return self.tree.remove(key)
+
+	@property
+	def size(self) -> int:
+		return self.tree.size
+
+	def find(self, key: object) -> Optional[TreeNode]:
+		with self.reading() as tree:
+			return self._detach(tree.find(key))
+
+	def contains(self, key: object) -> bool:
+		with self.reading() as tree:
+			return tree.contains(key)
+
+	def minimum(self) -> Optional[TreeNode]:
+		with self.reading() as tree:
+			return self._detach(tree.minimum())
+
+	def maximum(self) -> Optional[TreeNode]:
+		with self.reading() as tree:
+			return self._detach(tree.maximum())
+
+	def floor(self, key: object) -> Optional[TreeNode]:
+		with self.reading() as tree:
+			return self._detach(tree.floor(key))
+
+	def ceiling(self, key: object) -> Optional[TreeNode]:
+		with self.reading() as tree:
+			return self._detach(tree.ceiling(key))
+
+	# the iteration results are copied out under the read lock, use reading() to walk the tree lazily instead
+	def range(self, lo: Optional[object]=None, hi: Optional[object]=None, reverse: bool=False) -> List[TreeNode]:
+		with self.reading() as tree:
+			return [ self._detach(node) for node in tree.range(lo, hi, reverse) ]
+
+	def keys(self, reverse: bool=False) -> List[object]:
+		with self.reading() as tree:
+			return list(tree.keys(reverse))
+
+	def items(self, reverse: bool=False) -> List[Tuple[object, object]]:
+		with self.reading() as tree:
+			return list(tree.items(reverse))
+
+	def getKeys(self, traversal: str='inorder') -> List[object]:
+		with self.reading() as tree:
+			return tree.getKeys(traversal)
+
+	def statistics(self) -> Dict[str, float]:
+		statistics = self.lock.statistics()
+		statistics['batches'] = self.batches
+		statistics['batchedWrites'] = self.batchedWrites
+		return statistics
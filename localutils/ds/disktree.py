@@ -0,0 +1,337 @@
+import mmap
+import os
+import pickle
+import struct
+from bisect import bisect_left, bisect_right
+from localutils.ds.blocktree import BlockTreeBase
+from localutils.ds.compacttree import CompactTreeBase
+from localutils.ds.tree import KeyNode, KeyValueNode, TreeBase, TreeMap, TreeNode, TreeSet
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+
+### Disk-backed ordered map ###
+
+# file layout, all integers little endian:
+#   header   magic, flags, block size, entry count, block count, index offset
+#   blocks   entry count, one offset per entry (relative to the block), then the entries: key length, key[, value length, value]
+#   index    per block: block offset, first key length, first key
+# keys and values are pickled, so only open files written by a trusted process. Entries are sorted by key, the index is read
+# into memory when the file is opened and each block is searched in place through the mapping.
+_MAGIC: bytes = b'LUDTREE1'
+_HEADER = struct.Struct('<8sIIQQQ')
+_INDEX = struct.Struct('<QI')
+_LENGTH = struct.Struct('<I')
+_HAS_VALUES: int = 1
+
+
+class _DiskTreeWriter(object):
+
+	def __init__(self, path: str, hasValues: bool, blockSize: int):
+		self.file = open(path, 'wb')
+		self.file.write(bytes(_HEADER.size))
+		self.offset: int = _HEADER.size
+		self.hasValues: bool = hasValues
+		self.blockSize: int = blockSize
+		self.size: int = 0
+		self.index: List[bytes] = []
+		self.pending: List[Tuple[bytes, bytes]] = []
+
+	def add(self, key: bytes, value: bytes) -> None:
+		self.pending.append((key, value))
+		if len(self.pending) == self.blockSize:
+			self.flush()
+
+		return
+
+	# an untouched block is copied as it is, its entry offsets are relative to the block start
+	def copy(self, block: bytes, firstKey: bytes) -> None:
+		self.flush()
+		self.write(block, firstKey, _LENGTH.unpack_from(block, 0)[0])
+		return
+
+	def flush(self) -> None:
+		if not self.pending:
+			return
+
+		entries, self.pending = self.pending, []
+		offsets: List[int] = []
+		parts: List[bytes] = []
+		position = _LENGTH.size * (len(entries) + 1)
+		for key, value in entries:
+			offsets.append(position)
+			parts.append(_LENGTH.pack(len(key)))
+			parts.append(key)
+			position += _LENGTH.size + len(key)
+			if self.hasValues:
+				parts.append(_LENGTH.pack(len(value)))
+				parts.append(value)
+				position += _LENGTH.size + len(value)
+
+		self.write(struct.pack(f'<{len(entries) + 1}I', len(entries), *offsets) + b''.join(parts), entries[0][0], len(entries))
+		return
+
+	def write(self, block: bytes, firstKey: bytes, count: int) -> None:
+		self.index.append(_INDEX.pack(self.offset, len(firstKey)) + firstKey)
+		self.file.write(block)
+		self.offset += len(block)
+		self.size += count
+		return
+
+	def finish(self) -> None:
+		self.flush()
+		self.file.write(b''.join(self.index))
+		self.file.seek(0)
+		self.file.write(_HEADER.pack(_MAGIC, _HAS_VALUES if self.hasValues else 0, self.blockSize, self.size, len(self.index), self.offset))
+		self.file.close()
+		return
+
+
+class DiskTreeMap(object):
+
+	def __init__(self, path: str):
+		self.path: str = path
+		self._open()
+
+	def _open(self) -> None:
+		self.file = open(self.path, 'rb')
+		self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, flags, self.blockSize, self.size, blocks, indexOffset = _HEADER.unpack_from(self.map, 0)
+		if magic != _MAGIC:
+			self.close()
+			raise Exception(f'Not a disk tree file: {self.path}')
+
+		self.hasValues: bool = flags & _HAS_VALUES != 0
+		self.offsets: List[int] = [] # block offsets, followed by the index offset that ends the last block
+		self.firstKeys: List[object] = []
+		position = indexOffset
+		for _ in range(blocks):
+			offset, length = _INDEX.unpack_from(self.map, position)
+			position += _INDEX.size
+			self.offsets.append(offset)
+			self.firstKeys.append(pickle.loads(self.map[position:position + length]))
+			position += length
+
+		self.offsets.append(indexOffset)
+		return
+
+	def close(self) -> None:
+		self.map.close()
+		self.file.close()
+		return
+
+	def __enter__(self) -> 'DiskTreeMap':
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.close()
+
+	# every tree flavour marks its sets with hasValues = False; trees without the marker are saved as maps
+	@classmethod
+	def save(cls, tree: Union[TreeBase, BlockTreeBase, CompactTreeBase, 'DiskTreeMap'], path: str, blockSize: int=64) -> 'DiskTreeMap':
+		hasValues = getattr(tree, 'hasValues', True)
+		temporary = f'{path}.tmp'
+		writer = _DiskTreeWriter(temporary, hasValues, blockSize)
+		dumps = pickle.dumps
+		for key, value in tree.items():
+			writer.add(dumps(key), dumps(value) if hasValues else b'')
+
+		writer.finish()
+		os.replace(temporary, path)
+		return cls(path)
+
+	def toTree(self) -> TreeBase:
+		if self.hasValues:
+			return TreeMap.fromSorted(self.items())
+		return TreeSet.fromSorted(self.keys())
+
+	def _count(self, block: int) -> int:
+		return _LENGTH.unpack_from(self.map, self.offsets[block])[0]
+
+	def _position(self, block: int, i: int) -> int:
+		start = self.offsets[block]
+		return start + _LENGTH.unpack_from(self.map, start + _LENGTH.size * (i + 1))[0]
+
+	def _key(self, position: int) -> object:
+		length = _LENGTH.unpack_from(self.map, position)[0]
+		return pickle.loads(self.map[position + _LENGTH.size:position + _LENGTH.size + length])
+
+	def _node(self, position: int) -> TreeNode:
+		length = _LENGTH.unpack_from(self.map, position)[0]
+		position += _LENGTH.size
+		key = pickle.loads(self.map[position:position + length])
+		if not self.hasValues:
+			return KeyNode(key)
+
+		position += length
+		length = _LENGTH.unpack_from(self.map, position)[0]
+		position += _LENGTH.size
+		return KeyValueNode(key, pickle.loads(self.map[position:position + length]))
+
+	# (block, index) of the first entry with a key >= key: the sparse index picks the block, a binary search over the
+	# block's entry offsets picks the entry. The index can equal the block's entry count when the entry is the next block's first
+	def _search(self, key: object) -> Tuple[int, int]:
+		block = bisect_right(self.firstKeys, key) - 1
+		if block < 0:
+			return 0, 0
+
+		data, unpack, loads, size = self.map, _LENGTH.unpack_from, pickle.loads, _LENGTH.size
+		start = self.offsets[block]
+		lo, hi = 0, unpack(data, start)[0]
+		while lo < hi:
+			mid = (lo + hi) // 2
+			position = start + unpack(data, start + size * (mid + 1))[0]
+			length = unpack(data, position)[0]
+			if loads(data[position + size:position + size + length]) < key:
+				lo = mid + 1
+			else:
+				hi = mid
+
+		return block, lo
+
+	def _walk(self, block: int, i: int, reverse: bool=False) -> Iterator[TreeNode]:
+		if reverse:
+			while block >= 0:
+				while i >= 0:
+					yield self._node(self._position(block, i))
+					i -= 1
+				block -= 1
+				i = self._count(block) - 1 if block >= 0 else -1
+		else:
+			while block < len(self.firstKeys):
+				count = self._count(block)
+				while i < count:
+					yield self._node(self._position(block, i))
+					i += 1
+				block += 1
+				i = 0
+
+	def find(self, key: object) -> Optional[TreeNode]:
+		if self.size == 0:
+			return None
+
+		block, i = self._search(key)
+		if i == self._count(block):
+			return None
+
+		node = self._node(self._position(block, i))
+		return node if not key < node.key else None
+
+	def contains(self, key: object) -> bool:
+		return self.find(key) is not None
+
+	def minimum(self) -> Optional[TreeNode]:
+		return self._node(self._position(0, 0)) if self.size > 0 else None
+
+	def maximum(self) -> Optional[TreeNode]:
+		if self.size == 0:
+			return None
+
+		block = len(self.firstKeys) - 1
+		return self._node(self._position(block, self._count(block) - 1))
+
+	# nodes with lo <= key < hi, where a bound of None leaves that side open
+	def range(self, lo: Optional[object]=None, hi: Optional[object]=None, reverse: bool=False) -> Iterator[TreeNode]:
+		if self.size == 0:
+			return
+
+		if reverse:
+			if hi is None:
+				block = len(self.firstKeys) - 1
+				i = self._count(block) - 1
+			else:
+				block, i = self._search(hi)
+				i -= 1
+
+			for node in self._walk(block, i, True):
+				if lo is not None and node.key < lo:
+					return
+				yield node
+		else:
+			block, i = self._search(lo) if lo is not None else (0, 0)
+			for node in self._walk(block, i):
+				if hi is not None and not node.key < hi:
+					return
+				yield node
+
+	def nodes(self, reverse: bool=False) -> Iterator[TreeNode]:
+		return self.range(reverse=reverse)
+
+	def keys(self, reverse: bool=False) -> Iterator[object]:
+		for node in self.range(reverse=reverse):
+			yield node.key
+
+	def values(self, reverse: bool=False) -> Iterator[object]:
+		for node in self.range(reverse=reverse):
+			yield node.getValue()
+
+	def items(self, reverse: bool=False) -> Iterator[Tuple[object, object]]:
+		for node in self.range(reverse=reverse):
+			yield node.key, node.getValue()
+
+	# the file has no tree shape, so only the in-order (sorted) traversal exists
+	def getKeys(self, traversal: str='inorder') -> List[object]:
+		if traversal != 'inorder':
+			raise Exception(f'Invalid disk tree traversal order: {traversal}')
+
+		return list(self.keys())
+
+	# rewrites the file with the delta's entries added or replaced and the removed keys dropped. Blocks whose key range holds
+	# no change are copied byte for byte, only the touched blocks are decoded, merged and written out again
+	def merge(self, delta: Optional[TreeBase]=None, removals: Iterable[object]=()) -> None:
+		updates: List[Tuple[object, object]] = list(delta.items()) if delta is not None else []
+		updateKeys: List[object] = [ key for key, _ in updates ]
+		removed: List[object] = sorted(removals)
+		dumps = pickle.dumps
+		temporary = f'{self.path}.tmp'
+		writer = _DiskTreeWriter(temporary, self.hasValues, self.blockSize)
+
+		u = r = 0
+		blocks = len(self.firstKeys)
+		for block in range(max(blocks, 1)):
+			# block b holds the keys below the next block's first key, and the first block also takes any key before its own
+			upper = self.firstKeys[block + 1] if block + 1 < blocks else None
+			uEnd = bisect_left(updateKeys, upper, u) if upper is not None else len(updates)
+			rEnd = bisect_left(removed, upper, r) if upper is not None else len(removed)
+			if uEnd == u and rEnd == r:
+				if blocks > 0:
+					writer.copy(self.map[self.offsets[block]:self.offsets[block + 1]], dumps(self.firstKeys[block]))
+				continue
+
+			entries: List[Tuple[object, bytes, bytes]] = []
+			for i in range(self._count(block) if blocks > 0 else 0):
+				position = self._position(block, i)
+				length = _LENGTH.unpack_from(self.map, position)[0]
+				keyBytes = self.map[position + _LENGTH.size:position + _LENGTH.size + length]
+				valueBytes = b''
+				if self.hasValues:
+					position += _LENGTH.size + length
+					length = _LENGTH.unpack_from(self.map, position)[0]
+					valueBytes = self.map[position + _LENGTH.size:position + _LENGTH.size + length]
+				entries.append((pickle.loads(keyBytes), keyBytes, valueBytes))
+
+			j = 0
+			while j < len(entries) or u < uEnd:
+				if u < uEnd and (j == len(entries) or not entries[j][0] < updateKeys[u]):
+					key, value = updates[u]
+					if j < len(entries) and not key < entries[j][0]:
+						j += 1 # replaced by the update
+					u += 1
+					encoded = (dumps(key), dumps(value) if self.hasValues else b'')
+				else:
+					key, keyBytes, valueBytes = entries[j]
+					j += 1
+					encoded = (keyBytes, valueBytes)
+
+				while r < rEnd and removed[r] < key:
+					r += 1
+				if r < rEnd and not key < removed[r]:
+					continue
+				writer.add(*encoded)
+
+			u, r = uEnd, rEnd
+
+		writer.finish()
+		self.close()
+		os.replace(temporary, self.path)
+		self._open()
+		return
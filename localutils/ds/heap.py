@@ -1,96 +1,650 @@
+import heapq
 from enum import Enum
-from typing import Callable, List, Optional
+from itertools import chain, count
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar('T')
 
 
 class HeapType(Enum):
 	MinHeap = 'MinHeap',
 	MaxHeap = 'MaxHeap'
-	
 
-class Heap:
-	
-	def __init__(self, heaptype: HeapType=HeapType.MinHeap):
-		self.values: List[int] = []
-		self.numvalues: int = 0
-		
+
+class HeapArity(Enum):
+	Binary = 2
+	Quaternary = 4
+	Octonary = 8
+
+
+# insertion order shared by every heap, so entries moved between heaps by merge() still never tie
+_ORDER = count()
+
+
+# binary min-heaps run on heapq, every other shape on the sift loops below, all comparing entries with the plain operators.
+# With a key function every item is stored once as a (key, order, item) entry, so the key is computed once per item and
+# the items themselves are never compared; the order keeps items with equal keys first in, first out. A wider arity makes
+# the heap shallower, which saves sift iterations at the cost of picking the best of more children on the way down
+class Heap(Generic[T]):
+
+	def __init__(self, heaptype: HeapType=HeapType.MinHeap, key: Optional[Callable[[T], Any]]=None, arity: HeapArity=HeapArity.Binary):
+		self.values: List[Any] = []
+		self.heaptype: HeapType = heaptype
+		self.key: Optional[Callable[[T], Any]] = key
+		self.arity: int = arity.value
+		self.native: bool = heaptype == HeapType.MinHeap and arity == HeapArity.Binary
+		self.positions: Optional[Dict[Any, int]] = None # set by IndexedHeap, see _recordPath
+
 		if heaptype == HeapType.MinHeap:
-			self.comparator: Callable[[int, int], bool] = lambda x,y: x < y
+			self.comparator: Callable[[Any, Any], bool] = lambda x,y: x < y
+		else:
+			self.comparator: Callable[[Any, Any], bool] = lambda x,y: x > y
+
+	@classmethod
+	def heapify(cls, items: Iterable[T], heaptype: HeapType=HeapType.MinHeap, key: Optional[Callable[[T], Any]]=None, arity: HeapArity=HeapArity.Binary) -> 'Heap[T]':
+		heap = cls(heaptype, key, arity)
+		heap.values = [ heap._entry(item) for item in items ] if key is not None else list(items)
+		heap._heapifyAll()
+		return heap
+
+	@property
+	def numvalues(self) -> int:
+		return len(self.values)
+
+	def _entry(self, item: T) -> Any:
+		if self.key is None:
+			return item
+		elif self.heaptype == HeapType.MinHeap:
+			return (self.key(item), next(_ORDER), item)
+		return (self.key(item), -next(_ORDER), item) # a max-heap pops the greatest order first, so earlier items get greater ones
+
+	def _item(self, entry: Any) -> T:
+		return entry if self.key is None else entry[2]
+
+	def _heapifyAll(self) -> None:
+		if self.native:
+			heapq.heapify(self.values)
+			return
+
+		for index in range((len(self.values) - 2) // self.arity, -1, -1):
+			self._siftDown(index)
+
+		return
+
+	# the moving entry is held aside and written once where it stops
+	def _siftUp(self, index: int) -> None:
+		values, arity = self.values, self.arity
+		isMin = self.heaptype == HeapType.MinHeap
+		start = index
+		entry = values[index]
+		while index > 0:
+			parent = (index - 1) // arity
+			above = values[parent]
+			if not (entry < above if isMin else entry > above):
+				break
+			values[index] = above
+			index = parent
+
+		values[index] = entry
+		if self.positions is not None:
+			self._recordPath(start, index)
+		return
+
+	def _siftDown(self, index: int) -> None:
+		if self.arity > 2:
+			self._siftDownWide(index)
+			return
+
+		values = self.values
+		isMin = self.heaptype == HeapType.MinHeap
+		size = len(values)
+		start = index
+		entry = values[index]
+		child = 2 * index + 1
+		while child < size:
+			if child + 1 < size and (values[child + 1] < values[child] if isMin else values[child + 1] > values[child]):
+				child += 1
+			below = values[child]
+			if not (below < entry if isMin else below > entry):
+				break
+			values[index] = below
+			index = child
+			child = 2 * index + 1
+
+		values[index] = entry
+		if self.positions is not None:
+			self._recordPath(index, start)
+		return
+
+	# a full family of four is settled in an unrolled knockout of three comparisons and one of eight as two such knockouts,
+	# since a loop over the children costs more than the levels the wider heap saves; only the last family can be partial
+	def _siftDownWide(self, index: int) -> None:
+		values, arity = self.values, self.arity
+		isMin = self.heaptype == HeapType.MinHeap
+		size = len(values)
+		start = index
+		entry = values[index]
+		child = arity * index + 1
+		if isMin:
+			while child + arity <= size:
+				a, b, c, d = values[child:child + 4]
+				i, j = child, child + 2
+				if b < a:
+					a, i = b, child + 1
+				if d < c:
+					c, j = d, child + 3
+				if c < a:
+					a, i = c, j
+				if arity == 8:
+					b, c, d, e = values[child + 4:child + 8]
+					j, k = child + 4, child + 6
+					if c < b:
+						b, j = c, child + 5
+					if e < d:
+						d, k = e, child + 7
+					if d < b:
+						b, j = d, k
+					if b < a:
+						a, i = b, j
+
+				if not a < entry:
+					break
+				values[index] = a
+				index = i
+				child = arity * index + 1
 		else:
-			self.comparator: Callable[[int, int], bool] = lambda x,y: x > y
-		
+			while child + arity <= size:
+				a, b, c, d = values[child:child + 4]
+				i, j = child, child + 2
+				if b > a:
+					a, i = b, child + 1
+				if d > c:
+					c, j = d, child + 3
+				if c > a:
+					a, i = c, j
+				if arity == 8:
+					b, c, d, e = values[child + 4:child + 8]
+					j, k = child + 4, child + 6
+					if c > b:
+						b, j = c, child + 5
+					if e > d:
+						d, k = e, child + 7
+					if d > b:
+						b, j = d, k
+					if b > a:
+						a, i = b, j
+
+				if not a > entry:
+					break
+				values[index] = a
+				index = i
+				child = arity * index + 1
+
+		if child < size and child + arity > size:
+			children = values[child:]
+			below = min(children) if isMin else max(children)
+			if below < entry if isMin else below > entry:
+				values[index] = below
+				index = child + children.index(below)
+
+		values[index] = entry
+		if self.positions is not None:
+			self._recordPath(index, start)
+		return
+
+	# a sift only moves the entries on the path between where its entry started and where it stopped, so with a position map
+	# (item -> index, for entries shaped (priority, order, item)) the path is walked once from its deep end up to record them
+	def _recordPath(self, deep: int, shallow: int) -> None:
+		values, positions, arity = self.values, self.positions, self.arity
+		positions[values[deep][2]] = deep
+		while deep != shallow:
+			deep = (deep - 1) // arity
+			positions[values[deep][2]] = deep
+
+		return
+
+	# pushes entries one by one while k * log2(n + k) sifts cost less than re-heapifying all n + k entries
+	def _extend(self, entries: List[Any]) -> None:
+		size = len(self.values) + len(entries)
+		if len(entries) * size.bit_length() > size:
+			self.values.extend(entries)
+			self._heapifyAll()
+			return
+
+		for entry in entries:
+			if self.native:
+				heapq.heappush(self.values, entry)
+			else:
+				self.values.append(entry)
+				self._siftUp(len(self.values) - 1)
+
+		return
+
+	# the index helpers below describe the binary layout
 	@staticmethod
 	def getParentIndex(index: int) -> Optional[int]:
 		if index == 0:
 			return None
-		
+
 		_offset:int = 2 if index % 2 == 0 else 1
 		return int((index - _offset) / 2)
-	
+
 	def getLeftIndex(self, index: int) -> Optional[int]:
 		_left: int = (index * 2) + 1
 		return _left if _left < self.numvalues else None
-	
+
 	def getRightIndex(self, index: int) -> Optional[int]:
 		_right: int = (index * 2) + 2
 		return _right if _right < self.numvalues else None
-	
+
 	def getChildIndex(self, index: int) -> Optional[int]:
 		_left: int = self.getLeftIndex(index)
 		if _left is None:
 			return None
-		
+
 		_right: int = self.getRightIndex(index)
 		if _right is None:
 			return _left
-		
+
 		return _left if self.comparator(self.values[_left], self.values[_right]) else _right
-	
+
 	def swapValues(self, indexA: int, indexB: int) -> None:
-		_tmp: int = self.values[indexA]
-		self.values[indexA] = self.values[indexB]
-		self.values[indexB] = _tmp
-		return
-	
-	def peek(self) -> Optional[int]:
-		return self.values[0] if self.numvalues > 0 else None
-	
-	def pop(self) -> Optional[int]:
-		if self.numvalues == 0:
+		self.values[indexA], self.values[indexB] = self.values[indexB], self.values[indexA]
+		return
+
+	def peek(self) -> Optional[T]:
+		return self._item(self.values[0]) if self.values else None
+
+	def pop(self) -> Optional[T]:
+		if not self.values:
 			return None
-		
-		_last: int = self.numvalues - 1
-		_value: int = self.values[0]
-		self.swapValues(0, _last)
-		self.numvalues -= 1
-		self.heapifyDown()
-		return _value
-	
-	def push(self, value: int) -> None:
-		if self.numvalues == len(self.values):
-			self.values.append(value)
-		else:		
-			self.values[self.numvalues] = value
-			
-		self.numvalues += 1
-		self.heapifyUp()
-		return
-	
+		elif self.native:
+			return self._item(heapq.heappop(self.values))
+
+		last = self.values.pop()
+		if not self.values:
+			return self._item(last)
+
+		entry = self.values[0]
+		self.values[0] = last
+		self._siftDown(0)
+		return self._item(entry)
+
+	def push(self, value: T) -> None:
+		if self.native:
+			heapq.heappush(self.values, self._entry(value))
+			return
+
+		self.values.append(self._entry(value))
+		self._siftUp(len(self.values) - 1)
+		return
+
+	def pushMany(self, items: Iterable[T]) -> None:
+		self._extend([ self._entry(item) for item in items ] if self.key is not None else list(items))
+		return
+
+	# takes over the other heap's entries, leaving it empty; both heaps must order the same way and use compatible keys
+	def merge(self, other: 'Heap[T]') -> None:
+		if other.heaptype != self.heaptype or (other.key is None) != (self.key is None):
+			raise Exception('Cannot merge heaps with different orderings')
+
+		entries, other.values = other.values, []
+		self._extend(entries)
+		return
+
+	# up to k items in pop order; draining the whole heap sorts it instead
+	def popMany(self, k: int) -> List[T]:
+		if k >= len(self.values):
+			entries = sorted(self.values, reverse=self.heaptype == HeapType.MaxHeap)
+			self.values = []
+		elif not self.native:
+			return [ self.pop() for _ in range(k) ]
+		else:
+			values, heappop = self.values, heapq.heappop
+			entries = [ heappop(values) for _ in range(k) ]
+
+		return [ entry[2] for entry in entries ] if self.key is not None else entries
+
+	# push then pop in one sift: the new item comes straight back when it would be the top
+	def pushpop(self, value: T) -> T:
+		entry = self._entry(value)
+		if self.native:
+			return self._item(heapq.heappushpop(self.values, entry))
+		elif not self.values or not (self.values[0] < entry if self.heaptype == HeapType.MinHeap else self.values[0] > entry):
+			return value
+
+		entry, self.values[0] = self.values[0], entry
+		self._siftDown(0)
+		return self._item(entry)
+
+	# pop then push in one sift, the popped item may be smaller (or greater) than the new one; raises IndexError when empty
+	def replace(self, value: T) -> T:
+		entry = self._entry(value)
+		if self.native:
+			return self._item(heapq.heapreplace(self.values, entry))
+		elif not self.values:
+			raise IndexError('replace on an empty heap')
+
+		entry, self.values[0] = self.values[0], entry
+		self._siftDown(0)
+		return self._item(entry)
+
 	def heapifyUp(self) -> None:
-		_index: int = self.numvalues - 1
-		_parent: Optional[int] = Heap.getParentIndex(_index)
-		while _parent is not None and self.comparator(self.values[_index], self.values[_parent]):
-			self.swapValues(_index, _parent)
-			_index = _parent
-			_parent = Heap.getParentIndex(_parent)
-			
-		return
-	
+		if self.values:
+			self._siftUp(len(self.values) - 1)
+
+		return
+
 	def heapifyDown(self) -> None:
-		_index: int = 0
-		_child: Optional[int] = self.getChildIndex(_index)
-		while _child is not None and self.comparator(self.values[_child], self.values[_index]):
-			self.swapValues(_child, _index)
-			_index = _child
-			_child = self.getChildIndex(_index)
-			
+		if self.values:
+			self._siftDown(0)
+
+		return
+
+
+### Indexed priority queue ###
+
+# a heap of distinct hashable items with separate priorities, which tracks every item's position so an item can be
+# reprioritised or removed in place instead of leaving a stale entry behind. Entries are (priority, order, item) as in a keyed
+# Heap, which holds them and keeps the position map up to date as its sifts move them
+class IndexedHeap(Generic[T]):
+
+	def __init__(self, heaptype: HeapType=HeapType.MinHeap):
+		self.heap: Heap = Heap(heaptype)
+		self.heap.positions = {}
+		self.values: List[Tuple[Any, int, T]] = self.heap.values
+		self.positions: Dict[T, int] = self.heap.positions
+		self.heaptype: HeapType = heaptype
+
+	@property
+	def numvalues(self) -> int:
+		return len(self.values)
+
+	def _entry(self, item: T, priority: Any) -> Tuple[Any, int, T]:
+		if self.heaptype == HeapType.MinHeap:
+			return (priority, next(_ORDER), item)
+		return (priority, -next(_ORDER), item)
+
+	# an entry that changed in place can only need to move one way
+	def _restore(self, index: int) -> None:
+		entry = self.values[index]
+		self.heap._siftUp(index)
+		if self.values[index] is entry:
+			self.heap._siftDown(index)
+
+		return
+
+	def contains(self, item: T) -> bool:
+		return item in self.positions
+
+	def priority(self, item: T) -> Optional[Any]:
+		index = self.positions.get(item)
+		return self.values[index][0] if index is not None else None
+
+	def peek(self) -> Optional[T]:
+		return self.values[0][2] if self.values else None
+
+	def push(self, item: T, priority: Any) -> None:
+		if item in self.positions:
+			raise Exception(f'Item already in the heap: {item}')
+
+		self.values.append(self._entry(item, priority))
+		self.heap._siftUp(len(self.values) - 1)
+		return
+
+	# reprioritises a queued item, either way, or pushes one that is not queued
+	def update(self, item: T, priority: Any) -> None:
+		index = self.positions.get(item)
+		if index is None:
+			self.push(item, priority)
+			return
+
+		self.values[index] = self._entry(item, priority)
+		self._restore(index)
+		return
+
+	def pop(self) -> Optional[T]:
+		if not self.values:
+			return None
+
+		entry = self.values[0]
+		last = self.values.pop()
+		del self.positions[entry[2]]
+		if self.values:
+			self.values[0] = last
+			self.heap._siftDown(0)
+
+		return entry[2]
+
+	# the last entry fills the removed one's slot and moves from there
+	def remove(self, item: T) -> bool:
+		index = self.positions.pop(item, None)
+		if index is None:
+			return False
+
+		last = self.values.pop()
+		if index < len(self.values):
+			self.values[index] = last
+			self._restore(index)
+
+		return True
+
+
+### Pairing heap ###
+
+class PairingNode(object):
+
+	__slots__ = ('entry', 'child', 'sibling')
+
+	def __init__(self, entry: Any):
+		self.entry: Any = entry
+		self.child: Optional['PairingNode'] = None # leftmost child, the rest hang off its sibling chain
+		self.sibling: Optional['PairingNode'] = None
+
+
+# a multiway tree kept in heap order: push and merge link one root under another in O(1), pop pairs up the root's children
+# left to right and folds the pairs back together right to left, O(log N) amortised. Entries follow Heap's key scheme
+class PairingHeap(Generic[T]):
+
+	def __init__(self, heaptype: HeapType=HeapType.MinHeap, key: Optional[Callable[[T], Any]]=None):
+		self.root: Optional[PairingNode] = None
+		self.size: int = 0
+		self.heaptype: HeapType = heaptype
+		self.key: Optional[Callable[[T], Any]] = key
+
+	@property
+	def numvalues(self) -> int:
+		return self.size
+
+	def _entry(self, item: T) -> Any:
+		if self.key is None:
+			return item
+		elif self.heaptype == HeapType.MinHeap:
+			return (self.key(item), next(_ORDER), item)
+		return (self.key(item), -next(_ORDER), item)
+
+	def _item(self, entry: Any) -> T:
+		return entry if self.key is None else entry[2]
+
+	# the root that goes first keeps its place and takes the other as its leftmost child
+	def _link(self, first: PairingNode, second: PairingNode) -> PairingNode:
+		if second.entry < first.entry if self.heaptype == HeapType.MinHeap else second.entry > first.entry:
+			first, second = second, first
+
+		second.sibling = first.child
+		first.child = second
+		return first
+
+	def peek(self) -> Optional[T]:
+		return self._item(self.root.entry) if self.root is not None else None
+
+	def push(self, value: T) -> None:
+		node = PairingNode(self._entry(value))
+		self.root = self._link(self.root, node) if self.root is not None else node
+		self.size += 1
 		return
+
+	def pushMany(self, items: Iterable[T]) -> None:
+		for item in items:
+			self.push(item)
+
+		return
+
+	def pop(self) -> Optional[T]:
+		if self.root is None:
+			return None
+
+		entry = self.root.entry
+		pairs: List[PairingNode] = []
+		node = self.root.child
+		while node is not None:
+			second = node.sibling
+			if second is None:
+				pairs.append(node)
+				break
+
+			rest = second.sibling
+			node.sibling = second.sibling = None
+			pairs.append(self._link(node, second))
+			node = rest
+
+		root = pairs.pop() if pairs else None
+		while pairs:
+			root = self._link(pairs.pop(), root)
+
+		self.root = root
+		self.size -= 1
+		return self._item(entry)
+
+	def popMany(self, k: int) -> List[T]:
+		return [ self.pop() for _ in range(min(k, self.size)) ]
+
+	# takes over the other heap's nodes in O(1), leaving it empty; both heaps must order the same way and use compatible keys
+	def merge(self, other: 'PairingHeap[T]') -> None:
+		if other.heaptype != self.heaptype or (other.key is None) != (self.key is None):
+			raise Exception('Cannot merge heaps with different orderings')
+		elif other.root is not None:
+			self.root = self._link(self.root, other.root) if self.root is not None else other.root
+			self.size += other.size
+
+		other.root, other.size = None, 0
+		return
+
+
+### Streaming top-k and k-way merge ###
+
+# the k greatest (or least) items of a stream in O(N log k) time and O(k) memory: a heap ordered the other way holds the best
+# k seen so far and an item only enters it by beating the worst of them, which is one comparison for most of a long stream.
+# Items with equal keys keep the earliest ones, entries are (key, order, item) with the order arranged so later items leave first
+class TopK(Generic[T]):
+
+	def __init__(self, k: int, key: Optional[Callable[[T], Any]]=None, largest: bool=True):
+		self.k: int = k
+		self.key: Optional[Callable[[T], Any]] = key
+		self.largest: bool = largest
+		self.heap: Heap = Heap(HeapType.MinHeap if largest else HeapType.MaxHeap)
+
+	@property
+	def size(self) -> int:
+		return self.heap.numvalues
+
+	def add(self, item: T) -> None:
+		self.addAll((item,))
+		return
+
+	def addAll(self, items: Iterable[T]) -> None:
+		heap, key, largest = self.heap, self.key, self.largest
+		values = heap.values
+		iterator = iter(items)
+		for item in iterator:
+			if len(values) >= self.k:
+				iterator = chain((item,), iterator)
+				break
+			heap.push(item if key is None else (key(item), -next(_ORDER) if largest else next(_ORDER), item))
+
+		if not values or len(values) < self.k:
+			return
+
+		# the loops below compare against the worst kept item directly and only touch the heap to replace it
+		if key is None and largest:
+			threshold = values[0]
+			for item in iterator:
+				if threshold < item:
+					heapq.heapreplace(values, item)
+					threshold = values[0]
+		elif key is None:
+			for item in iterator:
+				if item < values[0]:
+					heap.replace(item)
+		elif largest:
+			threshold = values[0][0]
+			for item in iterator:
+				itemKey = key(item)
+				if threshold < itemKey:
+					heapq.heapreplace(values, (itemKey, -next(_ORDER), item))
+					threshold = values[0][0]
+		else:
+			for item in iterator:
+				itemKey = key(item)
+				if itemKey < values[0][0]:
+					heap.replace((itemKey, next(_ORDER), item))
+
+		return
+
+	# the kept items best first, leaving the collector as it is
+	def result(self) -> List[T]:
+		entries = sorted(self.heap.values, reverse=self.largest)
+		return [ entry[2] for entry in entries ] if self.key is not None else entries
+
+
+# heapq's C replace for max-heaps, public from Python 3.14
+_HEAPREPLACE_MAX: Optional[Callable[[List[Any], Any], Any]] = getattr(heapq, 'heapreplace_max', None)
+
+
+# lazily merges iterables that are each sorted (descending with reverse) into one sorted stream, holding one item per input.
+# Equal items come out in the order of their inputs. The top entry is refilled in place and sifted down once per item, and the
+# last input left is passed through without the heap. Before Python 3.14 only heapq.merge reaches the C max-heap replace, so
+# a reverse merge is handed to it, which keeps the same order for equal items
+def mergeSorted(iterables: Iterable[Iterable[T]], key: Optional[Callable[[T], Any]]=None, reverse: bool=False) -> Iterator[T]:
+	if reverse and _HEAPREPLACE_MAX is None:
+		yield from heapq.merge(*iterables, key=key, reverse=True)
+		return
+
+	heap = Heap(HeapType.MaxHeap if reverse else HeapType.MinHeap)
+	entries: List[List[Any]] = []
+	for index, iterable in enumerate(iterables):
+		advance = iter(iterable).__next__
+		try:
+			value = advance()
+		except StopIteration:
+			continue
+
+		# [ key, input order, value, advance ]
+		entries.append([ key(value) if key is not None else value, -index if reverse else index, value, advance ])
+
+	heap.pushMany(entries)
+	values, heapreplace = heap.values, _HEAPREPLACE_MAX if reverse else heapq.heapreplace
+	while len(values) > 1:
+		entry = values[0]
+		yield entry[2]
+		try:
+			value = entry[3]()
+		except StopIteration:
+			heap.pop()
+			continue
+
+		entry[0] = key(value) if key is not None else value
+		entry[2] = value
+		heapreplace(values, entry)
+
+	if values:
+		_, _, value, advance = values.pop()
+		yield value
+		while True:
+			try:
+				yield advance()
+			except StopIteration:
+				return
+
+	return
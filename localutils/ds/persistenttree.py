@@ -0,0 +1,332 @@
+import threading
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+### Persistent AVL-Tree implementation ###
+
+# nodes have no parent pointer, so one node can be shared by any number of tree versions. A node is only ever changed in
+# place by the writer that created it ('edit' is the writer's current token); every other node is copied on the way back
+# up from an update, so published versions are never modified.
+class PersistentNode(object):
+
+	__slots__ = [
+		'key',
+		'value',
+		'left',
+		'right',
+		'height',
+		'edit'
+	]
+
+	def __init__(self, key: object, value: object, left: Optional['PersistentNode']=None, right: Optional['PersistentNode']=None, height: int=1, edit: Optional[object]=None):
+		self.key: object = key
+		self.value: object = value
+		self.left: Optional[PersistentNode] = left
+		self.right: Optional[PersistentNode] = right
+		self.height: int = height
+		self.edit: Optional[object] = edit
+
+	def __str__(self):
+		return f'{self.key}: {self.value}'
+
+	def getValue(self) -> object:
+		return self.value
+
+
+# read-only queries shared by the writable map and its snapshots, all walking down from the root with explicit stacks
+class PersistentTreeBase(object):
+
+	def __new__(cls, *args, **kwargs):
+		if cls is PersistentTreeBase:
+			raise TypeError('PersistentTreeBase can not be instantiated directly.')
+		return object.__new__(cls)
+
+	def __init__(self, root: Optional[PersistentNode]=None, size: int=0):
+		self.root: Optional[PersistentNode] = root
+		self.size: int = size
+
+	def find(self, key: object) -> Optional[PersistentNode]:
+		node = self.root
+		while node is not None:
+			if key < node.key:
+				node = node.left
+			elif node.key < key:
+				node = node.right
+			else:
+				return node
+
+		return None
+
+	def contains(self, key: object) -> bool:
+		return self.find(key) is not None
+
+	def minimum(self) -> Optional[PersistentNode]:
+		node = self.root
+		while node is not None and node.left is not None:
+			node = node.left
+		return node
+
+	def maximum(self) -> Optional[PersistentNode]:
+		node = self.root
+		while node is not None and node.right is not None:
+			node = node.right
+		return node
+
+	# nodes with lo <= key < hi, where a bound of None leaves that side open
+	def range(self, lo: Optional[object]=None, hi: Optional[object]=None, reverse: bool=False) -> Iterator[PersistentNode]:
+		stack: List[PersistentNode] = []
+		node = self.root
+		while node is not None:
+			if reverse and hi is not None and not node.key < hi:
+				node = node.left
+			elif not reverse and lo is not None and node.key < lo:
+				node = node.right
+			else:
+				stack.append(node)
+				node = node.right if reverse else node.left
+
+		while stack:
+			node = stack.pop()
+			if reverse and lo is not None and node.key < lo:
+				return
+			elif not reverse and hi is not None and not node.key < hi:
+				return
+			yield node
+
+			child = node.left if reverse else node.right
+			while child is not None:
+				stack.append(child)
+				child = child.right if reverse else child.left
+
+	def nodes(self, reverse: bool=False) -> Iterator[PersistentNode]:
+		return self.range(reverse=reverse)
+
+	def keys(self, reverse: bool=False) -> Iterator[object]:
+		for node in self.range(reverse=reverse):
+			yield node.key
+
+	def values(self, reverse: bool=False) -> Iterator[object]:
+		for node in self.range(reverse=reverse):
+			yield node.value
+
+	def items(self, reverse: bool=False) -> Iterator[Tuple[object, object]]:
+		for node in self.range(reverse=reverse):
+			yield node.key, node.value
+
+	def getKeys(self, traversal: str='inorder') -> List[object]:
+		if traversal not in ['inorder','preorder','postorder','breadthfirst']:
+			raise Exception(f'Invalid tree traversal order: {traversal}')
+
+		if self.root is None:
+			return []
+		elif traversal == 'inorder':
+			return list(self.keys())
+
+		order: List[PersistentNode] = []
+		if traversal == 'breadthfirst':
+			queue = deque([ self.root ])
+			while queue:
+				node = queue.popleft()
+				order.append(node)
+				if node.left is not None:
+					queue.append(node.left)
+				if node.right is not None:
+					queue.append(node.right)
+
+		else:
+			# pre-order pushes right before left; post-order is the reverse of a root-right-left walk
+			stack = [ self.root ]
+			while stack:
+				node = stack.pop()
+				order.append(node)
+				first, second = (node.right, node.left) if traversal == 'preorder' else (node.left, node.right)
+				if first is not None:
+					stack.append(first)
+				if second is not None:
+					stack.append(second)
+
+			if traversal == 'postorder':
+				order.reverse()
+
+		return [ node.key for node in order ]
+
+
+# an immutable version of a PersistentTreeMap, safe to read from any thread while the writer carries on
+class TreeSnapshot(PersistentTreeBase):
+
+	def __init__(self, root: Optional[PersistentNode], size: int):
+		PersistentTreeBase.__init__(self, root, size)
+
+
+# one writer thread updates the map; other threads read through snapshot(). Writes and snapshot() share a lock, held by
+# snapshot() only to swap the edit token, because the writer may be changing its own nodes in place at that moment
+class PersistentTreeMap(PersistentTreeBase):
+
+	def __init__(self):
+		PersistentTreeBase.__init__(self)
+		self.edit: object = object()
+		self.lock: threading.Lock = threading.Lock()
+
+	@classmethod
+	def fromSorted(cls, items: Iterable[Tuple[object, object]]) -> 'PersistentTreeMap':
+		tree = cls()
+		nodes: List[PersistentNode] = []
+		for key, value in items:
+			if nodes and not nodes[-1].key < key:
+				if key < nodes[-1].key:
+					raise Exception(f'Keys must be in ascending order, found {key} after {nodes[-1].key}')
+				nodes[-1].key, nodes[-1].value = key, value
+				continue
+
+			nodes.append(PersistentNode(key, value, edit=tree.edit))
+
+		stack: List[Tuple[int, int, Optional[PersistentNode], bool]] = [ (0, len(nodes), None, True) ] # (start, end, parent, is left child)
+		while stack:
+			start, end, parent, isLeft = stack.pop()
+			if start >= end:
+				continue
+
+			mid = (start + end) // 2
+			node = nodes[mid]
+			node.height = (end - start).bit_length()
+			if parent is None:
+				tree.root = node
+			elif isLeft:
+				parent.left = node
+			else:
+				parent.right = node
+
+			stack.append((start, mid, node, True))
+			stack.append((mid + 1, end, node, False))
+
+		tree.size = len(nodes)
+		return tree
+
+	# a new edit token freezes every node reachable from the current root, so the snapshot can share all of them
+	def snapshot(self) -> TreeSnapshot:
+		with self.lock:
+			self.edit = object()
+			return TreeSnapshot(self.root, self.size)
+
+	def _own(self, node: PersistentNode) -> PersistentNode:
+		if node.edit is self.edit:
+			return node
+		return PersistentNode(node.key, node.value, node.left, node.right, node.height, self.edit)
+
+	@staticmethod
+	def _updateHeight(node: PersistentNode) -> None:
+		lheight = node.left.height if node.left is not None else 0
+		rheight = node.right.height if node.right is not None else 0
+		node.height = 1 + (lheight if lheight > rheight else rheight)
+
+	# 'node' must already be owned; the child that moves up is copied here when needed
+	def _rotate(self, node: PersistentNode, direction: str) -> PersistentNode:
+		if direction == 'right':
+			pivot = self._own(node.left)
+			node.left = pivot.right
+			pivot.right = node
+		else:
+			pivot = self._own(node.right)
+			node.right = pivot.left
+			pivot.left = node
+
+		self._updateHeight(node)
+		self._updateHeight(pivot)
+		return pivot
+
+	def _rebalance(self, node: PersistentNode) -> PersistentNode:
+		left, right = node.left, node.right
+		lheight = left.height if left is not None else 0
+		rheight = right.height if right is not None else 0
+
+		if lheight - rheight > 1:
+			if (left.left.height if left.left is not None else 0) < (left.right.height if left.right is not None else 0):
+				node.left = self._rotate(self._own(left), 'left')
+			return self._rotate(node, 'right')
+		elif rheight - lheight > 1:
+			if (right.right.height if right.right is not None else 0) < (right.left.height if right.left is not None else 0):
+				node.right = self._rotate(self._own(right), 'right')
+			return self._rotate(node, 'left')
+
+		node.height = 1 + (lheight if lheight > rheight else rheight)
+		return node
+
+	# replaces the child at the end of 'path' with 'child' and rebalances the ancestors on the way up to a new root; path entries
+	# are (node, went left), and the node at index 'replaced' takes over 'entry's key and value on the way.
+	# once a node was already owned, did not rotate and kept its height, everything above it is unchanged and the walk stops
+	def _rebuild(self, path: List[Tuple[PersistentNode, bool]], child: Optional[PersistentNode], replaced: int=-1, entry: Optional[PersistentNode]=None) -> None:
+		edit = self.edit
+		for i in range(len(path) - 1, -1, -1):
+			original, wentLeft = path[i]
+			node = original if original.edit is edit else self._own(original)
+			if i == replaced:
+				node.key, node.value = entry.key, entry.value
+			if wentLeft:
+				node.left = child
+			else:
+				node.right = child
+
+			height = node.height
+			child = self._rebalance(node)
+			if child is original and child.height == height and (replaced < 0 or i <= replaced):
+				return
+
+		self.root = child
+		return
+
+	def add(self, key: object, value: object):
+		with self.lock:
+			path: List[Tuple[PersistentNode, bool]] = []
+			node = self.root
+			while node is not None:
+				if key < node.key:
+					path.append((node, True))
+					node = node.left
+				elif node.key < key:
+					path.append((node, False))
+					node = node.right
+				else:
+					break
+
+			if node is not None:
+				node = self._own(node)
+				node.key, node.value = key, value # replace if key found
+			else:
+				node = PersistentNode(key, value, edit=self.edit)
+				self.size += 1
+
+			self._rebuild(path, node)
+
+	def remove(self, key: object) -> bool:
+		with self.lock:
+			path: List[Tuple[PersistentNode, bool]] = []
+			node = self.root
+			while node is not None:
+				if key < node.key:
+					path.append((node, True))
+					node = node.left
+				elif node.key < key:
+					path.append((node, False))
+					node = node.right
+				else:
+					break
+
+			if node is None:
+				return False
+
+			if node.left is not None and node.right is not None:
+				# the in-order predecessor is unlinked and its entry moves into the removed node's copy
+				replaced = len(path)
+				path.append((node, True))
+				predecessor = node.left
+				while predecessor.right is not None:
+					path.append((predecessor, False))
+					predecessor = predecessor.right
+
+				self._rebuild(path, predecessor.left, replaced, predecessor)
+			else:
+				self._rebuild(path, node.left if node.left is not None else node.right)
+
+			self.size -= 1
+			return True
@@ -1,5 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict
+import gc
+from bisect import bisect_left
+from collections import deque
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, Optional, List, Tuple
+
+
+_BULK_FACTOR: int = 4
 
 
 ### Node classes ###
@@ -11,7 +19,8 @@ class TreeNode(ABC):
 		'key',
 		'left',
 		'right',
-		'parent'
+		'parent',
+		'count'
 	]
 	
 	def __init__(self, key: object):
@@ -20,6 +29,7 @@ class TreeNode(ABC):
 		self.left: Optional[TreeNode] = None
 		self.right: Optional[TreeNode] = None
 		self.parent: Optional[TreeNode] = None
+		self.count: int = 1 # nodes in this subtree, only kept up to date on trees with order statistics
 
 	@abstractmethod
 	def getValue(self) -> object: pass
@@ -70,15 +80,16 @@ class TreeBase(object):
 			raise TypeError('TreeBase can not be instantiated directly.')
 		return object.__new__(cls)
 
-	def __init__(self):
+	def __init__(self, orderStatistics: bool=False):
 		self.size: int = 0
 		self.root: Optional[TreeNode] = None
+		self.orderStatistics: bool = orderStatistics
 
 	@classmethod
 	def _getMaxSubtreeHeight(cls, node: TreeNode) -> int:
 		l = node.left.height if node.left is not None else 0
 		r = node.right.height if node.right is not None else 0
-		return max(l, r)
+		return l if l > r else r
 
 	@classmethod
 	def _getSubtreeBalance(cls, node: TreeNode) -> int:
@@ -99,28 +110,41 @@ class TreeBase(object):
 			node = node.right
 		return node
 
+	# walks use an explicit stack, so degenerate trees can't hit the recursion limit
 	@classmethod
 	def _walkKeys(cls, node: TreeNode, elements: list, order: str= 'inorder') -> None:
 		if order == 'inorder':
-			if node.left is not None:
-				cls._walkKeys(node.left, elements, order)
-			elements.append(node.key)
-			if node.right is not None:
-				cls._walkKeys(node.right, elements, order)
+			stack: List[TreeNode] = []
+			while stack or node is not None:
+				while node is not None:
+					stack.append(node)
+					node = node.left
+				node = stack.pop()
+				elements.append(node.key)
+				node = node.right
 
 		elif order == 'preorder':
-			elements.append(node.key)
-			if node.left is not None:
-				cls._walkKeys(node.left, elements, order)
-			if node.right is not None:
-				cls._walkKeys(node.right, elements, order)
+			stack = [ node ]
+			while stack:
+				node = stack.pop()
+				elements.append(node.key)
+				if node.right is not None:
+					stack.append(node.right)
+				if node.left is not None:
+					stack.append(node.left)
 
 		elif order == 'postorder':
-			if node.left is not None:
-				cls._walkKeys(node.left, elements, order)
-			if node.right is not None:
-				cls._walkKeys(node.right, elements, order)
-			elements.append(node.key)
+			# a root-right-left walk is the reverse of a left-right-root walk
+			start = len(elements)
+			stack = [ node ]
+			while stack:
+				node = stack.pop()
+				elements.append(node.key)
+				if node.left is not None:
+					stack.append(node.left)
+				if node.right is not None:
+					stack.append(node.right)
+			elements[start:] = reversed(elements[start:])
 
 		else:
 			raise Exception(f'Unknown tree walk order: {order}')
@@ -133,7 +157,7 @@ class TreeBase(object):
 			return cls._getMin(node.right)
 
 		parent = node.parent
-		while parent is not None and parent.right is not None and node.key == parent.right.key:
+		while parent is not None and parent.right is node:
 			node = parent
 			parent = parent.parent
 
@@ -145,7 +169,7 @@ class TreeBase(object):
 			return cls._getMax(node.left)
 
 		parent = node.parent
-		while parent is not None and parent.left is not None and node.key == parent.left.key:
+		while parent is not None and parent.left is node:
 			node = parent
 			parent = parent.parent
 
@@ -191,87 +215,162 @@ class TreeBase(object):
 
 		return newroot
 
-	def _insertNode(self, root: TreeNode, node: TreeNode) -> TreeNode:
-		if root is None:
-			root = node
-			self.size += 1
-			return root
-
-		if node.key < root.key:
-			root.left = self._insertNode(root.left, node)
-			root.left.parent = root
-		elif node.key > root.key:
-			root.right = self._insertNode(root.right, node)
-			root.right.parent = root
-		else:
-			node.copyTo(root) # replace if key found
+	# sorted nodes are linked around their midpoints, which gives a perfectly balanced tree in O(N); equal keys keep the last entry, as with add.
+	# a bulk load only allocates objects that stay reachable, so the cyclic GC is paused rather than left to rescan every node built so far
+	@classmethod
+	def _fromSortedNodes(cls, nodes: Iterable[TreeNode], orderStatistics: bool=False):
+		gcEnabled = gc.isenabled()
+		gc.disable()
+
+		try:
+			unique: List[TreeNode] = []
+			last: Optional[TreeNode] = None
+			for node in nodes:
+				if last is not None and not last.key < node.key:
+					if node.key < last.key:
+						raise Exception(f'Keys must be in ascending order, found {node.key} after {last.key}')
+					node.copyTo(last)
+					continue
+
+				unique.append(node)
+				last = node
+
+			tree = cls(orderStatistics)
+			tree.root = cls._linkBalanced(unique, 0, len(unique), None)
+			tree.size = len(unique)
+			return tree
+
+		finally:
+			if gcEnabled:
+				gc.enable()
 
-		lheight = root.left.height if root.left is not None else 0
-		rheight = root.right.height if root.right is not None else 0
-		root.height = 1 + (lheight if lheight > rheight else rheight)
+	@classmethod
+	def _linkBalanced(cls, nodes: List[TreeNode], start: int, end: int, parent: Optional[TreeNode]) -> Optional[TreeNode]:
+		if start >= end:
+			return None
 
-		balance = (root.left.height if root.left is not None else 0) - (root.right.height if root.right is not None else 0)
+		mid = (start + end) // 2
+		node = nodes[mid]
+		node.parent = parent
+		node.height = (end - start).bit_length() # a midpoint-split subtree of n nodes is always floor(log2(n)) + 1 high
+		node.count = end - start
+		node.left = cls._linkBalanced(nodes, start, mid, node)
+		node.right = cls._linkBalanced(nodes, mid + 1, end, node)
+		return node
 
-		if balance > 1 and node.key < root.left.key:
-			root = self._rotate(root, 'right')
+	def _replaceChild(self, parent: Optional[TreeNode], child: TreeNode, replacement: Optional[TreeNode]) -> None:
+		if parent is None:
+			self.root = replacement
+		elif parent.left is child:
+			parent.left = replacement
+		else:
+			parent.right = replacement
 
-		elif balance < -1 and node.key > root.right.key:
-			root = self._rotate(root, 'left')
+		if replacement is not None:
+			replacement.parent = parent
 
-		elif balance > 1 and node.key > root.left.key:
-			root.left = self._rotate(root.left, 'left')
-			root = self._rotate(root, 'right')
+		return
 
-		elif balance < -1 and node.key < root.right.key:
-			root.right = self._rotate(root.right, 'right')
-			root = self._rotate(root, 'left')
+	def _rotateAt(self, node: TreeNode, direction: str) -> TreeNode:
+		parent = node.parent
+		newroot = self._rotate(node, direction)
+		node.parent = newroot
+		self._replaceChild(parent, node, newroot)
 
-		if root.left is not None: root.left.parent = root
-		if root.right is not None: root.right.parent = root
+		if self.orderStatistics:
+			# the old root is now the new root's child, so its count has to be fixed first
+			node.count = 1 + (node.left.count if node.left is not None else 0) + (node.right.count if node.right is not None else 0)
+			newroot.count = 1 + (newroot.left.count if newroot.left is not None else 0) + (newroot.right.count if newroot.right is not None else 0)
 
-		return root
+		return newroot
 
-	def _deleteNode(self, root: TreeNode, key: object) -> Optional[TreeNode]:
-		if root is None:
-			return root
+	# counts are adjusted along the whole path before retracing, so rotations always see correct counts below them
+	@staticmethod
+	def _adjustCounts(node: Optional[TreeNode], delta: int) -> None:
+		while node is not None:
+			node.count += delta
+			node = node.parent
 
-		if key < root.key:
-			root.left = self._deleteNode(root.left, key)
-		elif key > root.key:
-			root.right = self._deleteNode(root.right, key)
-		else:
-			if root.left is None or root.right is None:
-				tmp = root.left if root.right is None else root.right
-				if tmp is not None:	root = tmp
-				del tmp
+		return
 
+	# walks up from 'node' fixing heights and rotating unbalanced subtrees; once a subtree ends up with the height it had
+	# before the change, nothing above it can be affected, so the walk stops there
+	def _retrace(self, node: Optional[TreeNode]) -> None:
+		while node is not None:
+			lheight = node.left.height if node.left is not None else 0
+			rheight = node.right.height if node.right is not None else 0
+			balance = lheight - rheight
+			oldheight = node.height
+
+			if balance > 1:
+				if self._getSubtreeBalance(node.left) < 0:
+					self._rotateAt(node.left, 'left')
+				node = self._rotateAt(node, 'right')
+			elif balance < -1:
+				if self._getSubtreeBalance(node.right) > 0:
+					self._rotateAt(node.right, 'right')
+				node = self._rotateAt(node, 'left')
 			else:
-				self._getMax(root.left).copyTo(root)
-				root.left = self._deleteNode(root.left, root.key)
+				node.height = 1 + (lheight if lheight > rheight else rheight)
 
-		if root is None:
-			return root
+			if node.height == oldheight:
+				break
 
-		root.height = self._getMaxSubtreeHeight(root) + 1
-		balance = self._getSubtreeBalance(root)
+			node = node.parent
 
-		if balance > 1 and self._getSubtreeBalance(root.left) >= 0:
-			return self._rotate(root, 'right')
+		return
 
-		elif balance > 1 and self._getSubtreeBalance(root.left) < 0:
-			root.left = self._rotate(root.left, 'left')
-			return self._rotate(root, 'right')
+	def _insert(self, node: TreeNode) -> TreeNode:
+		key = node.key
+		parent: Optional[TreeNode] = None
+		current = self.root
+
+		while current is not None:
+			if key < current.key:
+				parent = current
+				current = current.left
+			elif key > current.key:
+				parent = current
+				current = current.right
+			else:
+				node.copyTo(current) # replace if key found
+				return current
+
+		node.parent = parent
+		if parent is None:
+			self.root = node
+		elif key < parent.key:
+			parent.left = node
+		else:
+			parent.right = node
 
-		elif balance < -1 and self._getSubtreeBalance(root.right) <= 0:
-			return self._rotate(root, 'left')
+		self.size += 1
+		if self.orderStatistics:
+			self._adjustCounts(parent, 1)
 
-		elif balance < -1 and self._getSubtreeBalance(root.right) > 0:
-			root.right = self._rotate(root.right, 'right')
-			return self._rotate(root, 'left')
+		self._retrace(parent)
+		return node
 
-		root.parent = None
+	def _delete(self, key: object) -> bool:
+		node = self.find(key)
+		if node is None:
+			return False
 
-		return root
+		# a node with two children takes over its in-order predecessor's entry, and the predecessor node is unlinked instead
+		if node.left is not None and node.right is not None:
+			predecessor = self._getMax(node.left)
+			predecessor.copyTo(node)
+			node = predecessor
+
+		parent = node.parent
+		self._replaceChild(parent, node, node.left if node.left is not None else node.right)
+		node.parent = node.left = node.right = None
+		self.size -= 1
+		if self.orderStatistics:
+			self._adjustCounts(parent, -1)
+
+		self._retrace(parent)
+		return True
 
 	def find(self, key: object) -> Optional[TreeNode]:
 		if self.root is None or self.root.key == key:
@@ -289,19 +388,146 @@ class TreeBase(object):
 	def contains(self, key: object) -> bool:
 		return self.find(key) is not None
 
-	@staticmethod
-	def _bfs(node: Optional[TreeNode], depthmap: Dict[object, List[object]], depth: int) -> None:
-		if node is None:
+	def remove(self, key: object) -> bool:
+		return self._delete(key)
+
+	# the iterators step through the tree with next/previous, so each one only holds the current node rather than a copy of the keys
+	def nodes(self, reverse: bool=False, start: Optional[TreeNode]=None) -> Iterator[TreeNode]:
+		node = start if start is not None else self.maximum() if reverse else self.minimum()
+		step = self.previous if reverse else self.next
+		while node is not None:
+			yield node
+			node = step(node)
+
+	def keys(self, reverse: bool=False) -> Iterator[object]:
+		for node in self.nodes(reverse):
+			yield node.key
+
+	def values(self, reverse: bool=False) -> Iterator[object]:
+		for node in self.nodes(reverse):
+			yield node.getValue()
+
+	def items(self, reverse: bool=False) -> Iterator[Tuple[object, object]]:
+		for node in self.nodes(reverse):
+			yield node.key, node.getValue()
+
+	# nodes with lo <= key < hi, where a bound of None leaves that side open
+	def range(self, lo: Optional[object]=None, hi: Optional[object]=None, reverse: bool=False) -> Iterator[TreeNode]:
+		if reverse:
+			start = self.lower(hi) if hi is not None else self.maximum()
+			inRange = (lambda key: not key < lo) if lo is not None else None
+		else:
+			start = self.ceiling(lo) if lo is not None else self.minimum()
+			inRange = (lambda key: key < hi) if hi is not None else None
+
+		if start is None:
 			return
 
-		if depth not in depthmap:
-			depthmap[depth] = []
+		for node in self.nodes(reverse, start):
+			if inRange is not None and not inRange(node.key):
+				return
+			yield node
 
-		depthmap[depth].append(node.key)
-		TreeBase._bfs(node.left, depthmap, depth + 1)
-		TreeBase._bfs(node.right, depthmap, depth + 1)
+	# greatest node with a key <= key
+	def floor(self, key: object) -> Optional[TreeNode]:
+		node = self.root
+		result: Optional[TreeNode] = None
+		while node is not None:
+			if key < node.key:
+				node = node.left
+			elif node.key < key:
+				result = node
+				node = node.right
+			else:
+				return node
 
-		return
+		return result
+
+	# smallest node with a key >= key
+	def ceiling(self, key: object) -> Optional[TreeNode]:
+		node = self.root
+		result: Optional[TreeNode] = None
+		while node is not None:
+			if node.key < key:
+				node = node.right
+			elif key < node.key:
+				result = node
+				node = node.left
+			else:
+				return node
+
+		return result
+
+	# greatest node with a key < key
+	def lower(self, key: object) -> Optional[TreeNode]:
+		node = self.root
+		result: Optional[TreeNode] = None
+		while node is not None:
+			if node.key < key:
+				result = node
+				node = node.right
+			else:
+				node = node.left
+
+		return result
+
+	# smallest node with a key > key
+	def higher(self, key: object) -> Optional[TreeNode]:
+		node = self.root
+		result: Optional[TreeNode] = None
+		while node is not None:
+			if key < node.key:
+				result = node
+				node = node.left
+			else:
+				node = node.right
+
+		return result
+
+	def _requireOrderStatistics(self) -> None:
+		if not self.orderStatistics:
+			raise Exception('Order statistics are not enabled on this tree')
+
+	# number of keys < key
+	def rank(self, key: object) -> int:
+		self._requireOrderStatistics()
+		rank: int = 0
+		node = self.root
+		while node is not None:
+			if key < node.key:
+				node = node.left
+			elif node.key < key:
+				rank += 1 + (node.left.count if node.left is not None else 0)
+				node = node.right
+			else:
+				return rank + (node.left.count if node.left is not None else 0)
+
+		return rank
+
+	# the node at in-order position i, counted from the end for negative i
+	def select(self, i: int) -> TreeNode:
+		self._requireOrderStatistics()
+		if i < 0:
+			i += self.size
+		if i < 0 or i >= self.size:
+			raise IndexError(f'Tree index out of range: {i}')
+
+		node = self.root
+		while True:
+			left = node.left.count if node.left is not None else 0
+			if i < left:
+				node = node.left
+			elif i > left:
+				i -= left + 1
+				node = node.right
+			else:
+				return node
+
+	# number of keys with lo <= key < hi, where a bound of None leaves that side open
+	def countRange(self, lo: Optional[object]=None, hi: Optional[object]=None) -> int:
+		upper = self.rank(hi) if hi is not None else self.size
+		lower = self.rank(lo) if lo is not None else 0
+		return max(upper - lower, 0)
 
 	def getKeys(self, traversal: str='inorder') -> List[object]:
 		if traversal not in ['inorder','preorder','postorder','breadthfirst']:
@@ -312,10 +538,14 @@ class TreeBase(object):
 			return keys
 
 		if traversal == 'breadthfirst':
-			_map: Dict[object, List[object]] = {}
-			TreeBase._bfs(self.root, _map, 0)
-			for k in sorted(_map.keys()):
-				keys += _map[k]
+			queue = deque([ self.root ])
+			while queue:
+				node = queue.popleft()
+				keys.append(node.key)
+				if node.left is not None:
+					queue.append(node.left)
+				if node.right is not None:
+					queue.append(node.right)
 
 		else:
 			self._walkKeys(self.root, keys, traversal)
@@ -325,19 +555,98 @@ class TreeBase(object):
 
 class TreeMap(TreeBase):
 
-	def __init__(self):
-		TreeBase.__init__(self)
+	hasValues: bool = True
+
+	def __init__(self, orderStatistics: bool=False):
+		TreeBase.__init__(self, orderStatistics)
+
+	@classmethod
+	def fromSorted(cls, items: Iterable[Tuple[object, object]], orderStatistics: bool=False) -> 'TreeMap':
+		return cls._fromSortedNodes((KeyValueNode(key, value) for key, value in items), orderStatistics)
+
+	@classmethod
+	def fromIterable(cls, items: Iterable[Tuple[object, object]], orderStatistics: bool=False) -> 'TreeMap':
+		return cls.fromSorted(sorted(items, key=itemgetter(0)), orderStatistics) # the sort is stable, so the last of several equal keys still wins
 
 	def add(self, key: object, value: object):
-		self.root = self._insertNode(self.root, KeyValueNode(key, value))
-		self.root.parent = None
+		self._insert(KeyValueNode(key, value))
 
 
 class TreeSet(TreeBase):
 
-	def __init__(self):
-		TreeBase.__init__(self)
+	hasValues: bool = False
+
+	def __init__(self, orderStatistics: bool=False):
+		TreeBase.__init__(self, orderStatistics)
+
+	@classmethod
+	def fromSorted(cls, keys: Iterable[object], orderStatistics: bool=False) -> 'TreeSet':
+		return cls._fromSortedNodes(map(KeyNode, keys), orderStatistics)
+
+	@classmethod
+	def fromIterable(cls, keys: Iterable[object], orderStatistics: bool=False) -> 'TreeSet':
+		return cls.fromSorted(sorted(keys), orderStatistics)
 
 	def add(self, key: object):
-		self.root = self._insertNode(self.root, KeyNode(key))
-		self.root.parent = None
\ No newline at end of file
+		self._insert(KeyNode(key))
+
+	# m single updates cost about m * log2(n) node visits, while rebuilding from a merged key list costs n + m steps that are
+	# each a few times cheaper than a visit; batches and set operations pick whichever is smaller
+	@staticmethod
+	def _preferBulk(updates: int, size: int) -> bool:
+		return updates * size.bit_length() > _BULK_FACTOR * (size + updates)
+
+	def _reload(self, keys: Iterable[object]) -> None:
+		tree = self.fromSorted(keys, self.orderStatistics)
+		self.root, self.size = tree.root, tree.size
+		return
+
+	# few probes descend the tree, many bisect its sorted key list, which is one walk to build but far cheaper per probe
+	def _membership(self, probes: int) -> Callable[[object], bool]:
+		if not self._preferBulk(probes, self.size):
+			return self.contains
+
+		keys = self.getKeys()
+		def member(key: object) -> bool:
+			i = bisect_left(keys, key)
+			return i < len(keys) and not key < keys[i]
+
+		return member
+
+	def addAll(self, keys: Iterable[object]) -> None:
+		incoming = list(keys)
+		if not self._preferBulk(len(incoming), self.size):
+			for key in incoming:
+				self._insert(KeyNode(key))
+			return
+
+		self._reload(sorted(chain(self.getKeys(), incoming))) # stable, so an added key replaces an equal existing one as add does
+		return
+
+	def removeAll(self, keys: Iterable[object]) -> int:
+		outgoing = list(keys)
+		size = self.size
+		if not self._preferBulk(len(outgoing), self.size):
+			for key in outgoing:
+				self._delete(key)
+			return size - self.size
+
+		outgoing.sort()
+		def removed(key: object) -> bool:
+			i = bisect_left(outgoing, key)
+			return i < len(outgoing) and not key < outgoing[i]
+
+		self._reload([ key for key in self.getKeys() if not removed(key) ])
+		return size - self.size
+
+	def union(self, other: 'TreeSet') -> 'TreeSet':
+		return self.fromSorted(sorted(chain(self.getKeys(), other.getKeys())), self.orderStatistics)
+
+	def intersection(self, other: 'TreeSet') -> 'TreeSet':
+		small, large = (self, other) if self.size <= other.size else (other, self)
+		member = large._membership(small.size)
+		return self.fromSorted([ key for key in small.getKeys() if member(key) ], self.orderStatistics)
+
+	def difference(self, other: 'TreeSet') -> 'TreeSet':
+		member = other._membership(self.size)
+		return self.fromSorted([ key for key in self.getKeys() if not member(key) ], self.orderStatistics)
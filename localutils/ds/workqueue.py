@@ -0,0 +1,165 @@
+import asyncio
+import threading
+from collections import deque
+from localutils.ds.heap import Heap, HeapArity, HeapType
+from time import monotonic
+from typing import Any, Callable, Deque, Generic, List, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+
+### Blocking priority queue ###
+
+# a Heap behind one lock, where get() blocks until an item arrives and, with a maximum size, put() blocks until there is room.
+# Threads wait on conditions and coroutines (through AsyncPriorityWorkQueue) on futures queued here, and every put or get wakes
+# waiters of both kinds, so producers and consumers can mix threads and event loops freely. Timeouts are in seconds, None waits
+# for as long as it takes; get() returns None and put() False when the timeout runs out
+class PriorityWorkQueue(Generic[T]):
+
+	def __init__(self, heaptype: HeapType=HeapType.MinHeap, key: Optional[Callable[[T], Any]]=None, maxsize: int=0, arity: HeapArity=HeapArity.Binary):
+		self.heap: Heap[T] = Heap(heaptype, key, arity)
+		self.maxsize: int = maxsize
+		self.lock: threading.Lock = threading.Lock()
+		self.notEmpty: threading.Condition = threading.Condition(self.lock)
+		self.notFull: threading.Condition = threading.Condition(self.lock)
+		self.getters: Deque[asyncio.Future] = deque()
+		self.putters: Deque[asyncio.Future] = deque()
+
+	@property
+	def size(self) -> int:
+		return self.heap.numvalues
+
+	def _full(self) -> bool:
+		return self.maxsize > 0 and self.heap.numvalues >= self.maxsize
+
+	# the helpers below must be called with the lock held
+	def _wake(self, waiters: Deque[asyncio.Future], count: int) -> None:
+		while count > 0 and waiters:
+			future = waiters.popleft()
+			if not future.done():
+				future.get_loop().call_soon_threadsafe(self._resolve, future, waiters)
+				count -= 1
+
+		return
+
+	# runs on the future's loop; a waiter cancelled after it was picked hands the wakeup on instead of losing it
+	def _resolve(self, future: asyncio.Future, waiters: Deque[asyncio.Future]) -> None:
+		if future.done():
+			with self.lock:
+				self._wake(waiters, 1)
+			return
+
+		future.set_result(None)
+		return
+
+	def _added(self, count: int) -> None:
+		self.notEmpty.notify(count)
+		self._wake(self.getters, count)
+		return
+
+	def _removed(self, count: int) -> None:
+		if self.maxsize > 0:
+			self.notFull.notify(count)
+			self._wake(self.putters, count)
+
+		return
+
+	def put(self, item: T, timeout: Optional[float]=None) -> bool:
+		with self.lock:
+			if not self.notFull.wait_for(lambda: not self._full(), timeout):
+				return False
+
+			self.heap.push(item)
+			self._added(1)
+
+		return True
+
+	def get(self, timeout: Optional[float]=None) -> Optional[T]:
+		with self.lock:
+			if not self.notEmpty.wait_for(lambda: self.heap.numvalues > 0, timeout):
+				return None
+
+			item = self.heap.pop()
+			self._removed(1)
+
+		return item
+
+	# waits for at least one item, then takes up to n in priority order; an empty list means the timeout ran out
+	def getMany(self, n: int, timeout: Optional[float]=None) -> List[T]:
+		with self.lock:
+			if not self.notEmpty.wait_for(lambda: self.heap.numvalues > 0, timeout):
+				return []
+
+			items = self.heap.popMany(n)
+			self._removed(len(items))
+
+		return items
+
+
+### asyncio front end ###
+
+# awaitable put and get on a PriorityWorkQueue, which threads can keep using directly at the same time. The lock is only held
+# for the heap operation itself, never across an await
+class AsyncPriorityWorkQueue(Generic[T]):
+
+	def __init__(self, queue: Optional[PriorityWorkQueue[T]]=None):
+		self.queue: PriorityWorkQueue[T] = queue if queue is not None else PriorityWorkQueue()
+
+	@property
+	def size(self) -> int:
+		return self.queue.size
+
+	# False once the timeout runs out. A future that timed out or was cancelled while still queued is taken off the waiters, one
+	# already picked by a wakeup is handed on by _resolve, and one already resolved passes its wakeup on to the next waiter
+	async def _wait(self, waiters: Deque[asyncio.Future], future: asyncio.Future, deadline: Optional[float]) -> bool:
+		try:
+			await asyncio.wait_for(future, deadline - monotonic() if deadline is not None else None)
+		except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+			with self.queue.lock:
+				if future in waiters:
+					waiters.remove(future)
+				elif future.done() and not future.cancelled():
+					self.queue._wake(waiters, 1)
+
+			if isinstance(error, asyncio.CancelledError):
+				raise
+			return False
+
+		return True
+
+	async def put(self, item: T, timeout: Optional[float]=None) -> bool:
+		queue = self.queue
+		deadline = monotonic() + timeout if timeout is not None else None
+		while True:
+			with queue.lock:
+				if not queue._full():
+					queue.heap.push(item)
+					queue._added(1)
+					return True
+
+				future = asyncio.get_running_loop().create_future()
+				queue.putters.append(future)
+
+			if not await self._wait(queue.putters, future, deadline):
+				return False
+
+	async def get(self, timeout: Optional[float]=None) -> Optional[T]:
+		items = await self.getMany(1, timeout)
+		return items[0] if items else None
+
+	async def getMany(self, n: int, timeout: Optional[float]=None) -> List[T]:
+		queue = self.queue
+		deadline = monotonic() + timeout if timeout is not None else None
+		while True:
+			with queue.lock:
+				if queue.heap.numvalues > 0:
+					items = queue.heap.popMany(n)
+					queue._removed(len(items))
+					return items
+
+				future = asyncio.get_running_loop().create_future()
+				queue.getters.append(future)
+
+			if not await self._wait(queue.getters, future, deadline):
+				return []
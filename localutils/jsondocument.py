@@ -0,0 +1,246 @@
+import mmap
+import re
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from localutils.jsonparser import JsonParser, _stringValue
+from operator import methodcaller
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+
+# each match skips everything up to the next bracket outside a string, group 1 is the bracket itself
+_BRACKET_RE = re.compile(rb'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*([{}\[\]])', re.DOTALL)
+_TOKEN_RE = re.compile(rb'[ \t\n\r]*([{}\[\],:]|"[^"\\]*(?:\\.[^"\\]*)*"|[^ \t\n\r{}\[\],:"]+)', re.DOTALL)
+_START = methodcaller('start', 1)
+_OBJECT, _ARRAY, _COMMA, _COLON, _QUOTE = b'{[,:"'
+_DEPTH_CHANGE = [ 0 ] * 256
+_DEPTH_CHANGE[ord('{')] = _DEPTH_CHANGE[ord('[')] = 1
+_DEPTH_CHANGE[ord('}')] = _DEPTH_CHANGE[ord(']')] = -1
+
+
+class LazyJsonDocument:
+
+	def __init__(self, path: str, encoding: str='utf-8'):
+		self.path: str = path
+		self.encoding: str = encoding
+		self.file = open(path, 'rb')
+
+		try:
+			self.buffer: mmap.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError:
+			self.file.close()
+			raise Exception(f'Unable to map empty JSON document: {path}')
+
+		self.root: Union['LazyJsonObject', 'LazyJsonArray', Any] = None
+		self.__offsets: array = array('q')
+		self.__depths: array = array('i')
+		try:
+			self.__indexBrackets()
+			self.root = self.valueAt(*self.__rootSpan())
+		except BaseException:
+			self.close()
+			raise
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+	def __getitem__(self, key: Union[str, int]) -> Any:
+		return self.root[key]
+
+	def close(self) -> None:
+		self.root = None
+		self.buffer.close()
+		self.file.close()
+		return
+
+	def materialize(self) -> Any:
+		if isinstance(self.root, (LazyJsonObject, LazyJsonArray)):
+			return self.root.materialize()
+
+		return self.root
+
+	# the structural index holds the offset of every bracket outside a string and the nesting depth just after it, in typed
+	# arrays of 12 bytes per bracket; both are built by C-level iteration, and the partner of a bracket is only looked up when
+	# its container is visited
+	def __indexBrackets(self) -> None:
+		self.__offsets = array('q', map(_START, _BRACKET_RE.finditer(self.buffer)))
+		self.__depths = array('i', accumulate(map(_DEPTH_CHANGE.__getitem__, map(self.buffer.__getitem__, self.__offsets))))
+
+		if len(self.__depths) > 0 and (self.__depths[-1] != 0 or min(self.__depths) < 0):
+			raise Exception(f'Unbalanced brackets detected in JSON document: {self.path}')
+
+		return
+
+	def __rootSpan(self) -> Tuple[int, int]:
+		match = _TOKEN_RE.match(self.buffer, 0)
+		if match is None:
+			raise Exception(f'No JSON value found in document: {self.path}')
+
+		return self.spanAt(match)
+
+	def closingOffset(self, start: int) -> int:
+		i = bisect_left(self.__offsets, start)
+		j = self.__depths.index(self.__depths[i] - 1, i + 1) # the first bracket after the opener that returns to the outer depth
+		if self.buffer[self.__offsets[j]] != self.buffer[start] + 2: # '}' and ']' are two code points after their openers
+			raise Exception(f'Mismatched closing bracket detected at offset {self.__offsets[j]}')
+
+		return self.__offsets[j]
+
+	def spanAt(self, match) -> Tuple[int, int]:
+		start, end = match.span(1)
+		if end - start == 1 and self.buffer[start] in b'{[':
+			end = self.closingOffset(start) + 1
+
+		return start, end
+
+	def valueAt(self, start: int, end: int) -> Union['LazyJsonObject', 'LazyJsonArray', Any]:
+		first: int = self.buffer[start]
+		if first == _OBJECT:
+			return LazyJsonObject(self, start, end)
+		elif first == _ARRAY:
+			return LazyJsonArray(self, start, end)
+		else:
+			return self.decode(start, end)
+
+	def decode(self, start: int, end: int) -> Any:
+		return next(JsonParser(self.buffer[start:end].decode(self.encoding)).iterpath(''))
+
+	# keys follow the same unescaping rules as JsonParser strings
+	def decodeKey(self, start: int, end: int) -> str:
+		return _stringValue(self.buffer[start:end].decode(self.encoding))
+
+	# yields (first byte, start, end) for each token directly inside the container spanning [start, end)
+	def tokens(self, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+		pos: int = start + 1
+		stop: int = end - 1
+		buffer = self.buffer
+		match = _TOKEN_RE.match
+
+		while pos < stop:
+			token = match(buffer, pos, stop)
+			if token is None:
+				break
+
+			tokenStart, pos = token.span(1)
+			first = buffer[tokenStart]
+			if first == _OBJECT or first == _ARRAY:
+				pos = self.closingOffset(tokenStart) + 1 # nested containers are skipped in one step using the structural index
+
+			yield first, tokenStart, pos
+
+		return
+
+
+class LazyJsonObject:
+
+	def __init__(self, document: LazyJsonDocument, start: int, end: int):
+		self.document: LazyJsonDocument = document
+		self.start: int = start
+		self.end: int = end
+		self.__spans: Optional[Dict[str, Tuple[int, int]]] = None
+		self.__values: Dict[str, Any] = {}
+
+	def __repr__(self):
+		return f'LazyJsonObject({self.start}:{self.end})'
+
+	def __len__(self) -> int:
+		return len(self.__index())
+
+	def __iter__(self) -> Iterator[str]:
+		return iter(self.__index())
+
+	def __contains__(self, key: str) -> bool:
+		return key in self.__index()
+
+	def __getitem__(self, key: str) -> Any:
+		if key not in self.__values:
+			self.__values[key] = self.document.valueAt(*self.__index()[key])
+
+		return self.__values[key]
+
+	def get(self, key: str, default: Any=None) -> Any:
+		return self[key] if key in self else default
+
+	def keys(self) -> List[str]:
+		return list(self.__index())
+
+	def items(self) -> Iterator[Tuple[str, Any]]:
+		for key in self.__index():
+			yield key, self[key]
+
+	def materialize(self) -> Dict[str, Any]:
+		return self.document.decode(self.start, self.end)
+
+	def __index(self) -> Dict[str, Tuple[int, int]]:
+		if self.__spans is not None:
+			return self.__spans
+
+		spans: Dict[str, Tuple[int, int]] = {}
+		key: Optional[str] = None
+		for first, start, end in self.document.tokens(self.start, self.end):
+			if first == _COMMA or first == _COLON:
+				continue
+			elif key is None:
+				if first != _QUOTE:
+					raise Exception(f'Invalid object key detected at offset {start}')
+				key = self.document.decodeKey(start, end)
+			else:
+				spans[key] = (start, end)
+				key = None
+
+		self.__spans = spans
+		return spans
+
+
+class LazyJsonArray:
+
+	def __init__(self, document: LazyJsonDocument, start: int, end: int):
+		self.document: LazyJsonDocument = document
+		self.start: int = start
+		self.end: int = end
+		self.__starts: Optional[array] = None
+		self.__ends: Optional[array] = None
+		self.__values: Dict[int, Any] = {}
+
+	def __repr__(self):
+		return f'LazyJsonArray({self.start}:{self.end})'
+
+	def __len__(self) -> int:
+		return len(self.__index())
+
+	def __iter__(self) -> Iterator[Any]:
+		for i in range(len(self)):
+			yield self[i]
+
+	def __getitem__(self, index: int) -> Any:
+		starts = self.__index()
+		if index < 0:
+			index += len(starts)
+		if index < 0 or index >= len(starts):
+			raise IndexError(f'JSON array index out of range: {index}')
+
+		if index not in self.__values:
+			self.__values[index] = self.document.valueAt(starts[index], self.__ends[index])
+
+		return self.__values[index]
+
+	def materialize(self) -> List[Any]:
+		return self.document.decode(self.start, self.end)
+
+	def __index(self) -> array:
+		if self.__starts is not None:
+			return self.__starts
+
+		starts: array = array('q')
+		ends: array = array('q')
+		for first, start, end in self.document.tokens(self.start, self.end):
+			if first != _COMMA:
+				starts.append(start)
+				ends.append(end)
+
+		self.__starts = starts
+		self.__ends = ends
+		return starts
@@ -1,4 +1,17 @@
-from typing import Any, Dict, List, Optional, TypeVar, Union
+import codecs
+import dataclasses
+import datetime
+import io
+import re
+import sys
+import types
+import typing
+from array import array
+from decimal import Decimal
+from itertools import chain
+from json.decoder import scanstring
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
 
 class JsonToken:
 
@@ -10,27 +23,608 @@ class JsonToken:
 		return '{0} ({1})'.format(self.token, self.text)
 
 
+# one token per match: a structural character, a complete string (quotes included), a bare literal, or a lone unterminated quote
+_TOKEN_RE = re.compile(r'[ \t\n\r]*([{}\[\],:]|"[^"\\]*(?:\\.[^"\\]*)*"|[^ \t\n\r{}\[\],:"]+|")', re.DOTALL)
+# the same tokens, except that a flat array starting with a number is matched whole so it can be converted in bulk
+_NUMERIC_TOKEN_RE = re.compile(r'[ \t\n\r]*(\[[ \t\n\r]*-?[0-9][-+.eE0-9, \t\n\r]*\]|[{}\[\],:]|"[^"\\]*(?:\\.[^"\\]*)*"|[^ \t\n\r{}\[\],:"]+|")', re.DOTALL)
+_CONSTANTS = { 'true': True, 'false': False, 'null': None }
+_UNION_TYPES = ( Union, getattr(types, 'UnionType', Union) ) # Optional[T] and, from Python 3.10, T | None
+
+
+# standard JSON unescaping of a string body that contains a backslash, done by the json module's C scanner; control
+# characters inside strings stay accepted as the tokenizer accepts them
+def _unescape(body: str) -> str:
+	try:
+		return scanstring(f'"{body}"', 1, False)[0]
+	except ValueError as e:
+		raise Exception(f'Invalid escape sequence in JSON string: {e}')
+
+
+def _stringValue(token: str) -> str:
+	body = token[1:-1]
+	return _unescape(body) if '\\' in body else body
+
+
+def _tokenKind(token: str) -> str:
+	if token[0] == '"':
+		return 'ID'
+	elif token in '{}[],:':
+		return token
+	else:
+		return 'LIT'
+
+
+class JsonTokenStream:
+
+	__slots__ = [ 'tokens' ]
+
+	def __init__(self, text: str, numericArrays: bool=False):
+		self.tokens: List[str] = (_NUMERIC_TOKEN_RE if numericArrays else _TOKEN_RE).findall(text)
+
+		# a lone quote can only be produced by a string with no closing quote
+		if '"' in self.tokens:
+			raise Exception('Unterminated string detected in JSON input')
+
+	def __len__(self) -> int:
+		return len(self.tokens)
+
+	def __getitem__(self, index: int) -> JsonToken:
+		token = self.tokens[index]
+		kind = _tokenKind(token)
+		return JsonToken(kind, _stringValue(token) if kind == 'ID' else token)
+
+
+class JsonStreamTokenizer:
+
+	def __init__(self, encoding: str='utf-8', numericArrays: bool=False):
+		self.decoder = codecs.getincrementaldecoder(encoding)()
+		self.pending: str = ''
+		self.inString: bool = False
+		self.pattern: re.Pattern = _NUMERIC_TOKEN_RE if numericArrays else _TOKEN_RE
+
+	def feed(self, chunk: Union[str, bytes]) -> List[str]:
+		if isinstance(chunk, (bytes, bytearray)):
+			chunk = self.decoder.decode(chunk)
+
+		# a string spanning several chunks is only re-scanned once a chunk could contain its closing quote
+		if self.inString and '"' not in chunk:
+			self.pending += chunk
+			return []
+
+		text = self.pending + chunk
+		tokens = self.pattern.findall(text)
+		self.pending = ''
+		self.inString = False
+
+		if '"' in tokens:
+			# the unterminated string is the last one in the text, so it opens at the last unescaped double-quote
+			del tokens[tokens.index('"'):]
+			self.pending = text[JsonStreamTokenizer.__openingQuote(text):]
+			self.inString = True
+
+		elif len(tokens) > 0 and text[-1] not in ' \t\n\r' and _tokenKind(tokens[-1]) == 'LIT':
+			self.pending = tokens.pop() # a literal running up to the end of the chunk may continue in the next one
+
+		return tokens
+
+	def close(self) -> List[str]:
+		text = self.pending + self.decoder.decode(b'', final=True)
+		self.pending = ''
+		self.inString = False
+
+		tokens = self.pattern.findall(text)
+		if '"' in tokens:
+			raise Exception('Unterminated string detected in JSON input')
+
+		return tokens
+
+	@staticmethod
+	def __openingQuote(text: str) -> int:
+		pos = text.rfind('"')
+		while pos > 0:
+			slashes = 0
+			while pos - slashes > 0 and text[pos - slashes - 1] == '\\':
+				slashes += 1
+
+			if slashes % 2 == 0:
+				break
+
+			pos = text.rfind('"', 0, pos)
+
+		return pos
+
+
+class JsonRecord:
+
+	__slots__ = [ 'index', 'row' ]
+
+	def __init__(self, index: Dict[str, int], row: Tuple[Any, ...]):
+		self.index: Dict[str, int] = index
+		self.row: Tuple[Any, ...] = row
+
+	def __repr__(self):
+		return repr(self.materialize())
+
+	def __len__(self) -> int:
+		return len(self.row)
+
+	def __iter__(self) -> Iterator[str]:
+		return iter(self.index)
+
+	def __contains__(self, key: str) -> bool:
+		return key in self.index
+
+	def __getitem__(self, key: str) -> Any:
+		return self.row[self.index[key]]
+
+	def __eq__(self, other: Any) -> bool:
+		if isinstance(other, JsonRecord):
+			return self.materialize() == other.materialize()
+
+		return self.materialize() == other
+
+	def get(self, key: str, default: Any=None) -> Any:
+		i = self.index.get(key)
+		return default if i is None else self.row[i]
+
+	def keys(self) -> List[str]:
+		return list(self.index)
+
+	def values(self) -> List[Any]:
+		return list(self.row)
+
+	def items(self) -> Iterator[Tuple[str, Any]]:
+		return zip(self.index, self.row)
+
+	def materialize(self) -> Dict[str, Any]:
+		return dict(zip(self.index, self.row))
+
+
+# an array of objects that all have the same keys in the same order, stored as one shared key tuple and a value tuple per object
+class JsonRecordList:
+
+	__slots__ = [ 'keys', 'rows', 'index' ]
+
+	def __init__(self, keys: Tuple[str, ...], rows: List[Tuple[Any, ...]]):
+		self.keys: Tuple[str, ...] = keys
+		self.rows: List[Tuple[Any, ...]] = rows
+		self.index: Dict[str, int] = { key: i for i, key in enumerate(keys) }
+
+	def __repr__(self):
+		return f'JsonRecordList({len(self.rows)} records: {", ".join(self.keys)})'
+
+	def __len__(self) -> int:
+		return len(self.rows)
+
+	def __iter__(self) -> Iterator[JsonRecord]:
+		index = self.index
+		for row in self.rows:
+			yield JsonRecord(index, row)
+
+	def __getitem__(self, i: Union[int, slice]) -> Union[JsonRecord, 'JsonRecordList']:
+		if isinstance(i, slice):
+			return JsonRecordList(self.keys, self.rows[i])
+
+		return JsonRecord(self.index, self.rows[i])
+
+	def __eq__(self, other: Any) -> bool:
+		if isinstance(other, JsonRecordList):
+			return self.keys == other.keys and self.rows == other.rows
+		elif isinstance(other, list):
+			return self.materialize() == other
+
+		return False
+
+	def column(self, key: str) -> List[Any]:
+		i = self.index[key]
+		return [ row[i] for row in self.rows ]
+
+	def materialize(self) -> List[Dict[str, Any]]:
+		keys = self.keys
+		return [ dict(zip(keys, row)) for row in self.rows ]
+
+
+class JsonTypeBinder:
+
+	__binders: Dict[Any, 'JsonTypeBinder'] = {}
+	__scalarTypes: Tuple[type, ...] = ( bool, int, float, str, bytes, dict, list, tuple, set, type(None) )
+
+	def __init__(self, userType: Any):
+		self.userType: Any = userType
+		self.fields: Dict[str, Any] = {}
+		self.converters: Optional[List[Tuple[str, Callable[[Any], Any]]]] = None
+		self.initFields: Optional[List[str]] = None
+
+		if typing.get_origin(userType) not in ( list, List ):
+			self.__mapFields()
+
+	@staticmethod
+	def forType(userType: Any) -> 'JsonTypeBinder':
+		binder = JsonTypeBinder.__binders.get(userType)
+		if binder is None:
+			binder = JsonTypeBinder(userType)
+			JsonTypeBinder.__binders[userType] = binder
+
+		return binder
+
+	def bind(self, value: Any) -> Any:
+		if typing.get_origin(self.userType) in ( list, List ):
+			if not isinstance(value, (list, JsonRecordList)):
+				return None
+			return JsonTypeBinder.__converter(self.userType)(value)
+
+		if isinstance(value, (list, JsonRecordList)):
+			return value # if the parsed result is a list, there's no way to know which elements of the list should be instances 'T'
+		elif not isinstance(value, dict):
+			return None
+
+		return self.bindObject(value)
+
+	def bindObject(self, data: Dict[str, Any]) -> Any:
+		converters = self.converters
+		if converters is None:
+			converters = self.__resolveConverters()
+
+		fields = self.fields
+		if self.initFields is not None:
+			values = { key: value for key, value in data.items() if key in fields }
+			for key, convert in converters:
+				if key in values:
+					values[key] = convert(values[key])
+			return self.userType(**values)
+
+		# setattr keeps the instance's inline attribute storage, where writing through obj.__dict__ would materialise a dict per object
+		obj = self.userType()
+		for key, value in data.items():
+			if key in fields:
+				setattr(obj, key, value)
+
+		for key, convert in converters:
+			if key in data:
+				setattr(obj, key, convert(data[key]))
+
+		return obj
+
+	# the field map is built once per type from dataclass fields, __slots__, class annotations, class attributes, properties with a
+	# setter (typed by the getter's return annotation) and the attributes of a default instance
+	def __mapFields(self) -> None:
+		userType = self.userType
+		try:
+			hints = typing.get_type_hints(userType)
+		except Exception:
+			hints = dict(getattr(userType, '__annotations__', {}))
+
+		defaults: Dict[str, Any] = {}
+		if dataclasses.is_dataclass(userType):
+			for field in dataclasses.fields(userType):
+				defaults[field.name] = None
+			self.initFields = [ field.name for field in dataclasses.fields(userType) if field.init ]
+			if len(self.initFields) < len(defaults):
+				self.initFields = None # fields excluded from __init__ have to be set after construction
+		else:
+			for cls in reversed(userType.__mro__[:-1]):
+				for name in getattr(cls, '__slots__', ()):
+					defaults[name] = None
+				for name, value in vars(cls).items():
+					if isinstance(value, property):
+						if value.fset is not None:
+							defaults[name] = None
+							hints.setdefault(name, JsonTypeBinder.__returnHint(value.fget))
+					elif not name.startswith('_') and not callable(value) and not isinstance(value, (staticmethod, classmethod)):
+						defaults[name] = value
+			for name in hints:
+				defaults.setdefault(name, None)
+
+		if self.initFields is None:
+			instance = userType()
+			if hasattr(instance, '__dict__'):
+				defaults.update(vars(instance))
+
+		for name, default in defaults.items():
+			fieldType = hints.get(name, type(default) if default is not None else None)
+			if typing.get_origin(fieldType) in _UNION_TYPES:
+				args = [ arg for arg in typing.get_args(fieldType) if arg is not type(None) ]
+				fieldType = args[0] if len(args) == 1 else None # Optional[T] binds as T, other unions are left as parsed
+			self.fields[name] = fieldType
+
+		return
+
+	@staticmethod
+	def __returnHint(getter: Optional[Callable[[Any], Any]]) -> Any:
+		try:
+			return typing.get_type_hints(getter).get('return') if getter is not None else None
+		except Exception:
+			return None
+
+	# nested binders are resolved on first use rather than while mapping fields, so types can refer to themselves
+	def __resolveConverters(self) -> List[Tuple[str, Callable[[Any], Any]]]:
+		self.converters = [ (name, JsonTypeBinder.__converter(fieldType)) for name, fieldType in self.fields.items() if JsonTypeBinder.__isBindable(fieldType) ]
+		return self.converters
+
+	@staticmethod
+	def __isBindable(fieldType: Any) -> bool:
+		if typing.get_origin(fieldType) in ( list, List ):
+			args = typing.get_args(fieldType)
+			return len(args) > 0 and JsonTypeBinder.__isBindable(args[0])
+
+		return isinstance(fieldType, type) and fieldType not in JsonTypeBinder.__scalarTypes and fieldType.__module__ != 'builtins'
+
+	@staticmethod
+	def __converter(fieldType: Any) -> Callable[[Any], Any]:
+		if typing.get_origin(fieldType) in ( list, List ):
+			args = typing.get_args(fieldType)
+			if len(args) == 0 or not JsonTypeBinder.__isBindable(args[0]):
+				return lambda value: value
+
+			convertItem = JsonTypeBinder.__converter(args[0])
+			return lambda value: [ convertItem(item) for item in value ] if isinstance(value, (list, JsonRecordList)) else value
+
+		bindObject = JsonTypeBinder.forType(fieldType).bindObject
+		return lambda value: bindObject(value) if isinstance(value, (dict, JsonRecord)) else value
+
+
+# every code point that has to be escaped inside a JSON string, mapped to its escape sequence
+_ESCAPES: Dict[int, str] = { i: '\\u{0:04x}'.format(i) for i in range(0x20) }
+_ESCAPES.update({ ord('"'): '\\"', ord('\\'): '\\\\', ord('\b'): '\\b', ord('\f'): '\\f', ord('\n'): '\\n', ord('\r'): '\\r', ord('\t'): '\\t' })
+_ESCAPE_RE = re.compile(r'["\\\x00-\x1f]')
+
+
+# most strings need no escaping, so the translation table is only applied once a search has found something to escape
+def _quoteString(value: str) -> str:
+	if _ESCAPE_RE.search(value) is None:
+		return '"' + value + '"'
+
+	return '"' + value.translate(_ESCAPES) + '"'
+
+
+class JsonSerializer:
+
+	__slotNames: Dict[type, Tuple[str, ...]] = {}
+
+	def __init__(self, target: Optional[Any]=None, indent: Optional[str]='\t', chunkSize: int=4096, encoding: str='utf-8'):
+		self.target: Optional[Any] = target
+		self.indent: Optional[str] = indent
+		self.chunkSize: int = chunkSize # number of buffered fragments joined into a single write
+		self.encoding: str = encoding
+		self.__buffer: List[str] = []
+		self.__indents: List[str] = [ '' ]
+		self.__keys: Dict[Any, str] = {}
+		self.__flushAt: int = chunkSize if target is not None else sys.maxsize
+		self.__sink: Optional[Callable[[str], Any]] = JsonSerializer.__sinkFor(target, encoding)
+
+	def serialize(self, value: Any) -> str:
+		self.flush()
+		flushAt = self.__flushAt
+		self.__flushAt = sys.maxsize
+
+		try:
+			self.__writeValue(value, 0)
+			return ''.join(self.__buffer)
+		finally:
+			self.__buffer.clear()
+			self.__flushAt = flushAt
+
+	def write(self, value: Any) -> None:
+		self.__writeValue(value, 0)
+		if len(self.__buffer) >= self.__flushAt:
+			self.flush()
+
+		return
+
+	def writeText(self, text: str) -> None:
+		self.__buffer.append(text)
+		return
+
+	def dump(self, value: Any) -> None:
+		self.write(value)
+		self.flush()
+		return
+
+	def flush(self) -> None:
+		if self.__sink is not None and len(self.__buffer) > 0:
+			text = ''.join(self.__buffer)
+			self.__buffer.clear()
+			self.__sink(text)
+
+		return
+
+	@staticmethod
+	def __sinkFor(target: Optional[Any], encoding: str) -> Optional[Callable[[str], Any]]:
+		if target is None:
+			return None
+		elif hasattr(target, 'sendall'):
+			return lambda text: target.sendall(text.encode(encoding))
+		elif isinstance(target, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(target, 'mode', ''):
+			return lambda text: target.write(text.encode(encoding))
+		else:
+			return target.write
+
+	def __indentAt(self, depth: int) -> str:
+		if self.indent is None:
+			return ''
+
+		while len(self.__indents) <= depth:
+			self.__indents.append(self.indent * len(self.__indents))
+
+		return self.__indents[depth]
+
+	# containers nested in a value at 'depth' are written at depth + 1, matching the layout of the original serializer
+	def __writeValue(self, value: Any, depth: int) -> None:
+		append = self.__buffer.append
+		valueType = type(value)
+
+		if valueType is str:
+			append(_quoteString(value))
+		elif valueType is dict:
+			self.__writeObject(value.items(), depth + 1)
+		elif valueType is list or valueType is tuple or valueType is set or valueType is frozenset:
+			self.__writeList(value, depth + 1)
+		elif value is None:
+			append('null')
+		elif valueType is bool:
+			append('true' if value else 'false')
+		elif valueType is int or valueType is float or valueType is Decimal:
+			append(str(value))
+		elif isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+			append(_quoteString(value.isoformat()))
+		elif isinstance(value, str):
+			append(_quoteString(str(value)))
+		elif isinstance(value, (dict, JsonRecord)):
+			self.__writeObject(value.items(), depth + 1)
+		elif isinstance(value, (list, tuple, set, frozenset, array, JsonRecordList)):
+			self.__writeList(value, depth + 1)
+		elif isinstance(value, bool):
+			append('true' if value else 'false')
+		elif isinstance(value, int):
+			append(int.__repr__(value))
+		elif isinstance(value, float):
+			append(float.__repr__(value))
+		elif hasattr(type(value), '__slots__') or hasattr(value, '__dict__'):
+			self.__writeObject(self.__attributes(value), depth + 1)
+		else:
+			append(_quoteString(str(value)))
+
+		return
+
+	# each item is preceded by one fragment holding the separator, line break and indentation, and closed by a line break
+	# and the outer indentation, which also reproduces the original layout for empty containers
+	def __writeObject(self, items: Iterable[Tuple[Any, Any]], depth: int) -> None:
+		buffer = self.__buffer
+		append = buffer.append
+		flushAt = self.__flushAt
+		keys = self.__keys
+		lead, separator, close = self.__layout(depth, '{', '}')
+
+		for key, value in items:
+			if len(buffer) >= flushAt:
+				self.flush()
+
+			if type(key) is not str:
+				prefix = _quoteString(str(key)) + ': ' # 1, 1.0 and True are equal dict keys, so only strings are cached
+			else:
+				prefix = keys.get(key)
+				if prefix is None:
+					prefix = _quoteString(key) + ': '
+					if len(keys) < 4096: # keys repeat across records, but a map keyed by data must not grow the cache forever
+						keys[key] = prefix
+
+			append(lead)
+			append(prefix)
+			lead = separator
+
+			valueType = type(value)
+			if valueType is str:
+				append(_quoteString(value))
+			elif valueType is int or valueType is float:
+				append(str(value))
+			else:
+				self.__writeValue(value, depth)
+
+		append(close)
+		return
+
+	def __writeList(self, items: Iterable[Any], depth: int) -> None:
+		buffer = self.__buffer
+		append = buffer.append
+		flushAt = self.__flushAt
+		lead, separator, close = self.__layout(depth, '[', ']')
+
+		for value in items:
+			if len(buffer) >= flushAt:
+				self.flush()
+
+			append(lead)
+			lead = separator
+
+			valueType = type(value)
+			if valueType is str:
+				append(_quoteString(value))
+			elif valueType is int or valueType is float:
+				append(str(value))
+			else:
+				self.__writeValue(value, depth)
+
+		append(close)
+		return
+
+	def __layout(self, depth: int, opening: str, closing: str) -> Tuple[str, str, str]:
+		if self.indent is None:
+			self.__buffer.append(opening)
+			return '', ',', closing
+
+		inner = self.__indentAt(depth)
+		self.__buffer.append(opening)
+		return '\n' + inner, ',\n' + inner, '\n' + self.__indentAt(depth - 1) + closing
+
+	# objects without a dict of their own are written from the __slots__ declared along their class hierarchy
+	@staticmethod
+	def __attributes(value: Any) -> List[Tuple[str, Any]]:
+		valueType = type(value)
+		names = JsonSerializer.__slotNames.get(valueType)
+		if names is None:
+			names = []
+			for cls in reversed(valueType.__mro__):
+				slots = getattr(cls, '__slots__', ())
+				for name in ( [ slots ] if isinstance(slots, str) else slots ):
+					if name not in ( '__dict__', '__weakref__' ) and name not in names:
+						names.append(name)
+			names = tuple(names)
+			JsonSerializer.__slotNames[valueType] = names
+
+		items = [ (name, getattr(value, name)) for name in names if hasattr(value, name) ]
+		if hasattr(value, '__dict__'):
+			items.extend(vars(value).items())
+
+		return items
+
+
+def _parseLineRange(args: Tuple[str, int, int, int, str]) -> List[Any]:
+	path, start, end, firstLine, encoding = args
+	with open(path, 'rb') as file:
+		file.seek(start)
+		data = file.read(end - start)
+
+	return list(JsonParser('', encoding=encoding)._parseLineValues(data.decode(encoding).split('\n'), firstLine))
+
+
 class JsonParser:
 	
 	T = TypeVar('T')
 
-	def __init__(self, jsonstring: str):
-		self.input = jsonstring.strip()
-		self.n = len(self.input)
-		self.i = 0
+	def __init__(self, jsonstring: Union[str, bytes, IO, Iterable[Union[str, bytes]]], chunkSize: int=65536, encoding: str='utf-8', internKeys: bool=True, records: bool=False, numericArrays: bool=False):
+		self.source: Optional[Union[IO, Iterable[Union[str, bytes]]]] = None
+		self.chunkSize: int = chunkSize
+		self.encoding: str = encoding
+		self.internKeys: bool = internKeys
+		self.records: bool = records
+		self.numericArrays: bool = numericArrays
+
+		if isinstance(jsonstring, (bytes, bytearray)):
+			jsonstring = jsonstring.decode(encoding)
+
+		if isinstance(jsonstring, str):
+			self.input: Optional[str] = jsonstring.strip()
+			self.n: int = len(self.input)
+		else:
+			self.input: Optional[str] = None # streamed input is tokenized chunk by chunk as the parser consumes it
+			self.n: int = 0
+			self.source = jsonstring
+
 		self.result: Optional[Union[List[Any], Dict[str, Any]]] = None
-		self.__stream = []
+		self.__stream: Optional[JsonTokenStream] = None
+		self.__tokens: Iterator[str] = iter(())
+		self.__keys: Optional[Dict[str, str]] = None
 
 
 	def parse(self) -> Optional[Union[List[Any], Dict[str, Any]]]:
-		self.__tokenizeInput()
-		self.i = 0
+		self.__tokenizeInput(self.numericArrays)
+		token = next(self.__tokens, '')
 
-		if self.__stream[0].token == '{':
+		if token == '{':
 			self.result = self.__parseObject()
 
-		elif self.__stream[0].token == '[':
-			self.result = self.__parseList()
+		elif token[:1] == '[':
+			self.result = self.__parseList() if len(token) == 1 else self.__parseNumbers(token)
 
 		else:
 			self.result = None
@@ -38,238 +632,407 @@ class JsonParser:
 		return self.result
 	
 	
-	def parseToType(self, userType: T) -> Optional[T]:
-		self.parse()
-		if self.result is None:
-			return None
+	def events(self) -> Iterator[Tuple[str, Any]]:
+		self.__tokenizeInput()
+		containers: List[bool] = [] # True for an object, False for an array
+		expectKey: bool = False
 
-		return JsonParser.__parseUserType(self.result, userType)
-	
-	
-	@staticmethod
-	def __parseUserType(resultobj: Union[List[Any], Dict[str, Any]], userType: T) -> Optional[Union[List[Any], T]]:
-		if not isinstance(resultobj, list) and not isinstance(resultobj, dict):
-			return None
-		
-		if isinstance(resultobj, list):
-			return resultobj # if the parsed result is a list, there's no way to know which elements of the list should be instances 'T'
-		
-		t = userType()
-		for key in resultobj:
-			if hasattr(t, key):
-				attr = getattr(t, key)
-				if isinstance(resultobj[key], dict) and not isinstance(attr, dict): # if parsed JSON element is a dict, but the member attr is not
-					setattr(t, key, JsonParser.__parseUserType(resultobj[key], type(attr)))
+		for token in self.__tokens:
+			first = token[0]
+			if expectKey and first != '"' and first != '}':
+				raise Exception(f'Invalid token detected for object key: {JsonParser.__describeToken(token)}')
+
+			if first == '"':
+				yield ('key' if expectKey else 'value', _stringValue(token))
+				expectKey = False
+			elif first == '{':
+				containers.append(True)
+				expectKey = True
+				yield ('start_object', None)
+			elif first == '[':
+				containers.append(False)
+				yield ('start_array', None)
+			elif first == '}' or first == ']':
+				if len(containers) == 0 or containers.pop() != (first == '}'):
+					raise Exception(f'Unbalanced closing token detected: {token}')
+				expectKey = False
+				yield ('end_object' if first == '}' else 'end_array', None)
+			elif first == ',':
+				expectKey = len(containers) > 0 and containers[-1]
+			elif first != ':':
+				yield ('value', JsonParser.__parseLiteral(token))
+
+		return
+
+
+	def iterpath(self, path: str) -> Iterator[Any]:
+		self.__tokenizeInput()
+		token = next(self.__tokens, '')
+		if token == '':
+			return
+
+		yield from self.__walkPath(token, path.split('.') if path != '' else [], 0)
+
+
+	# yields every value at the end of the path below the value starting at 'token'; 'item' selects the elements of an array
+	def __walkPath(self, token: str, path: List[str], depth: int) -> Iterator[Any]:
+		if depth == len(path):
+			yield self.__parseValue(token)
+			return
+
+		tokens = self.__tokens
+		if token == '{':
+			for key in tokens:
+				if key == ',':
+					continue
+				elif key == '}':
+					return
+				elif key[0] != '"':
+					raise Exception(f'Invalid token detected for object key: {JsonParser.__describeToken(key)}')
+
+				separator = next(tokens, '')
+				if separator != ':':
+					raise Exception(f'Invalid token detected for key-value separator: {JsonParser.__describeToken(separator)}')
+
+				value = next(tokens, '')
+				if _stringValue(key) == path[depth]:
+					yield from self.__walkPath(value, path, depth + 1)
 				else:
-					setattr(t, key, resultobj[key])
-				
-		return t
+					self.__skipValue(value)
 
+			raise Exception('Unexpected end of JSON input while parsing object')
 
-	def __tokenizeInput(self):
+		elif token == '[':
+			for value in tokens:
+				if value == ',':
+					continue
+				elif value == ']':
+					return
+				elif path[depth] == 'item':
+					yield from self.__walkPath(value, path, depth + 1)
+				else:
+					self.__skipValue(value)
 
-		_WS = [ ' ', '\t', '\n', '\r' ]
-		_TK = [ '{', '}', '[', ']', ',', ':' ]
+			raise Exception('Unexpected end of JSON input while parsing list')
 
-		while self.input[self.i] not in [ '{', '[' ]:
-			self.i += 1 # advance to the first open brace/bracket
-			if self.i <= self.n:
-				break
+		return
+
+
+	def __skipValue(self, token: str) -> None:
+		if token != '{' and token != '[':
+			return
+
+		depth: int = 1
+		for token in self.__tokens:
+			if token == '{' or token == '[':
+				depth += 1
+			elif token == '}' or token == ']':
+				depth -= 1
+				if depth == 0:
+					break
 
-		isEscaped: bool = False
-		
-		while self.i < self.n:
-			if self.input[self.i] in _WS:
-				self.i += 1
+		return
+
+
+	# one value per line, blank lines skipped; a value running past the end of its line or followed by more data on the same line
+	# raises with the line number. Only a file path can be split across worker processes
+	@staticmethod
+	def parseLines(source: Union[str, IO, Iterable[Union[str, bytes]]], processes: int=1, chunkSize: int=1048576, encoding: str='utf-8') -> Iterator[Any]:
+		if processes > 1 and not isinstance(source, str):
+			raise Exception('Parsing lines with several processes needs a file path source')
+
+		if not isinstance(source, str):
+			yield from JsonParser('', chunkSize, encoding)._parseLineValues(source)
+			return
+
+		if processes > 1:
+			with Pool(processes) as pool:
+				for values in pool.imap(_parseLineRange, ( (source, start, end, firstLine, encoding) for start, end, firstLine in JsonParser.__splitLines(source, chunkSize) )):
+					yield from values
+			return
+
+		with open(source, 'r', encoding=encoding, newline='\n', buffering=chunkSize) as file:
+			yield from JsonParser('', chunkSize, encoding)._parseLineValues(file)
+
+		return
+
+
+	# ranges always end just after a newline, or at the end of the file, and carry the number of their first line for error messages
+	@staticmethod
+	def __splitLines(path: str, rangeSize: int) -> Iterator[Tuple[int, int, int]]:
+		start: int = 0
+		firstLine: int = 1
+
+		with open(path, 'rb') as file:
+			data = file.read(rangeSize)
+			while data:
+				data += file.readline()
+				yield (start, start + len(data), firstLine)
+				start += len(data)
+				firstLine += data.count(b'\n')
+				data = file.read(rangeSize)
+
+		return
+
+
+	# each line is tokenized on its own, so a value can neither spill into the next line nor share its line with another value
+	def _parseLineValues(self, lines: Iterable[Union[str, bytes]], firstLine: int=1) -> Iterator[Any]:
+		self.__keys = {} if self.internKeys else None
+		findall = _TOKEN_RE.findall
+		for number, line in enumerate(lines, firstLine):
+			if not isinstance(line, str):
+				line = line.decode(self.encoding)
+
+			tokens = findall(line)
+			if not tokens:
 				continue
 
-			if self.input[self.i] in _TK:
-				self.__stream.append(JsonToken(self.input[self.i], self.input[self.i]))
-
-			elif self.input[self.i] == '"':
-				_id = []
-				self.i += 1
-				while self.i < self.n:
-					if self.input[self.i] == '\\':
-						isEscaped = not isEscaped # toggle
-						
-					if self.input[self.i] == '"' and not isEscaped:
-						break
-						
-					if self.input[self.i] == '"' and isEscaped:
-						_id[-1] = '"' # double-quotes are escaped, so replace the backslash
-					else:
-						_id.append(self.input[self.i])
-						
-					if self.input[self.i] != '\\':
-						isEscaped = False
-
-					self.i += 1
-
-				self.__stream.append(JsonToken('ID', ''.join(_id)))
+			try:
+				if '"' in tokens:
+					raise Exception('Unterminated string detected in JSON input')
+				self.__tokens = iterator = iter(tokens)
+				value = self.__parseValue(next(iterator))
+			except Exception as e:
+				raise Exception(f'Invalid JSON value on line {number}: {e}')
 
-			else:
-				_lit = self.input[self.i]
-				self.i += 1
-				while self.i < self.n:
-					if self.input[self.i] in [ ',', ']', '}' ]:
-						self.i -= 1 # back-up so we can capture the ending token in the stream
-						break
-					elif self.input[self.i] not in _WS:
-						_lit += self.input[self.i]
+			token = next(iterator, None)
+			if token is not None:
+				raise Exception(f'Unexpected data after the value on line {number}: {JsonParser.__describeToken(token)}')
+
+			yield value
+
+		return
+
+
+	def parseToType(self, userType: T) -> Optional[T]:
+		self.parse()
+		if self.result is None:
+			return None
 
-					self.i += 1
+		return JsonTypeBinder.forType(userType).bind(self.result)
 
-				self.__stream.append(JsonToken('LIT', _lit))
 
-			self.i += 1
+	# numeric array tokens are only produced for parse(), the event and path walkers always see the individual tokens
+	def __tokenizeInput(self, numericArrays: bool=False):
+		self.__keys = {} if self.internKeys else None
+		if self.source is None:
+			self.__stream = JsonTokenStream(self.input, numericArrays)
+			self.__tokens = iter(self.__stream.tokens)
+		else:
+			self.__tokens = chain.from_iterable(self.__tokenizeSource(numericArrays))
 
 		return
 
 
-	def __nextToken(self) -> JsonToken:
-		self.i += 1
-		if self.i < len(self.__stream):
-			return self.__stream[self.i]
+	def __tokenizeSource(self, numericArrays: bool) -> Iterator[List[str]]:
+		tokenizer = JsonStreamTokenizer(self.encoding, numericArrays)
+		for chunk in self.__readSource():
+			yield tokenizer.feed(chunk)
+
+		yield tokenizer.close()
+
+
+	def __readSource(self) -> Iterator[Union[str, bytes]]:
+		if hasattr(self.source, 'read'):
+			read = self.source.read
+		elif hasattr(self.source, 'recv'):
+			read = self.source.recv
 		else:
-			return JsonToken('EOF', 'EOF')
+			yield from self.source
+			return
+
+		chunk = read(self.chunkSize)
+		while chunk:
+			yield chunk
+			chunk = read(self.chunkSize)
+
+		return
 
 
 	@staticmethod
 	def __parseLiteral(text) -> Any:
-		if text == 'true':
-			return True
-		elif text == 'false':
-			return False
-		elif text == 'null':
-			return None
-		elif '.' in text or 'e' in text:
+		if text in _CONSTANTS:
+			return _CONSTANTS[text]
+		elif '.' in text or 'e' in text or 'E' in text:
 			return float(text)
 		else:
 			return int(text)
 
 
-	def __parseList(self) -> List[Any]:
-		lst = []
-		token = self.__nextToken()
-		while token.token != ']':
-			if token.token == 'ID':
-				lst.append(token.text)
-			elif token.token == 'LIT':
-				lst.append(JsonParser.__parseLiteral(token.text))
-			elif token.token == '{':
-				lst.append(self.__parseObject())
-			elif token.token == '[':
-				lst.append(self.__parseList())
-
-			token = self.__nextToken()
-			if token.token == 'EOF':
-				break
+	def __parseValue(self, token: str) -> Any:
+		first = token[:1]
+		if first == '{':
+			return self.__parseObject()
+		elif first == '[':
+			return self.__parseList() if len(token) == 1 else self.__parseNumbers(token)
+		elif first == '"':
+			return _stringValue(token)
+		elif first == '' or first in ',:]}':
+			raise Exception(f'Invalid token detected for value: {JsonParser.__describeToken(token)}')
+		else:
+			return JsonParser.__parseLiteral(token)
 
-		return lst
 
+	# the nested parsers all pull from the same token iterator, so each token is visited exactly once;
+	# strings and literals are decoded inline rather than through _stringValue/__parseLiteral as this is the hot path
+	def __parseList(self, lst: Optional[List[Any]]=None) -> Union[List[Any], JsonRecordList]:
+		if lst is None:
+			if self.records:
+				return self.__parseRecordList()
+			lst = []
+		append = lst.append
+		for token in self.__tokens:
+			first = token[0]
+			if first == ',':
+				continue
+			elif first == ']':
+				return lst
+			elif first == '"':
+				token = token[1:-1]
+				append(_unescape(token) if '\\' in token else token)
+			elif first == '{':
+				append(self.__parseObject())
+			elif first == '[':
+				append(self.__parseList() if len(token) == 1 else self.__parseNumbers(token))
+			elif token in _CONSTANTS:
+				append(_CONSTANTS[token])
+			elif '.' in token or 'e' in token or 'E' in token:
+				append(float(token))
+			else:
+				append(int(token))
 
-	def __parseObject(self) -> Dict[str, Any]:
-		obj = {}
+		raise Exception('Unexpected end of JSON input while parsing list')
 
-		key = self.__nextToken()
 
-		while key.token != '}':
+	# a whole flat numeric array is split and converted by C-level int/float over the source text, without a token per number;
+	# arrays that mix ints and floats become doubles, and anything int/float reject (or an int too large for 'q') is parsed as a list
+	def __parseNumbers(self, token: str) -> Union[array, List[Any]]:
+		values = token[1:-1].split(',')
+		try:
+			return array('q', map(int, values))
+		except (ValueError, OverflowError) as e:
+			overflow = isinstance(e, OverflowError)
 
-			if key.token == ',':
-				key = self.__nextToken()
+		if not overflow:
+			try:
+				return array('d', map(float, values))
+			except ValueError:
+				pass
 
-			separator = self.__nextToken()
-			value = self.__nextToken()
+		return JsonParser(token, internKeys=self.internKeys).parse()
 
-			if key.token != 'ID':
-				raise Exception(f'Invalid token detected for object key: {key.text} ({key.token})')
-			if separator.token != ':':
-				raise Exception(f'Invalid token detected for key-value separator: {key.text} ({key.token})')
 
-			if value.token == '{':
-				obj[key.text] = self.__parseObject()
-			elif value.token == '[':
-				obj[key.text] = self.__parseList()
-			elif value.token == 'ID':
-				obj[key.text] = value.text
-			elif value.token == 'LIT':
-				obj[key.text] = JsonParser.__parseLiteral(value.text)
+	# objects are parsed as dicts and reduced to a value tuple straight away, so only one dict per array is alive at a time;
+	# the first element that is not an object of the same shape turns the records parsed so far back into a plain list
+	def __parseRecordList(self) -> Union[List[Any], JsonRecordList]:
+		rows: List[Tuple[Any, ...]] = []
+		keys: Optional[Tuple[str, ...]] = None
 
-			key = self.__nextToken()
+		for token in self.__tokens:
+			if token == ',':
+				continue
+			elif token == ']':
+				return JsonRecordList(keys, rows) if keys is not None else []
 
-		return obj
+			value = self.__parseValue(token)
+			if type(value) is dict:
+				shape = tuple(value)
+				if keys is None:
+					keys = shape
+				if shape == keys:
+					rows.append(tuple(value.values()))
+					continue
 
+			lst: List[Any] = [ dict(zip(keys, row)) for row in rows ]
+			lst.append(value)
+			return self.__parseList(lst)
 
-	@staticmethod
-	def serializeJsonObject(json: Union[dict, list], noformat:bool=False) -> str:
-		if type(json) is dict:
-			return JsonParser.__serializeObject(json, 0 if noformat else 1)
-		
-		elif type(json) is list:
-			return JsonParser.__serializeList(json, 0 if noformat else 1)
-		
-		else:
-			raise Exception('JSON serializer needs a dict or list input')
+		raise Exception('Unexpected end of JSON input while parsing list')
 
 
-	@staticmethod
-	def __serializeObject(obj: dict, indent:int=0) -> str:
-		ret = ['{']
+	def __parseObject(self) -> Dict[str, Any]:
+		obj = {}
+		tokens = self.__tokens
+		keys = self.__keys
 
-		if indent > 0:
-			ret.append('\n')
+		for key in tokens:
+			if key == ',':
+				continue
+			elif key == '}':
+				return obj
+			elif key[0] != '"':
+				raise Exception(f'Invalid token detected for object key: {JsonParser.__describeToken(key)}')
 
-		keys = list(obj.keys())
-		for i in range(len(keys)):
-			ret.append('{0}"{1}": {2}'.format('\t' * indent, keys[i], JsonParser.__serializeValue(obj[keys[i]], indent)))
+			separator = next(tokens, '')
+			if separator != ':':
+				raise Exception(f'Invalid token detected for key-value separator: {JsonParser.__describeToken(separator)}')
 
-			if i < len(keys) - 1:
-				ret.append(',')
+			# interned keys are looked up by their raw token, so a repeated key is decoded once and every object shares one string
+			if keys is not None:
+				name = keys.get(key)
+				if name is None:
+					name = key[1:-1]
+					if '\\' in name:
+						name = _unescape(name)
+					if len(keys) < 65536: # a document keyed by data must not grow the table without limit
+						keys[key] = name
+				key = name
+			else:
+				key = key[1:-1]
+				if '\\' in key:
+					key = _unescape(key)
 
-			if indent > 0:
-				ret.append('\n')
+			value = next(tokens, '')
+			first = value[:1]
+			if first == '"':
+				value = value[1:-1]
+				obj[key] = _unescape(value) if '\\' in value else value
+			elif first == '{':
+				obj[key] = self.__parseObject()
+			elif first == '[':
+				obj[key] = self.__parseList() if len(value) == 1 else self.__parseNumbers(value)
+			elif first == '' or first in ',:]}':
+				raise Exception(f'Invalid token detected for object value: {JsonParser.__describeToken(value)}')
+			elif value in _CONSTANTS:
+				obj[key] = _CONSTANTS[value]
+			elif '.' in value or 'e' in value or 'E' in value:
+				obj[key] = float(value)
+			else:
+				obj[key] = int(value)
 
-		ret.append('{0}}}'.format('\t' * (indent-1)))
-		return ''.join(ret)
+		raise Exception('Unexpected end of JSON input while parsing object')
 
 
 	@staticmethod
-	def __serializeList(lst: list, indent:int=0) -> str:
-		ret = ['[']
-		length: int = len(lst)
-		i: int = 0
+	def __describeToken(token: str) -> str:
+		if token == '':
+			return 'EOF (EOF)'
 
-		if indent > 0:
-			ret.append('\n')
+		kind = _tokenKind(token)
+		return '{0} ({1})'.format(kind, _stringValue(token) if kind == 'ID' else token)
 
-		for item in lst:
-			ret.append('\t' * indent)
-			ret.append(JsonParser.__serializeValue(item, indent))
 
-			if i < length - 1:
-				ret.append(',')
-
-			if indent > 0:
-				ret.append('\n')
-				
-			i += 1
+	@staticmethod
+	def serializeJsonObject(json: Union[dict, list], noformat:bool=False) -> str:
+		if type(json) is dict or type(json) is list:
+			return JsonSerializer(indent=None if noformat else '\t').serialize(json)
 
-		ret.append('{0}]'.format('\t' * (indent-1)))
-		return ''.join(ret)
+		else:
+			raise Exception('JSON serializer needs a dict or list input')
 
 
 	@staticmethod
-	def __serializeValue(value, indent:int=0) -> str:
-		if type(value) is dict:
-			return JsonParser.__serializeObject(value, indent+1 if indent > 0 else indent)
-		elif type(value) is list or type(value) is set:
-			return JsonParser.__serializeList(value, indent+1 if indent > 0 else indent)
-		elif type(value) is str:
-			return '"{0}"'.format(value)
-		elif type(value) is bool:
-			return 'true' if value else 'false'
-		elif value is None:
-			return 'null'
-		else:
-			return str(value)
+	def serializeLines(objects: Iterable[Union[dict, list]], target: Union[str, IO], encoding: str='utf-8') -> int:
+		if isinstance(target, str):
+			with open(target, 'w', encoding=encoding) as file:
+				return JsonParser.serializeLines(objects, file, encoding)
+
+		serializer = JsonSerializer(target, indent=None, encoding=encoding)
+		count: int = 0
+		for obj in objects:
+			serializer.write(obj)
+			serializer.writeText('\n')
+			count += 1
+
+		serializer.flush()
+		return count
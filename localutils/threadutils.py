@@ -1,5 +1,8 @@
+import threading
+from contextlib import contextmanager
 from enum import Enum
-from time import sleep
+from time import perf_counter, sleep
+from typing import Dict, Iterator
 
 
 class ThreadWaitMultiplier(Enum):
@@ -21,3 +24,94 @@ class ThreadWait:
 	def reset(self) -> None:
 		self.waitSeconds = self.initialWaitSeconds
 		return
+
+
+# many readers or one writer; waiting writers hold back new readers so a steady stream of reads can not starve them.
+# The lock is not reentrant: a thread holding it must not acquire it again. Waits and hold times are counted to show contention
+class ReadWriteLock:
+
+	def __init__(self):
+		self.condition: threading.Condition = threading.Condition(threading.Lock())
+		self.readers: int = 0
+		self.writer: bool = False
+		self.waitingWriters: int = 0
+		self.resetStatistics()
+
+	def resetStatistics(self) -> None:
+		with self.condition:
+			self.counters: Dict[str, float] = {
+				'reads': 0, 'readsContended': 0, 'readWaitSeconds': 0.0, 'readHoldSeconds': 0.0,
+				'writes': 0, 'writesContended': 0, 'writeWaitSeconds': 0.0, 'writeHoldSeconds': 0.0, 'maxWriteHoldSeconds': 0.0
+			}
+
+		return
+
+	def statistics(self) -> Dict[str, float]:
+		with self.condition:
+			return dict(self.counters)
+
+	def acquireRead(self) -> None:
+		with self.condition:
+			self.counters['reads'] += 1
+			if self.writer or self.waitingWriters > 0:
+				self.counters['readsContended'] += 1
+				start = perf_counter()
+				while self.writer or self.waitingWriters > 0:
+					self.condition.wait()
+				self.counters['readWaitSeconds'] += perf_counter() - start
+
+			self.readers += 1
+
+		return
+
+	def releaseRead(self, heldSeconds: float=0.0) -> None:
+		with self.condition:
+			self.readers -= 1
+			self.counters['readHoldSeconds'] += heldSeconds
+			if self.readers == 0:
+				self.condition.notify_all()
+
+		return
+
+	def acquireWrite(self) -> None:
+		with self.condition:
+			self.counters['writes'] += 1
+			if self.writer or self.readers > 0:
+				self.counters['writesContended'] += 1
+				start = perf_counter()
+				self.waitingWriters += 1
+				while self.writer or self.readers > 0:
+					self.condition.wait()
+				self.waitingWriters -= 1
+				self.counters['writeWaitSeconds'] += perf_counter() - start
+
+			self.writer = True
+
+		return
+
+	def releaseWrite(self, heldSeconds: float=0.0) -> None:
+		with self.condition:
+			self.writer = False
+			self.counters['writeHoldSeconds'] += heldSeconds
+			self.counters['maxWriteHoldSeconds'] = max(self.counters['maxWriteHoldSeconds'], heldSeconds)
+			self.condition.notify_all()
+
+		return
+
+	@contextmanager
+	def reading(self) -> Iterator[None]:
+		self.acquireRead()
+		start = perf_counter()
+		try:
+			yield
+		finally:
+			self.releaseRead(perf_counter() - start)
+
+	@contextmanager
+	def writing(self) -> Iterator[None]:
+		self.acquireWrite()
+		start = perf_counter()
+		try:
+			yield
+		finally:
+			self.releaseWrite(perf_counter() - start)
@@ -0,0 +1,71 @@
+import gc
+import os
+import tempfile
+import unittest
+import warnings
+from localutils.jsondocument import LazyJsonArray, LazyJsonDocument, LazyJsonObject
+from localutils.jsonparser import JsonParser
+
+
+class TestLazyJsonDocument(unittest.TestCase):
+
+	json: str = '''{
+		"meta": { "count": 3, "label": "brackets [{ in \\"strings\\" }]" },
+		"records": [
+			{ "id": 0, "tags": [ "a", "b" ], "position": { "x": 1.5, "y": -2 } },
+			{ "id": 1, "tags": [], "position": { "x": 0, "y": 0 } },
+			{ "id": 2, "tags": [ [ 1, 2 ], {} ], "position": null }
+		],
+		"empty": {},
+		"flag": true
+	}'''
+
+	def setUp(self) -> None:
+		self.folder = tempfile.mkdtemp()
+		self.path = os.path.join(self.folder, 'document.json')
+		with open(self.path, 'w') as file:
+			file.write(self.json)
+
+	def tearDown(self) -> None:
+		os.remove(self.path)
+		os.rmdir(self.folder)
+
+	def testLazyAccess(self):
+		with LazyJsonDocument(self.path) as doc:
+			self.assertTrue(isinstance(doc.root, LazyJsonObject), msg='Document root should be a lazy object')
+			self.assertEqual(doc.root.keys(), [ 'meta', 'records', 'empty', 'flag' ], msg='Incorrect root keys')
+			self.assertTrue(isinstance(doc['records'], LazyJsonArray), msg='[records] should be a lazy array')
+			self.assertEqual(len(doc['records']), 3, msg='Incorrect [records] length')
+			self.assertEqual(doc['meta']['count'], 3, msg='Incorrect value at [meta][count]')
+			self.assertEqual(doc['meta']['label'], 'brackets [{ in "strings" }]', msg='Incorrect value at [meta][label]')
+			self.assertEqual(doc['records'][0]['position']['y'], -2, msg='Incorrect value at [records][0][position][y]')
+			self.assertEqual(doc['records'][-1]['tags'][0][1], 2, msg='Incorrect value at [records][-1][tags][0][1]')
+			self.assertIsNone(doc['records'][2]['position'], msg='Incorrect value at [records][2][position]')
+			self.assertEqual(len(doc['empty']), 0, msg='[empty] should have no keys')
+			self.assertTrue(doc['flag'], msg='Incorrect value at [flag]')
+			self.assertRaises(KeyError, lambda: doc['missing'])
+			self.assertRaises(IndexError, lambda: doc['records'][3])
+
+		return
+
+	def testMaterialize(self):
+		expected = JsonParser(self.json).parse()
+		with LazyJsonDocument(self.path) as doc:
+			self.assertEqual(doc.materialize(), expected, msg='Materialized document does not match parsed document')
+			self.assertEqual(doc['records'][1].materialize(), expected['records'][1], msg='Materialized record does not match parsed record')
+			self.assertEqual([ record['id'] for record in doc['records'] ], [ 0, 1, 2 ], msg='Incorrect record ids from iteration')
+
+		return
+
+	def testUnbalancedDocument(self):
+		with open(self.path, 'w') as file:
+			file.write('{ "a": [ 1, 2 }')
+
+		# a failed open must close the file and the mapping rather than leave them to the garbage collector
+		with warnings.catch_warnings(record=True) as caught:
+			warnings.simplefilter('always', ResourceWarning)
+			self.assertRaises(Exception, LazyJsonDocument, self.path)
+			gc.collect()
+
+		self.assertEqual([ str(w.message) for w in caught if issubclass(w.category, ResourceWarning) ], [], msg='Failed open should not leak the file')
+		return
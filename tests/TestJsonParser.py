@@ -1,7 +1,68 @@
-from localutils.jsonparser import JsonParser
+import datetime
+import io
+import os
+import tempfile
+from array import array
+from dataclasses import dataclass, field
+from decimal import Decimal
+from localutils.jsonparser import JsonParser, JsonRecord, JsonRecordList, JsonSerializer, JsonTokenStream, JsonTypeBinder
+from typing import List, Optional
 from unittest import TestCase
 
 
+class Point:
+	__slots__ = [ 'x', 'y' ]
+
+	def __init__(self):
+		self.x: int = 0
+		self.y: int = 0
+
+
+@dataclass
+class Shape:
+	name: str = ''
+	origin: Optional[Point] = None
+	points: List[Point] = field(default_factory=list)
+
+
+class Drawing:
+	title: str = ''
+	shapes: List[Shape] = []
+	parent: Optional['Drawing'] = None
+
+
+class Tree:
+	name: str = ''
+	child: 'Tree | None' = None
+
+
+class Marker:
+
+	def __init__(self):
+		self._position: Point = Point()
+		self._label: str = ''
+
+	@property
+	def position(self) -> Point:
+		return self._position
+
+	@position.setter
+	def position(self, value: Point) -> None:
+		self._position = value
+
+	@property
+	def label(self) -> str:
+		return self._label
+
+	@label.setter
+	def label(self, value: str) -> None:
+		self._label = value.strip()
+
+	@property
+	def size(self) -> int:
+		return 1
+
+
 class Test(TestCase):
 
 	def testObjectParser(self):
@@ -42,7 +103,7 @@ class Test(TestCase):
 		self.assertEqual(result['object']['list'][2], '"three"', msg='Incorrect value found at [object][list][2]')
 		
 		self.assertTrue('escapes' in result['object'], msg='[object] dict does not contain [emptyUrl]')
-		self.assertEqual(result['object']['escapes'], '\\\\', msg='Incorrect value found at [object][emptyUrl]')
+		self.assertEqual(result['object']['escapes'], '\\', msg='Incorrect value found at [object][emptyUrl]')
 
 		return
 
@@ -127,4 +188,238 @@ class Test(TestCase):
 		self.assertEqual(obj.dictValue['dictNull'], None)
 		
 		return
-	
\ No newline at end of file
+
+
+	def testTokenStream(self):
+		stream = JsonTokenStream('{ "a\\"b": [1, -2.5e3, true, null, "x y"] }')
+
+		self.assertEqual(len(stream), 15, msg='Incorrect token count')
+		self.assertEqual([ stream[i].token for i in range(4) ], [ '{', 'ID', ':', '[' ], msg='Incorrect token kinds')
+		self.assertEqual(stream[1].text, 'a"b', msg='Escaped double-quote not unescaped')
+		self.assertEqual(stream[6].text, '-2.5e3', msg='Incorrect literal text')
+		self.assertEqual(stream[12].text, 'x y', msg='Incorrect string text')
+
+		result = JsonParser('{ "a\\"b": [1, -2.5e3, true, null, "x y"] }').parse()
+		self.assertEqual(result, { 'a"b': [ 1, -2500.0, True, None, 'x y' ] }, msg='Incorrect parse result')
+
+		return
+
+
+	def testInvalidInput(self):
+		self.assertRaises(Exception, JsonTokenStream, '{"key": "unterminated}')
+		self.assertRaises(Exception, JsonParser('{"key" 1}').parse)
+		self.assertRaises(Exception, JsonParser('{"key": 1').parse)
+		self.assertIsNone(JsonParser('').parse(), msg='Empty input should not produce a result')
+		return
+
+
+	def testStreamParser(self):
+
+		class SocketReader:
+			def __init__(self, data: bytes):
+				self.data = data
+				self.offset = 0
+
+			def recv(self, size: int) -> bytes:
+				chunk = self.data[self.offset:self.offset + size]
+				self.offset += size
+				return chunk
+
+		with open('parse-obj.json', 'r') as jsonFile:
+			expected = JsonParser(jsonFile.read()).parse()
+
+		for chunkSize in [ 1, 2, 3, 7, 64 ]:
+			with open('parse-obj.json', 'rb') as jsonFile:
+				self.assertEqual(JsonParser(jsonFile, chunkSize=chunkSize).parse(), expected, msg=f'Incorrect result for file stream (chunk size {chunkSize})')
+
+		data = '{"text": "été \\"quoted\\" \\\\", "list": [ 12345, -0.5, true, "€" ]}'.encode('utf-8')
+		expected = { 'text': 'été "quoted" \\', 'list': [ 12345, -0.5, True, '€' ] }
+		for chunkSize in range(1, 10):
+			chunks = [ data[i:i + chunkSize] for i in range(0, len(data), chunkSize) ]
+			self.assertEqual(JsonParser(iter(chunks)).parse(), expected, msg=f'Incorrect result for chunk iterator (chunk size {chunkSize})')
+			self.assertEqual(JsonParser(SocketReader(data), chunkSize=chunkSize).parse(), expected, msg=f'Incorrect result for socket reader (chunk size {chunkSize})')
+
+		self.assertRaises(Exception, JsonParser(iter([ b'{"key": "unter', b'minated}' ])).parse)
+		return
+
+
+	def testEvents(self):
+		events = list(JsonParser('{"a": [1, "two", {}], "b": null}').events())
+		expected = [
+			('start_object', None),
+			('key', 'a'),
+			('start_array', None),
+			('value', 1),
+			('value', 'two'),
+			('start_object', None),
+			('end_object', None),
+			('end_array', None),
+			('key', 'b'),
+			('value', None),
+			('end_object', None)
+		]
+
+		self.assertEqual(events, expected, msg='Incorrect event sequence')
+		self.assertRaises(Exception, list, JsonParser('{"a": [1}').events())
+		return
+
+
+	def testIterPath(self):
+		json = '{"meta": {"count": 2}, "records": [{"id": 1, "tags": [{"id": 9}]}, {"id": "b"}, {"name": "c"}], "id": 5}'
+
+		self.assertEqual(list(JsonParser(json).iterpath('records.item.id')), [ 1, 'b' ], msg='Incorrect values for [records.item.id]')
+		self.assertEqual(list(JsonParser(json).iterpath('records.item.tags.item')), [ { 'id': 9 } ], msg='Incorrect values for [records.item.tags.item]')
+		self.assertEqual(list(JsonParser(json).iterpath('meta')), [ { 'count': 2 } ], msg='Incorrect values for [meta]')
+		self.assertEqual(list(JsonParser(json).iterpath('missing.item')), [], msg='Missing path should not yield values')
+		self.assertEqual(list(JsonParser('[1, [2, 3]]').iterpath('item')), [ 1, [ 2, 3 ] ], msg='Incorrect values for top-level [item]')
+		self.assertRaises(Exception, list, JsonParser('[{"id": 1}, {"id": 2}').iterpath('item.id'))
+		self.assertRaises(Exception, list, JsonParser('{"records": [1, 2').iterpath('meta'))
+
+		chunks = [ json[i:i + 5].encode('utf-8') for i in range(0, len(json), 5) ]
+		self.assertEqual(list(JsonParser(iter(chunks)).iterpath('records.item.id')), [ 1, 'b' ], msg='Incorrect values for streamed [records.item.id]')
+		return
+
+
+	def testJsonLines(self):
+		records = [ { 'id': i, 'name': f'record-{i}', 'values': [ i, i * 0.5, None ], 'ok': i % 2 == 0 } for i in range(500) ]
+		directory = tempfile.TemporaryDirectory()
+		self.addCleanup(directory.cleanup)
+		path = os.path.join(directory.name, 'records.ndjson')
+
+		self.assertEqual(JsonParser.serializeLines(records, path), len(records), msg='Incorrect serialized line count')
+		with open(path, 'r') as file:
+			self.assertEqual(len(file.readlines()), len(records), msg='Incorrect line count in serialized file')
+
+		self.assertEqual(list(JsonParser.parseLines(path)), records, msg='Incorrect records parsed from file')
+		self.assertEqual(list(JsonParser.parseLines(path, processes=2, chunkSize=1024)), records, msg='Incorrect records parsed in parallel')
+		with open(path, 'rb') as file:
+			self.assertEqual(list(JsonParser.parseLines(file, chunkSize=100)), records, msg='Incorrect records parsed from file object')
+
+		self.assertEqual(list(JsonParser.parseLines([ '{"a": 1}', '', '[2, 3]', '"four"', '5' ])), [ { 'a': 1 }, [ 2, 3 ], 'four', 5 ], msg='Incorrect values parsed from lines')
+		self.assertEqual(list(JsonParser.parseLines([ b'{"a": 1}\r\n', b'  \n', b'true\n' ])), [ { 'a': 1 }, True ], msg='Incorrect values parsed from byte lines')
+		self.assertRaisesRegex(Exception, 'line 1', list, JsonParser.parseLines([ '{"a": 1} {"b": 2}\n', '{"c": 3}\n' ]))
+		self.assertRaisesRegex(Exception, 'line 2', list, JsonParser.parseLines([ '[1]\n', '{"a": 1\n', '{"b": 2}\n' ]))
+		self.assertRaisesRegex(Exception, 'line 1', list, JsonParser.parseLines([ '[1, 2\n', '3]\n' ]))
+		self.assertRaises(Exception, list, JsonParser.parseLines([ '{"a": 1}' ], processes=2))
+
+		with open(path, 'a') as file:
+			file.write('{"id": 500\n')
+		for processes in [ 1, 2 ]:
+			self.assertRaisesRegex(Exception, 'line 501', list, JsonParser.parseLines(path, processes=processes, chunkSize=1024))
+
+		return
+
+
+	def testTypeBinder(self):
+		json = '''[
+			{ "title": "first", "unknown": 1, "shapes": [ { "name": "line", "origin": { "x": 1, "y": 2 }, "points": [ { "x": 3, "y": 4 }, { "x": 5, "y": 6 } ] } ] },
+			{ "title": "second", "shapes": [], "parent": { "title": "first", "shapes": [ { "name": "dot" } ] } }
+		]'''
+
+		drawings: List[Drawing] = JsonParser(json).parseToType(List[Drawing])
+		self.assertEqual(len(drawings), 2, msg='Incorrect number of bound objects')
+		self.assertTrue(all(isinstance(d, Drawing) for d in drawings), msg='List items should be bound to Drawing')
+		self.assertEqual(drawings[0].title, 'first')
+		self.assertFalse(hasattr(drawings[0], 'unknown'), msg='Keys without a matching field should be ignored')
+
+		shape: Shape = drawings[0].shapes[0]
+		self.assertTrue(isinstance(shape, Shape), msg='Nested list items should be bound to Shape')
+		self.assertEqual(shape.name, 'line')
+		self.assertTrue(isinstance(shape.origin, Point), msg='Optional field should be bound to Point')
+		self.assertEqual((shape.origin.x, shape.origin.y), (1, 2))
+		self.assertEqual([ (p.x, p.y) for p in shape.points ], [ (3, 4), (5, 6) ])
+
+		self.assertTrue(isinstance(drawings[1].parent, Drawing), msg='Self-referencing field should be bound to Drawing')
+		self.assertEqual(drawings[1].parent.shapes[0].name, 'dot')
+		self.assertEqual(drawings[1].parent.shapes[0].points, [])
+
+		marker: Marker = JsonParser('{"label": " pin ", "position": { "x": 3, "y": 4 }, "size": 5}').parseToType(Marker)
+		self.assertEqual(marker.label, 'pin', msg='Property with a setter should be bound through the setter')
+		self.assertTrue(isinstance(marker.position, Point), msg='Property typed by its getter should be bound to Point')
+		self.assertEqual((marker.position.x, marker.position.y, marker.size), (3, 4, 1), msg='Read-only property should be left alone')
+
+		tree: Tree = JsonParser('{"name": "root", "child": { "name": "leaf", "child": null }}').parseToType(Tree)
+		self.assertTrue(isinstance(tree.child, Tree), msg='T | None field should be bound to T')
+		self.assertEqual((tree.child.name, tree.child.child), ('leaf', None), msg='Incorrect values bound through T | None')
+
+		self.assertIs(JsonTypeBinder.forType(Drawing), JsonTypeBinder.forType(Drawing), msg='Binders should be cached per type')
+		self.assertTrue(isinstance(JsonParser(json).parseToType(Drawing), list), msg='A list result bound to a plain type should be returned unchanged')
+		return
+
+
+	def testJsonSerializer(self):
+		value = { 'text': 'say "hi"\n\ttab\\', 'tuple': (1, 2), 'set': { 3 }, 'date': datetime.datetime(2020, 1, 2, 3, 4, 5), 'price': Decimal('1.50'), 'point': Point(), 'empty': [] }
+		compact = JsonSerializer(indent=None).serialize(value)
+		self.assertEqual(compact, '{"text": "say \\"hi\\"\\n\\ttab\\\\","tuple": [1,2],"set": [3],"date": "2020-01-02T03:04:05","price": 1.50,"point": {"x": 0,"y": 0},"empty": []}', msg='Incorrect compact serialization')
+		self.assertEqual(JsonSerializer(indent='  ').serialize({ 'a': [ 1 ], 'b': {} }), '{\n  "a": [\n    1\n  ],\n  "b": {\n  }\n}', msg='Incorrect indented serialization')
+
+		serializer = JsonSerializer(indent=None)
+		self.assertEqual([ serializer.serialize({ key: 'v' }) for key in [ 1, True, 1.0 ] ], [ '{"1": "v"}', '{"True": "v"}', '{"1.0": "v"}' ], msg='Equal keys of different types should not share a cached name')
+
+		records = [ { 'id': i, 'name': f'record-{i}', 'values': [ i, None, True ] } for i in range(1000) ]
+		text = io.StringIO()
+		JsonSerializer(text, indent=None, chunkSize=16).dump(records)
+		self.assertEqual(text.getvalue(), JsonParser.serializeJsonObject(records, noformat=True), msg='Chunked output should match serialized string')
+
+		binary = io.BytesIO()
+		JsonSerializer(binary, indent='\t').dump(records)
+		self.assertEqual(JsonParser(binary.getvalue()).parse(), records, msg='Serialized bytes should parse back to the input')
+		return
+
+
+	def testEscapeRoundTrip(self):
+		texts = [ 'line1\nline2', 'C:\\tmp\\', 'a\tb', '\b\f\r\x01\x1f', 'say "hi"', 'é/€ 😀' ]
+		value = { text: [ text, { 'text': text } ] for text in texts }
+		self.assertEqual(JsonParser(JsonParser.serializeJsonObject(value)).parse(), value, msg='Serialized escapes should parse back to the input')
+		self.assertEqual(JsonParser(JsonParser.serializeJsonObject(value, noformat=True)).parse(), value, msg='Compact serialized escapes should parse back to the input')
+		self.assertEqual(JsonParser('["\\u00e9\\ud83d\\ude00\\/"]').parse(), [ 'é😀/' ], msg='Incorrect unicode escapes')
+		self.assertRaises(Exception, JsonParser('["bad \\x escape"]').parse)
+
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, 'escapes.ndjson')
+			JsonParser.serializeLines(texts + [ value ], path)
+			self.assertEqual(list(JsonParser.parseLines(path)), texts + [ value ], msg='Serialized lines with escapes should parse back to the input')
+
+		return
+
+
+	def testRecordLists(self):
+		json = '{"items": [{"id": 1, "tags": [{"k": "a"}, {"k": "b"}]}, {"id": 2, "tags": []}], "mixed": [{"id": 1}, {"name": "x"}, 3], "empty": [], "numbers": [1, 2]}'
+		expected = JsonParser(json, internKeys=False).parse()
+
+		interned = JsonParser(json).parse()
+		self.assertEqual(interned, expected, msg='Interned keys should not change the parsed result')
+		self.assertIs(list(interned['items'][0])[0], list(interned['items'][1])[0], msg='Equal keys should share one string')
+
+		result = JsonParser(json, records=True).parse()
+		items = result['items']
+		self.assertTrue(isinstance(items, JsonRecordList), msg='Same-shaped objects should be parsed as a record list')
+		self.assertEqual(items.keys, ( 'id', 'tags' ))
+		self.assertEqual(items.column('id'), [ 1, 2 ])
+		self.assertTrue(isinstance(items[0], JsonRecord), msg='Record list items should be record views')
+		self.assertEqual(items[0]['tags'][1]['k'], 'b')
+		self.assertEqual(items[1].get('missing', 0), 0)
+		self.assertEqual(result['mixed'], [ { 'id': 1 }, { 'name': 'x' }, 3 ], msg='Arrays of mixed shapes should be parsed as lists')
+		self.assertEqual(result, expected, msg='Record lists should compare equal to the parsed dicts')
+		self.assertEqual(JsonParser.serializeJsonObject(result), JsonParser.serializeJsonObject(expected), msg='Record lists should serialize like the parsed dicts')
+		return
+
+
+	def testNumericArrays(self):
+		json = '{"ints": [1, -2, 3], "floats": [0.5, -1e3, 2], "mixed": [1, "two"], "nested": [[1, 2], [3.5]], "big": [99999999999999999999, 1], "empty": []}'
+		result = JsonParser(json, numericArrays=True).parse()
+
+		self.assertEqual(result['ints'], array('q', [ 1, -2, 3 ]), msg='Integer arrays should be parsed as array(q)')
+		self.assertEqual(result['floats'], array('d', [ 0.5, -1000.0, 2.0 ]), msg='Float arrays should be parsed as array(d)')
+		self.assertEqual(result['mixed'], [ 1, 'two' ], msg='Arrays with non-numeric values should be parsed as lists')
+		self.assertEqual(result['nested'], [ array('q', [ 1, 2 ]), array('d', [ 3.5 ]) ], msg='Nested numeric arrays should be parsed as arrays')
+		self.assertEqual(result['big'], [ 99999999999999999999, 1 ], msg='Integers beyond 64 bits should be kept exact')
+		self.assertEqual(result['empty'], [])
+		self.assertEqual(JsonParser('[4, 5]', numericArrays=True).parse(), array('q', [ 4, 5 ]), msg='Top-level numeric array should be parsed as an array')
+		self.assertEqual(list(JsonParser(json, numericArrays=True).iterpath('ints.item')), [ 1, -2, 3 ], msg='Path walks should still see each number')
+
+		chunks = [ json[i:i + 7].encode('utf-8') for i in range(0, len(json), 7) ]
+		streamed = JsonParser(iter(chunks), numericArrays=True).parse()
+		self.assertEqual([ list(streamed[key]) for key in ( 'ints', 'floats' ) ], [ [ 1, -2, 3 ], [ 0.5, -1000.0, 2.0 ] ], msg='Incorrect numeric arrays parsed from chunks')
+		self.assertEqual(JsonSerializer(indent=None).serialize(result['floats']), '[0.5,-1000.0,2.0]', msg='Numeric arrays should serialize as JSON arrays')
+		return
@@ -1,3 +1,4 @@
+import random
 import unittest
 from localutils.ds.tree import TreeMap, TreeSet, TreeBase
 
@@ -50,6 +51,25 @@ class AVLTestBase(unittest.TestCase):
 			val = tree.find(i).getValue()
 			self.assertEqual(val, i, msg=f'Incorrect value found: {val}')
 
+	def balanceTestHelper(self, node, parent=None) -> int:
+		if node is None:
+			return 0
+
+		self.assertIs(node.parent, parent, msg=f'Invalid parent node on key {node.key}')
+		lheight = self.balanceTestHelper(node.left, node)
+		rheight = self.balanceTestHelper(node.right, node)
+		self.assertLessEqual(abs(lheight - rheight), 1, msg=f'Unbalanced subtree on key {node.key}')
+		self.assertEqual(node.height, 1 + max(lheight, rheight), msg=f'Incorrect height on key {node.key}')
+		return node.height
+
+	def countTestHelper(self, node) -> int:
+		if node is None:
+			return 0
+
+		count = 1 + self.countTestHelper(node.left) + self.countTestHelper(node.right)
+		self.assertEqual(node.count, count, msg=f'Incorrect subtree count on key {node.key}')
+		return count
+
 
 ### TreeMap tests, node insertion in-order ###
 
@@ -253,3 +273,229 @@ class TestTreeSetReversed(AVLTestBase):
 
 	def testFind(self):
 		self.findTestHelper(self.tree)
+
+
+### Node removal tests ###
+
+class TestTreeRemoval(AVLTestBase):
+
+	def testRemoveLeafAndInnerNodes(self):
+		tree = TreeMap()
+		for i in self.keys:
+			tree.add(i, i)
+
+		self.assertTrue(tree.remove(0), msg='Leaf node was not removed')
+		self.assertTrue(tree.remove(3), msg='Root node was not removed')
+		self.assertTrue(tree.remove(7), msg='Inner node was not removed')
+		self.assertFalse(tree.remove(3), msg='Missing key should not be removed')
+		self.assertEqual(tree.size, self.listSize - 3, msg='Incorrect tree size')
+		self.assertEqual(tree.getKeys(), [ 1, 2, 4, 5, 6, 8, 9 ], msg='Incorrect in-order traversal')
+		self.assertIsNone(tree.find(7), msg='Removed key found')
+		self.assertEqual(tree.find(8).getValue(), 8, msg='Incorrect value after removal')
+		self.balanceTestHelper(tree.root)
+
+	def testRemoveAll(self):
+		tree = TreeSet()
+		for i in range(1000):
+			tree.add(i)
+
+		for i in range(0, 1000, 2):
+			tree.remove(i)
+		self.balanceTestHelper(tree.root)
+		self.assertEqual(tree.getKeys(), list(range(1, 1000, 2)), msg='Incorrect keys after removal')
+
+		for i in range(1, 1000, 2):
+			tree.remove(i)
+		self.assertIsNone(tree.root, msg='Tree should be empty')
+		self.assertEqual(tree.size, 0, msg='Incorrect tree size')
+
+	def testRandomOperations(self):
+		rnd = random.Random(7)
+		tree = TreeMap()
+		expected = {}
+		for _ in range(5000):
+			key = rnd.randint(0, 500)
+			if rnd.random() < 0.6:
+				tree.add(key, -key)
+				expected[key] = -key
+			else:
+				self.assertEqual(tree.remove(key), key in expected, msg=f'Incorrect removal result for key {key}')
+				expected.pop(key, None)
+
+		self.balanceTestHelper(tree.root)
+		self.assertEqual(tree.getKeys(), sorted(expected), msg='Incorrect keys after random operations')
+		self.assertEqual(tree.size, len(expected), msg='Incorrect tree size')
+
+
+### Bulk-load tests ###
+
+class TestTreeBulkLoad(AVLTestBase):
+
+	@classmethod
+	def setUpClass(cls) -> None:
+		AVLTestBase.setUpClass()
+		cls.tree: TreeMap = TreeMap.fromSorted((i, i) for i in cls.keys)
+
+	def testListSize(self):
+		self.listSizeTestHelper(self.tree)
+
+	def testMinMax(self):
+		self.minMaxTestHelper(self.tree, 0, self.listSize - 1)
+
+	def testNodeBoundaries(self):
+		self.nodeBoundariesTestHelper(self.tree)
+
+	def testNextNodes(self):
+		self.nextNodesTestHelper(self.tree)
+
+	def testPreviousNodes(self):
+		self.previousNodesTestHelper(self.tree)
+
+	def testFind(self):
+		self.findTestHelper(self.tree)
+
+	def testBalance(self):
+		for size in range(64):
+			tree = TreeSet.fromSorted(range(size))
+			self.balanceTestHelper(tree.root)
+			self.assertEqual(tree.getKeys(), list(range(size)), msg=f'Incorrect keys for bulk-loaded tree of size {size}')
+
+	def testFromIterable(self):
+		tree = TreeMap.fromIterable([ (3, 'a'), (1, 'b'), (3, 'c'), (2, 'd') ])
+		self.assertEqual(tree.getKeys(), [ 1, 2, 3 ], msg='Incorrect keys after unsorted bulk load')
+		self.assertEqual(tree.find(3).getValue(), 'c', msg='The last of several equal keys should win')
+		self.assertEqual(tree.size, 3, msg='Incorrect tree size')
+
+		tree.add(0, 'e')
+		tree.remove(2)
+		self.balanceTestHelper(tree.root)
+		self.assertEqual(TreeSet.fromIterable([ 5, 1, 3, 1 ]).getKeys(), [ 1, 3, 5 ], msg='Incorrect keys for unsorted set')
+
+	def testUnsortedInput(self):
+		with self.assertRaises(Exception):
+			TreeSet.fromSorted([ 1, 3, 2 ])
+
+
+### Iterator and range query tests ###
+
+class TestTreeQueries(AVLTestBase):
+
+	@classmethod
+	def setUpClass(cls) -> None:
+		AVLTestBase.setUpClass()
+		cls.tree: TreeMap = TreeMap()
+		for i in cls.keys:
+			cls.tree.add(i * 10, i)
+
+	def nodeKey(self, node):
+		return node.key if node is not None else None
+
+	def testIterators(self):
+		self.assertEqual(list(self.tree.keys()), [ i * 10 for i in self.keys ], msg='Incorrect keys')
+		self.assertEqual(list(self.tree.keys(reverse=True)), [ i * 10 for i in self.keys[::-1] ], msg='Incorrect reversed keys')
+		self.assertEqual(list(self.tree.values()), self.keys, msg='Incorrect values')
+		self.assertEqual(list(self.tree.items())[:2], [ (0, 0), (10, 1) ], msg='Incorrect items')
+		self.assertEqual(list(TreeSet().keys()), [], msg='Empty tree should have no keys')
+
+	def testNeighbourQueries(self):
+		self.assertEqual(self.nodeKey(self.tree.floor(35)), 30, msg='Incorrect floor')
+		self.assertEqual(self.nodeKey(self.tree.floor(30)), 30, msg='Incorrect floor on existing key')
+		self.assertIsNone(self.tree.floor(-1), msg='Floor below minimum should be None')
+		self.assertEqual(self.nodeKey(self.tree.ceiling(35)), 40, msg='Incorrect ceiling')
+		self.assertIsNone(self.tree.ceiling(91), msg='Ceiling above maximum should be None')
+		self.assertEqual(self.nodeKey(self.tree.lower(30)), 20, msg='Incorrect lower')
+		self.assertIsNone(self.tree.lower(0), msg='Lower on minimum should be None')
+		self.assertEqual(self.nodeKey(self.tree.higher(30)), 40, msg='Incorrect higher')
+		self.assertIsNone(self.tree.higher(90), msg='Higher on maximum should be None')
+
+	def testRange(self):
+		self.assertEqual([ node.key for node in self.tree.range(25, 60) ], [ 30, 40, 50 ], msg='Incorrect range')
+		self.assertEqual([ node.key for node in self.tree.range(30, 60, reverse=True) ], [ 50, 40, 30 ], msg='Incorrect reversed range')
+		self.assertEqual([ node.key for node in self.tree.range(hi=20) ], [ 0, 10 ], msg='Incorrect range without lower bound')
+		self.assertEqual([ node.key for node in self.tree.range(lo=85) ], [ 90 ], msg='Incorrect range without upper bound')
+		self.assertEqual(list(self.tree.range(41, 49)), [], msg='Range between keys should be empty')
+
+
+### Order statistic tests ###
+
+class TestTreeOrderStatistics(AVLTestBase):
+
+	def testRankSelect(self):
+		tree = TreeMap(orderStatistics=True)
+		for i in self.keys[::-1]:
+			tree.add(i * 10, i)
+
+		self.countTestHelper(tree.root)
+		self.assertEqual(tree.rank(30), 3, msg='Incorrect rank of existing key')
+		self.assertEqual(tree.rank(35), 4, msg='Incorrect rank between keys')
+		self.assertEqual(tree.rank(-5), 0, msg='Incorrect rank below minimum')
+		self.assertEqual(tree.select(3).key, 30, msg='Incorrect selected key')
+		self.assertEqual(tree.select(-1).key, 90, msg='Incorrect selected key from the end')
+		self.assertEqual(tree.countRange(25, 60), 3, msg='Incorrect count in range')
+		self.assertEqual(tree.countRange(hi=20), 2, msg='Incorrect count without lower bound')
+		self.assertEqual(tree.countRange(60, 25), 0, msg='Inverted range should be empty')
+
+		with self.assertRaises(IndexError):
+			tree.select(self.listSize)
+
+		with self.assertRaises(Exception):
+			TreeMap().rank(1)
+
+	def testCountsAfterUpdates(self):
+		rnd = random.Random(11)
+		tree = TreeSet.fromIterable((rnd.randint(0, 300) for _ in range(100)), orderStatistics=True)
+		expected = set(tree.keys())
+		for _ in range(2000):
+			key = rnd.randint(0, 300)
+			if rnd.random() < 0.5:
+				tree.add(key)
+				expected.add(key)
+			else:
+				tree.remove(key)
+				expected.discard(key)
+
+		self.countTestHelper(tree.root)
+		keys = sorted(expected)
+		self.assertEqual([ tree.select(i).key for i in range(len(keys)) ], keys, msg='Incorrect keys selected after updates')
+		self.assertEqual(tree.countRange(100, 200), len([ key for key in keys if 100 <= key < 200 ]), msg='Incorrect count in range after updates')
+
+
+### TreeSet batch and set algebra tests ###
+
+class TestTreeSetAlgebra(AVLTestBase):
+
+	def algebraTestHelper(self, left: set, right: set):
+		a, b = TreeSet.fromIterable(left, orderStatistics=True), TreeSet.fromIterable(right)
+		for result, expected in [ (a.union(b), left | right), (a.intersection(b), left & right), (a.difference(b), left - right), (b.difference(a), right - left) ]:
+			self.assertEqual(result.getKeys(), sorted(expected), msg='Incorrect set operation result')
+			self.assertEqual(result.size, len(expected), msg='Incorrect set operation size')
+			self.balanceTestHelper(result.root)
+
+		self.assertTrue(a.union(b).orderStatistics, msg='Set operation should keep order statistics')
+		self.assertEqual(a.getKeys(), sorted(left), msg='Set operation changed its operand')
+
+	def testSetOperations(self):
+		rnd = random.Random(3)
+		large = set(rnd.sample(range(20000), 5000))
+		self.algebraTestHelper(large, set(rnd.sample(range(20000), 4000)))
+		self.algebraTestHelper(large, { 5, 17, 19999 }) # small operands probe the large tree instead of merging
+		self.algebraTestHelper(set(), large)
+
+	def testBatchUpdates(self):
+		rnd = random.Random(4)
+		for batch in [ 5, 3000 ]: # below and above the bulk rebuild threshold
+			tree = TreeSet.fromIterable(range(0, 4000, 2), orderStatistics=True)
+			expected = set(range(0, 4000, 2))
+			incoming = [ rnd.randrange(4000) for _ in range(batch) ]
+			tree.addAll(incoming)
+			expected.update(incoming)
+			self.assertEqual(tree.getKeys(), sorted(expected), msg=f'Incorrect keys after adding {batch} keys')
+
+			outgoing = [ rnd.randrange(4000) for _ in range(batch) ]
+			removed = tree.removeAll(outgoing)
+			self.assertEqual(removed, len(expected & set(outgoing)), msg=f'Incorrect removal count for {batch} keys')
+			expected.difference_update(outgoing)
+			self.assertEqual(tree.getKeys(), sorted(expected), msg=f'Incorrect keys after removing {batch} keys')
+			self.assertEqual(tree.size, len(expected), msg='Incorrect tree size after batch updates')
+			self.balanceTestHelper(tree.root)
+			self.countTestHelper(tree.root)
@@ -0,0 +1,100 @@
+import bisect
+import random
+import unittest
+from localutils.ds.blocktree import BlockTreeBase, BlockTreeMap, BlockTreeSet
+
+
+class BlockTreeTestBase(unittest.TestCase):
+
+	def structureTestHelper(self, tree: BlockTreeBase, expected: dict):
+		keys = sorted(expected)
+		self.assertEqual(tree.size, len(keys), msg='Incorrect tree size')
+		self.assertEqual(tree.getKeys(), keys, msg='Incorrect keys')
+		self.assertEqual(list(tree.items()), [ (key, expected[key]) for key in keys ], msg='Incorrect items')
+		self.assertEqual(tree.maxes, [ block[-1] for block in tree.keyBlocks ], msg='Block maxima out of date')
+		for block in tree.keyBlocks:
+			self.assertTrue(0 < len(block) <= tree.blockSize, msg=f'Block size out of bounds: {len(block)}')
+
+
+### BlockTreeMap / BlockTreeSet tests ###
+
+class TestBlockTree(BlockTreeTestBase):
+
+	def testInstantiation(self):
+		self.assertRaises(TypeError, BlockTreeBase, True)
+		self.assertRaises(Exception, BlockTreeMap, 2)
+
+	def testInsertRemove(self):
+		rnd = random.Random(1)
+		for blockSize in [ 4, 7, 64 ]:
+			tree = BlockTreeMap(blockSize)
+			expected = {}
+			for _ in range(3000):
+				key = rnd.randrange(500)
+				if rnd.random() < 0.6:
+					tree.add(key, -key)
+					expected[key] = -key
+				else:
+					self.assertEqual(tree.remove(key), expected.pop(key, None) is not None, msg=f'Incorrect removal of key {key}')
+
+			self.structureTestHelper(tree, expected)
+			for key in range(500):
+				self.assertEqual(tree.contains(key), key in expected, msg=f'Incorrect membership for key {key}')
+
+	def testFind(self):
+		tree = BlockTreeMap(4)
+		for i in range(10)[::-1]:
+			tree.add(i, i * 10)
+
+		self.assertEqual(tree.find(3).getValue(), 30, msg='Incorrect value found')
+		self.assertIsNone(tree.find(10), msg='Missing key found')
+		self.assertEqual(tree.minimum().key, 0, msg='Incorrect tree minimum')
+		self.assertEqual(tree.maximum().key, 9, msg='Incorrect tree maximum')
+
+		tree.add(3, 33)
+		self.assertEqual(tree.find(3).getValue(), 33, msg='Incorrect node value after update')
+		self.assertEqual(tree.size, 10, msg='Incorrect tree size after update')
+		self.assertRaises(Exception, tree.getKeys, 'preorder')
+
+	def testNavigation(self):
+		keys = list(range(0, 200, 2))
+		tree = BlockTreeSet.fromSorted(keys, blockSize=8)
+		self.structureTestHelper(tree, { key: key for key in keys })
+
+		node, visited = tree.minimum(), []
+		while node is not None:
+			visited.append(node.key)
+			node = tree.next(node)
+		self.assertEqual(visited, keys, msg='Incorrect next traversal')
+
+		node, visited = tree.maximum(), []
+		while node is not None:
+			visited.append(node.key)
+			node = tree.previous(node)
+		self.assertEqual(visited, keys[::-1], msg='Incorrect previous traversal')
+
+		for probe in range(-1, 201):
+			i = bisect.bisect_right(keys, probe)
+			self.assertEqual(getattr(tree.floor(probe), 'key', None), keys[i - 1] if i > 0 else None, msg=f'Incorrect floor of {probe}')
+			self.assertEqual(getattr(tree.higher(probe), 'key', None), keys[i] if i < len(keys) else None, msg=f'Incorrect higher of {probe}')
+			i = bisect.bisect_left(keys, probe)
+			self.assertEqual(getattr(tree.lower(probe), 'key', None), keys[i - 1] if i > 0 else None, msg=f'Incorrect lower of {probe}')
+			self.assertEqual(getattr(tree.ceiling(probe), 'key', None), keys[i] if i < len(keys) else None, msg=f'Incorrect ceiling of {probe}')
+
+	def testRange(self):
+		keys = list(range(0, 100, 3))
+		tree = BlockTreeMap.fromIterable([ (key, str(key)) for key in keys[::-1] ], blockSize=4)
+		for lo, hi in [ (None, None), (10, 50), (9, 51), (-5, 3), (99, 200), (50, 10) ]:
+			expected = [ key for key in keys if (lo is None or lo <= key) and (hi is None or key < hi) ]
+			self.assertEqual([ node.key for node in tree.range(lo, hi) ], expected, msg=f'Incorrect range {lo}..{hi}')
+			self.assertEqual([ node.key for node in tree.range(lo, hi, reverse=True) ], expected[::-1], msg=f'Incorrect reversed range {lo}..{hi}')
+
+		self.assertEqual([ node.getValue() for node in tree.nodes(start=tree.find(90)) ], [ '90', '93', '96', '99' ], msg='Incorrect nodes from start')
+		self.assertEqual([ node.key for node in tree.nodes(reverse=True, start=tree.find(6)) ], [ 6, 3, 0 ], msg='Incorrect reversed nodes from start')
+		self.assertEqual(list(tree.keys(reverse=True)), keys[::-1], msg='Incorrect reversed keys')
+		self.assertEqual(list(BlockTreeSet().range()), [], msg='Empty tree should have an empty range')
+		self.assertEqual(list(BlockTreeSet().nodes(reverse=True)), [], msg='Empty tree should have no nodes')
+
+
+if __name__ == '__main__':
+	unittest.main()
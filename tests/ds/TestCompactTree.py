@@ -0,0 +1,121 @@
+import random
+import unittest
+from localutils.ds.compacttree import CompactTreeBase, CompactTreeMap, CompactTreeSet
+from localutils.ds.tree import TreeMap
+
+
+class CompactTestBase(unittest.TestCase):
+
+	keys: list = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+	def traversalTestHelper(self, tree: CompactTreeBase, reference: TreeMap):
+		for traversal in [ 'inorder', 'preorder', 'postorder', 'breadthfirst' ]:
+			self.assertEqual(tree.getKeys(traversal=traversal), reference.getKeys(traversal=traversal), msg=f'Incorrect {traversal} traversal')
+
+	def balanceTestHelper(self, tree: CompactTreeBase, node: int) -> int:
+		if node == 0:
+			return 0
+
+		lheight = self.balanceTestHelper(tree, tree.lefts[node])
+		rheight = self.balanceTestHelper(tree, tree.rights[node])
+		self.assertLessEqual(abs(lheight - rheight), 1, msg=f'Unbalanced subtree on key {tree.nodeKeys[node]}')
+		self.assertEqual(tree.heights[node], 1 + max(lheight, rheight), msg=f'Incorrect height on key {tree.nodeKeys[node]}')
+		return tree.heights[node]
+
+
+### CompactTreeMap / CompactTreeSet tests ###
+
+class TestCompactTree(CompactTestBase):
+
+	def testInstantiation(self):
+		self.assertRaises(TypeError, CompactTreeBase)
+
+	def testInsertOrders(self):
+		for order in [ self.keys, self.keys[::-1] ]:
+			tree, reference = CompactTreeMap(), TreeMap()
+			for i in order:
+				tree.add(i, i * 10)
+				reference.add(i, i * 10)
+
+			self.assertEqual(tree.size, len(self.keys), msg='Incorrect tree size')
+			self.traversalTestHelper(tree, reference)
+			self.balanceTestHelper(tree, tree.root)
+
+	def testFind(self):
+		tree = CompactTreeMap()
+		for i in self.keys:
+			tree.add(i, i * 10)
+
+		for i in self.keys:
+			node = tree.find(i)
+			self.assertEqual((node.key, node.getValue()), (i, i * 10), msg=f'Incorrect node found for key {i}')
+			self.assertTrue(tree.contains(i), msg=f'Key {i} not found')
+
+		self.assertIsNone(tree.find(10), msg='Missing key found')
+		self.assertFalse(tree.contains(-1), msg='Missing key found')
+		self.assertEqual(tree.minimum().getValue(), 0, msg='Incorrect tree minimum')
+		self.assertEqual(tree.maximum().getValue(), 90, msg='Incorrect tree maximum')
+
+		tree.add(5, 55)
+		self.assertEqual(tree.find(5).getValue(), 55, msg='Incorrect node value after update')
+		self.assertEqual(tree.size, len(self.keys), msg='Incorrect tree size after update')
+
+	def testSet(self):
+		tree = CompactTreeSet()
+		for i in self.keys[::-1]:
+			tree.add(i)
+
+		self.assertIsNone(tree.nodeValues, msg='Set should not keep a value column')
+		self.assertEqual(tree.find(3).getValue(), 3, msg='Incorrect set node value')
+		self.assertEqual(list(tree.keys(reverse=True)), self.keys[::-1], msg='Incorrect reversed keys')
+		self.assertEqual(list(tree.items()), [ (i, i) for i in self.keys ], msg='Incorrect set items')
+		self.assertEqual(CompactTreeSet().getKeys(), [], msg='Empty tree should have no keys')
+		self.assertIsNone(CompactTreeSet().minimum(), msg='Empty tree should have no minimum')
+
+	def testRemoval(self):
+		rnd = random.Random(1)
+		keys = list(range(500))
+		rnd.shuffle(keys)
+		tree, reference = CompactTreeMap(), TreeMap()
+		for key in keys:
+			tree.add(key, -key)
+			reference.add(key, -key)
+
+		rnd.shuffle(keys)
+		for i, key in enumerate(keys[:400]):
+			self.assertTrue(tree.remove(key), msg=f'Key {key} not removed')
+			self.assertFalse(tree.remove(key), msg=f'Key {key} removed twice')
+			reference.remove(key)
+			if i % 50 == 0:
+				self.traversalTestHelper(tree, reference)
+				self.balanceTestHelper(tree, tree.root)
+
+		self.assertEqual(tree.size, 100, msg='Incorrect tree size after removal')
+		self.assertEqual(list(tree.items()), list((node.key, node.value) for node in reference.nodes()), msg='Incorrect items after removal')
+
+		# freed node ids are reused before the columns grow
+		columns = len(tree.nodeKeys)
+		for key in keys[:400]:
+			tree.add(key, -key)
+
+		self.assertEqual(len(tree.nodeKeys), columns, msg='Freed node ids were not reused')
+		self.assertEqual(tree.getKeys(), list(range(500)), msg='Incorrect keys after reinsertion')
+		self.balanceTestHelper(tree, tree.root)
+
+	def testFromSorted(self):
+		tree = CompactTreeMap.fromSorted((i, i * 2) for i in range(1000))
+		self.assertEqual(tree.size, 1000, msg='Incorrect tree size')
+		self.assertEqual(list(tree.values()), [ i * 2 for i in range(1000) ], msg='Incorrect values')
+		self.balanceTestHelper(tree, tree.root)
+
+		tree.add(1000, 0)
+		tree.remove(0)
+		self.balanceTestHelper(tree, tree.root)
+
+		tree = CompactTreeSet.fromSorted([ 1, 2, 2, 3 ])
+		self.assertEqual(tree.getKeys(), [ 1, 2, 3 ], msg='Duplicate keys not merged')
+		self.assertRaises(Exception, CompactTreeSet.fromSorted, [ 2, 1 ])
+
+
+if __name__ == '__main__':
+	unittest.main()
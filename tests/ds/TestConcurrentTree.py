@@ -0,0 +1,137 @@
+import random
+import sys
+import threading
+import unittest
+from localutils.ds.concurrenttree import ConcurrentTreeMap
+from localutils.threadutils import ReadWriteLock
+
+
+class ConcurrentTestBase(unittest.TestCase):
+
+	def balanceTestHelper(self, node, parent=None) -> int:
+		if node is None:
+			return 0
+
+		self.assertIs(node.parent, parent, msg=f'Invalid parent node on key {node.key}')
+		lheight = self.balanceTestHelper(node.left, node)
+		rheight = self.balanceTestHelper(node.right, node)
+		self.assertLessEqual(abs(lheight - rheight), 1, msg=f'Unbalanced subtree on key {node.key}')
+		self.assertEqual(node.height, 1 + max(lheight, rheight), msg=f'Incorrect height on key {node.key}')
+		return node.height
+
+	def run(self, result=None):
+		# short thread switch intervals make interleavings that would corrupt an unlocked tree far more likely
+		interval = sys.getswitchinterval()
+		sys.setswitchinterval(1e-5)
+		try:
+			return super().run(result)
+		finally:
+			sys.setswitchinterval(interval)
+
+
+### ReadWriteLock tests ###
+
+class TestReadWriteLock(ConcurrentTestBase):
+
+	def testSharedReadsExclusiveWrites(self):
+		lock = ReadWriteLock()
+		reading = threading.Event()
+		written = threading.Event()
+		with lock.reading():
+			with lock.reading():
+				self.assertEqual(lock.readers, 2, msg='Readers should share the lock')
+
+			writer = threading.Thread(target=lambda: (lock.acquireWrite(), written.set(), lock.releaseWrite()))
+			writer.start()
+			self.assertFalse(written.wait(0.1), msg='Writer should wait for the reader')
+
+			# a waiting writer holds back new readers
+			reader = threading.Thread(target=lambda: (lock.acquireRead(), reading.set(), lock.releaseRead()))
+			reader.start()
+			self.assertFalse(reading.wait(0.1), msg='New reader should queue behind the waiting writer')
+
+		writer.join(1)
+		reader.join(1)
+		self.assertTrue(written.is_set() and reading.is_set(), msg='Waiting threads should get the lock once it is released')
+
+		statistics = lock.statistics()
+		self.assertEqual((statistics['reads'], statistics['writes']), (3, 1), msg='Incorrect acquisition counts')
+		self.assertEqual((statistics['readsContended'], statistics['writesContended']), (1, 1), msg='Incorrect contention counts')
+		self.assertGreater(statistics['writeWaitSeconds'], 0.0, msg='Writer wait time not recorded')
+
+
+### ConcurrentTreeMap tests ###
+
+class TestConcurrentTree(ConcurrentTestBase):
+
+	def testOperations(self):
+		for batchSize in [ 0, 4 ]:
+			tree = ConcurrentTreeMap(batchSize=batchSize)
+			for i in range(10):
+				tree.add(i, i * 10)
+
+			self.assertEqual(tree.size, 10 - len(tree.pending), msg='Queued entries should not be applied yet')
+			tree.flush()
+			self.assertEqual(tree.size, 10, msg='Incorrect tree size')
+			self.assertEqual(tree.find(3).getValue(), 30, msg='Incorrect value found')
+			self.assertIsNone(tree.find(10), msg='Missing key found')
+			self.assertEqual([ node.key for node in tree.range(2, 5) ], [ 2, 3, 4 ], msg='Incorrect range')
+			self.assertEqual((tree.minimum().key, tree.maximum().key, tree.floor(15).key), (0, 9, 9), msg='Incorrect boundary nodes')
+
+			tree.add(10, 100)
+			self.assertTrue(tree.remove(10), msg='Queued key not removed')
+			self.assertEqual(tree.items(), [ (i, i * 10) for i in range(10) ], msg='Incorrect items')
+
+			with tree.reading() as inner:
+				self.assertEqual([ node.key for node in inner.range(7) ], [ 7, 8, 9 ], msg='Incorrect lazy range')
+
+		# two full batches, the rest of the adds flushed explicitly, and the queued key drained by remove
+		self.assertEqual((tree.statistics()['batches'], tree.statistics()['batchedWrites']), (4, 11), msg='Incorrect number of applied batches')
+
+	def testConcurrentUpdates(self):
+		for batchSize in [ 0, 32 ]:
+			tree = ConcurrentTreeMap(batchSize=batchSize)
+			failures = []
+			done = threading.Event()
+
+			def write(offset: int):
+				keys = list(range(offset, 8000, 4))
+				random.Random(offset).shuffle(keys)
+				for key in keys:
+					tree.add(key, -key)
+				for key in keys[::3]:
+					tree.remove(key)
+
+			def read():
+				while not done.is_set():
+					keys = tree.keys()
+					if keys != sorted(keys) or len(set(keys)) != len(keys):
+						failures.append(keys)
+						return
+					tree.find(random.randrange(8000))
+
+			writers = [ threading.Thread(target=write, args=(offset,)) for offset in range(4) ]
+			readers = [ threading.Thread(target=read) for _ in range(2) ]
+			for thread in writers + readers:
+				thread.start()
+			for writer in writers:
+				writer.join()
+			tree.flush()
+			done.set()
+			for reader in readers:
+				reader.join()
+
+			removed = set()
+			for offset in range(4):
+				keys = list(range(offset, 8000, 4))
+				random.Random(offset).shuffle(keys)
+				removed.update(keys[::3])
+
+			self.assertEqual(failures, [], msg='A reader saw an inconsistent tree')
+			self.assertEqual(tree.keys(), [ key for key in range(8000) if key not in removed ], msg='Incorrect keys after concurrent updates')
+			self.balanceTestHelper(tree.tree.root)
+			self.assertGreater(tree.statistics()['writes'], 0, msg='Write acquisitions not counted')
+
+
+if __name__ == '__main__':
+	unittest.main()
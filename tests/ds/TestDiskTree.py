@@ -0,0 +1,114 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from localutils.ds.blocktree import BlockTreeMap, BlockTreeSet
+from localutils.ds.compacttree import CompactTreeMap, CompactTreeSet
+from localutils.ds.disktree import DiskTreeMap
+from localutils.ds.tree import TreeMap, TreeSet
+
+
+class DiskTreeTestBase(unittest.TestCase):
+
+	def setUp(self) -> None:
+		self.folder: str = tempfile.mkdtemp()
+		self.path: str = os.path.join(self.folder, 'tree.dat')
+
+	def tearDown(self) -> None:
+		shutil.rmtree(self.folder)
+
+	def contentsTestHelper(self, tree: DiskTreeMap, expected: dict):
+		self.assertEqual(tree.size, len(expected), msg='Incorrect tree size')
+		self.assertEqual(list(tree.items()), sorted(expected.items()), msg='Incorrect tree items')
+		self.assertEqual(list(tree.keys(reverse=True)), sorted(expected, reverse=True), msg='Incorrect reversed keys')
+
+
+### DiskTreeMap tests ###
+
+class TestDiskTree(DiskTreeTestBase):
+
+	def testSaveAndFind(self):
+		expected = { i * 3: f'value-{i}' for i in range(1000) }
+		with DiskTreeMap.save(TreeMap.fromSorted(sorted(expected.items())), self.path, blockSize=16) as tree:
+			self.contentsTestHelper(tree, expected)
+			for key in range(-2, 3002):
+				node = tree.find(key)
+				self.assertEqual(node.getValue() if node is not None else None, expected.get(key), msg=f'Incorrect lookup of key {key}')
+
+			self.assertEqual((tree.minimum().key, tree.maximum().getValue()), (0, 'value-999'), msg='Incorrect tree minimum or maximum')
+			self.assertRaises(Exception, tree.getKeys, 'preorder')
+
+		# reopening reads only the header and the sparse index
+		with DiskTreeMap(self.path) as tree:
+			self.assertEqual(len(tree.firstKeys), 1000 // 16 + 1, msg='Incorrect number of blocks')
+			self.assertEqual(tree.toTree().getKeys(), sorted(expected), msg='Incorrect keys after loading')
+
+	def testRange(self):
+		keys = list(range(0, 500, 5))
+		with DiskTreeMap.save(TreeSet.fromSorted(keys), self.path, blockSize=8) as tree:
+			self.assertFalse(tree.hasValues, msg='Set file should not hold values')
+			self.assertEqual(tree.find(35).getValue(), 35, msg='Incorrect set node value')
+			for lo, hi in [ (None, None), (12, 88), (40, 80), (-10, 3), (495, 900), (80, 40) ]:
+				expected = [ key for key in keys if (lo is None or lo <= key) and (hi is None or key < hi) ]
+				self.assertEqual([ node.key for node in tree.range(lo, hi) ], expected, msg=f'Incorrect range {lo}..{hi}')
+				self.assertEqual([ node.key for node in tree.range(lo, hi, reverse=True) ], expected[::-1], msg=f'Incorrect reversed range {lo}..{hi}')
+
+	def testTreeFlavours(self):
+		expected = { i * 2: f'value-{i}' for i in range(300) }
+		for treeType in [ TreeMap, BlockTreeMap, CompactTreeMap ]:
+			with DiskTreeMap.save(treeType.fromSorted(sorted(expected.items())), self.path, blockSize=16) as tree:
+				self.assertTrue(tree.hasValues, msg=f'{treeType.__name__} file should hold values')
+				self.contentsTestHelper(tree, expected)
+
+		for treeType in [ TreeSet, BlockTreeSet, CompactTreeSet ]:
+			with DiskTreeMap.save(treeType.fromSorted(sorted(expected)), self.path, blockSize=16) as tree:
+				self.assertFalse(tree.hasValues, msg=f'{treeType.__name__} file should not hold values')
+				self.contentsTestHelper(tree, { key: key for key in expected })
+
+	def testMerge(self):
+		rnd = random.Random(7)
+		expected = { key: -key for key in rnd.sample(range(5000), 2000) }
+		tree = DiskTreeMap.save(TreeMap.fromIterable(expected.items()), self.path, blockSize=32)
+
+		for _ in range(5):
+			delta = TreeMap()
+			for key in rnd.sample(range(-100, 5100), 30):
+				delta.add(key, key * 10)
+				expected[key] = key * 10
+
+			removals = rnd.sample(sorted(expected), 20)
+			for key in removals:
+				del expected[key]
+
+			tree.merge(delta, removals)
+			self.contentsTestHelper(tree, expected)
+
+		# untouched blocks are copied as they are, a single update rewrites a single block
+		blocks = lambda: [ tree.map[tree.offsets[i]:tree.offsets[i + 1]] for i in range(len(tree.firstKeys)) ]
+		before = blocks()
+		tree.merge()
+		self.assertEqual(blocks(), before, msg='A merge without changes should copy every block')
+
+		key = sorted(expected)[len(expected) // 2]
+		tree.merge(TreeMap.fromSorted([ (key, 'updated') ]))
+		expected[key] = 'updated'
+		self.contentsTestHelper(tree, expected)
+		self.assertEqual(sum(1 for old, new in zip(before, blocks()) if old != new), 1, msg='A single update should rewrite a single block')
+		tree.close()
+
+	def testEmpty(self):
+		with DiskTreeMap.save(TreeMap(), self.path) as tree:
+			self.assertEqual((tree.size, tree.getKeys(), tree.find(1), tree.minimum()), (0, [], None, None), msg='Empty tree should have no entries')
+			self.assertEqual(list(tree.range(reverse=True)), [], msg='Empty tree should have an empty range')
+
+			tree.merge(TreeMap.fromSorted([ (1, 'a'), (2, 'b') ]))
+			self.contentsTestHelper(tree, { 1: 'a', 2: 'b' })
+
+		with open(self.path, 'wb') as file:
+			file.write(bytes(64))
+		self.assertRaises(Exception, DiskTreeMap, self.path)
+
+
+if __name__ == '__main__':
+	unittest.main()
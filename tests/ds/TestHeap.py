@@ -1,5 +1,6 @@
+import random
 import unittest
-from localutils.ds.heap import Heap, HeapType
+from localutils.ds.heap import Heap, HeapArity, HeapType, IndexedHeap, PairingHeap, TopK, mergeSorted
 from typing import List, Optional
 
 
@@ -38,3 +39,235 @@ class TestHeap(unittest.TestCase):
 			
 		self.assertEqual(minvalues, sorted(self.testValues, reverse=False), msg='Incorrect min-heap sort result')
 		self.assertEqual(maxvalues, sorted(self.testValues, reverse=True), msg='Incorrect max-heap sort result')
+
+	def testKeyFunction(self):
+		words = [ 'pear', 'fig', 'apple', 'kiwi', 'banana', 'plum', 'date' ]
+		calls = []
+		def length(word: str) -> int:
+			calls.append(word)
+			return len(word)
+
+		minHeap = Heap(HeapType.MinHeap, key=length)
+		maxHeap = Heap(HeapType.MaxHeap, key=length)
+		for word in words:
+			minHeap.push(word)
+			maxHeap.push(word)
+
+		# equal keys come out in insertion order, and the key is computed once per pushed item
+		self.assertEqual(minHeap.popMany(3), [ 'fig', 'pear', 'kiwi' ], msg='Incorrect key min-heap order')
+		self.assertEqual(maxHeap.popMany(3), [ 'banana', 'apple', 'pear' ], msg='Incorrect key max-heap order')
+		self.assertEqual(len(calls), 2 * len(words), msg='Key function called more than once per item')
+		self.assertEqual(minHeap.popMany(10), [ 'plum', 'date', 'apple', 'banana' ], msg='Incorrect drained key min-heap order')
+		self.assertEqual(maxHeap.popMany(10), [ 'kiwi', 'plum', 'date', 'fig' ], msg='Incorrect drained key max-heap order')
+		self.assertIsNone(minHeap.pop(), msg='Empty heap should pop None')
+
+	def testBulkOperations(self):
+		rnd = random.Random(2)
+		for heaptype, reverse in [ (HeapType.MinHeap, False), (HeapType.MaxHeap, True) ]:
+			values = [ rnd.randrange(1000) for _ in range(500) ]
+			heap = Heap.heapify(values[:300], heaptype)
+			self.assertEqual(heap.numvalues, 300, msg='Incorrect heapified size')
+			heap.pushMany(values[300:310]) # few enough to sift in one by one
+			heap.pushMany(values[310:]) # enough to re-heapify
+			self.assertEqual(heap.peek(), sorted(values, reverse=reverse)[0], msg='Incorrect root after bulk pushes')
+			self.assertEqual(heap.popMany(100) + heap.popMany(1000), sorted(values, reverse=reverse), msg='Incorrect bulk pop order')
+
+	def testPushPopReplace(self):
+		self.assertEqual(self.minHeap.pushpop(-1), -1, msg='Smaller item should come straight back from a min-heap pushpop')
+		self.assertEqual(self.minHeap.pushpop(5), 0, msg='Incorrect min-heap pushpop result')
+		self.assertEqual(self.maxHeap.pushpop(10), 10, msg='Greater item should come straight back from a max-heap pushpop')
+		self.assertEqual(self.maxHeap.pushpop(5), 9, msg='Incorrect max-heap pushpop result')
+		self.assertEqual(self.minHeap.replace(-1), 1, msg='Replace should pop before pushing')
+		self.assertEqual(self.maxHeap.replace(10), 8, msg='Replace should pop before pushing')
+		self.assertEqual(self.minHeap.popMany(10), [ -1, 2, 3, 4, 5, 5, 6, 7, 8, 9 ], msg='Incorrect min-heap after pushpop and replace')
+		self.assertEqual(self.maxHeap.popMany(10), [ 10, 7, 6, 5, 5, 4, 3, 2, 1, 0 ], msg='Incorrect max-heap after pushpop and replace')
+		self.assertRaises(IndexError, Heap(HeapType.MaxHeap).replace, 1)
+		self.assertEqual(Heap().pushpop(1), 1, msg='Pushpop on an empty heap should return the item')
+
+	def testManualSifts(self):
+		for heap, first in [ (self.minHeap, -1), (self.maxHeap, 10) ]:
+			heap.values.append(first)
+			heap.heapifyUp()
+			self.assertEqual(heap.peek(), first, msg='Appended item should sift up to the root')
+			heap.values[0] = 5
+			heap.heapifyDown()
+			self.assertEqual(heap.popMany(11), sorted(self.testValues + [ 5 ], reverse=heap.heaptype == HeapType.MaxHeap), msg='Replaced root should sift down into place')
+
+		Heap().heapifyUp()
+		Heap().heapifyDown()
+
+
+	def testArity(self):
+		rnd = random.Random(4)
+		for arity in HeapArity:
+			for heaptype, reverse in [ (HeapType.MinHeap, False), (HeapType.MaxHeap, True) ]:
+				values = [ rnd.randrange(500) for _ in range(400) ]
+				heap = Heap.heapify(values[:200], heaptype, arity=arity)
+				for value in values[200:]:
+					heap.push(value)
+				for i in range(1, heap.numvalues):
+					parent = heap.values[(i - 1) // arity.value]
+					self.assertFalse(heap.values[i] < parent if heaptype == HeapType.MinHeap else heap.values[i] > parent, msg=f'Heap order broken in {arity.name} {heaptype.name}')
+
+				self.assertEqual(heap.pushpop(1000 if reverse else -1), 1000 if reverse else -1, msg=f'Incorrect {arity.name} pushpop')
+				self.assertEqual([ heap.pop() for _ in range(400) ], sorted(values, reverse=reverse), msg=f'Incorrect {arity.name} {heaptype.name} pop order')
+
+	def testMerge(self):
+		left = Heap.heapify([ 5, 1, 9 ], arity=HeapArity.Quaternary)
+		right = Heap.heapify([ 4, 2, 8, 6 ])
+		left.merge(right)
+		self.assertEqual(right.numvalues, 0, msg='Merged heap should be emptied')
+		self.assertEqual(left.popMany(10), [ 1, 2, 4, 5, 6, 8, 9 ], msg='Incorrect merged heap order')
+		self.assertRaises(Exception, left.merge, Heap(HeapType.MaxHeap))
+
+
+class TestIndexedHeap(unittest.TestCase):
+
+	def positionsTestHelper(self, heap: IndexedHeap):
+		self.assertEqual(len(heap.positions), heap.numvalues, msg='Position map out of step with the heap')
+		for index, (_, _, item) in enumerate(heap.values):
+			self.assertEqual(heap.positions[item], index, msg=f'Incorrect position for item {item}')
+			if index > 0:
+				parent = heap.values[(index - 1) >> 1]
+				self.assertFalse(heap.values[index] < parent if heap.heaptype == HeapType.MinHeap else heap.values[index] > parent, msg=f'Heap order broken at item {item}')
+
+	def testOperations(self):
+		heap = IndexedHeap()
+		for item, priority in [ ('a', 5), ('b', 3), ('c', 8), ('d', 1) ]:
+			heap.push(item, priority)
+
+		self.assertRaises(Exception, heap.push, 'a', 2)
+		self.assertTrue(heap.contains('c') and not heap.contains('z'), msg='Incorrect membership')
+		heap.update('c', 0)
+		heap.update('d', 9)
+		heap.update('e', 4)
+		self.assertEqual((heap.peek(), heap.priority('d'), heap.priority('z')), ('c', 9, None), msg='Incorrect priorities after updates')
+		self.assertTrue(heap.remove('b'), msg='Queued item not removed')
+		self.assertFalse(heap.remove('b'), msg='Removed item removed twice')
+		self.positionsTestHelper(heap)
+		self.assertEqual([ heap.pop() for _ in range(5) ], [ 'c', 'e', 'a', 'd', None ], msg='Incorrect pop order')
+		self.assertEqual(heap.positions, {}, msg='Popped items left in the position map')
+
+	def testRandomUpdates(self):
+		rnd = random.Random(3)
+		for heaptype in [ HeapType.MinHeap, HeapType.MaxHeap ]:
+			heap = IndexedHeap(heaptype)
+			expected = {}
+			for step in range(3000):
+				item = rnd.randrange(200)
+				if rnd.random() < 0.7:
+					priority = rnd.randrange(1000)
+					heap.update(item, priority)
+					expected[item] = priority
+				else:
+					self.assertEqual(heap.remove(item), expected.pop(item, None) is not None, msg=f'Incorrect removal of item {item}')
+
+				if step % 300 == 0:
+					self.positionsTestHelper(heap)
+
+			order = []
+			while heap.numvalues > 0:
+				item = heap.peek()
+				order.append(heap.priority(item))
+				self.assertEqual(heap.pop(), item, msg='Pop should return the peeked item')
+
+			self.assertEqual(order, sorted(expected.values(), reverse=heaptype == HeapType.MaxHeap), msg='Incorrect pop order after updates')
+
+	def testShortestPaths(self):
+		edges = { 'a': [ ('b', 7), ('c', 9), ('f', 14) ], 'b': [ ('c', 10), ('d', 15) ], 'c': [ ('d', 11), ('f', 2) ], 'd': [ ('e', 6) ], 'e': [], 'f': [ ('e', 9) ] }
+		distances = { 'a': 0 }
+		heap = IndexedHeap()
+		heap.push('a', 0)
+		while heap.numvalues > 0:
+			node = heap.pop()
+			for target, weight in edges[node]:
+				distance = distances[node] + weight
+				if target not in distances or distance < distances[target]:
+					distances[target] = distance
+					heap.update(target, distance)
+
+		self.assertEqual(distances, { 'a': 0, 'b': 7, 'c': 9, 'd': 20, 'e': 20, 'f': 11 }, msg='Incorrect shortest path distances')
+
+
+class TestPairingHeap(unittest.TestCase):
+
+	def testOperations(self):
+		rnd = random.Random(5)
+		for heaptype, reverse in [ (HeapType.MinHeap, False), (HeapType.MaxHeap, True) ]:
+			heap = PairingHeap(heaptype)
+			expected = []
+			for _ in range(2000):
+				if rnd.random() < 0.6 or not expected:
+					value = rnd.randrange(1000)
+					heap.push(value)
+					expected.append(value)
+				else:
+					expected.sort(reverse=reverse)
+					self.assertEqual(heap.peek(), expected[0], msg='Incorrect pairing heap top')
+					self.assertEqual(heap.pop(), expected.pop(0), msg='Incorrect pairing heap pop')
+
+			self.assertEqual(heap.numvalues, len(expected), msg='Incorrect pairing heap size')
+			self.assertEqual(heap.popMany(len(expected) + 5), sorted(expected, reverse=reverse), msg='Incorrect pairing heap drain order')
+			self.assertIsNone(heap.pop(), msg='Empty pairing heap should pop None')
+
+	def testMerge(self):
+		words = [ 'pear', 'fig', 'apple', 'kiwi', 'banana', 'plum' ]
+		heaps = [ PairingHeap(key=len) for _ in range(3) ]
+		for i, word in enumerate(words):
+			heaps[i % 3].push(word)
+
+		merged = PairingHeap(key=len)
+		for heap in heaps:
+			merged.merge(heap)
+			self.assertEqual((heap.numvalues, heap.peek()), (0, None), msg='Merged heap should be emptied')
+
+		# equal keys pop in insertion order across the merged heaps
+		self.assertEqual(merged.popMany(6), [ 'fig', 'pear', 'kiwi', 'plum', 'apple', 'banana' ], msg='Incorrect merged pairing heap order')
+		self.assertRaises(Exception, merged.merge, PairingHeap(HeapType.MaxHeap, key=len))
+
+
+class TestStreams(unittest.TestCase):
+
+	def testTopK(self):
+		rnd = random.Random(6)
+		values = [ rnd.randrange(10000) for _ in range(5000) ]
+		for largest in [ True, False ]:
+			top = TopK(10, largest=largest)
+			top.addAll(values[:3])
+			self.assertEqual(top.result(), sorted(values[:3], reverse=largest), msg='Incorrect partial top-k')
+			top.addAll(values[3:2000])
+			for value in values[2000:]:
+				top.add(value)
+			self.assertEqual(top.size, 10, msg='Top-k should hold k items')
+			self.assertEqual(top.result(), sorted(values, reverse=largest)[:10], msg='Incorrect top-k')
+
+		# equal keys keep the earliest items, best first
+		records = [ (score, i) for i, score in enumerate([ 3, 7, 5, 7, 1, 7, 5, 3 ]) ]
+		top = TopK(3, key=lambda record: record[0])
+		top.addAll(records)
+		self.assertEqual(top.result(), [ (7, 1), (7, 3), (7, 5) ], msg='Incorrect keyed top-k')
+		bottom = TopK(3, key=lambda record: record[0], largest=False)
+		bottom.addAll(records)
+		self.assertEqual(bottom.result(), [ (1, 4), (3, 0), (3, 7) ], msg='Incorrect keyed bottom-k')
+		empty = TopK(0)
+		empty.addAll(values)
+		self.assertEqual(empty.result(), [], msg='Top-0 should keep nothing')
+
+	def testMergeSorted(self):
+		rnd = random.Random(7)
+		parts = [ sorted(rnd.randrange(100) for _ in range(rnd.randrange(30))) for _ in range(12) ] + [ [] ]
+		self.assertEqual(list(mergeSorted(parts)), sorted(sum(parts, [])), msg='Incorrect merge')
+		self.assertEqual(list(mergeSorted([ part[::-1] for part in parts ], reverse=True)), sorted(sum(parts, []), reverse=True), msg='Incorrect reversed merge')
+		self.assertEqual(list(mergeSorted([])), [], msg='Merging nothing should yield nothing')
+
+		# equal keys come out in input order, and the merge reads no further ahead than one item per input
+		pulled = []
+		def source(name, keys):
+			for key in keys:
+				pulled.append(name)
+				yield (key, name)
+
+		merged = mergeSorted([ source('a', [ 1, 3, 5 ]), source('b', [ 1, 2, 5 ]), source('c', [ 4 ]) ], key=lambda record: record[0])
+		self.assertEqual([ next(merged) for _ in range(3) ], [ (1, 'a'), (1, 'b'), (2, 'b') ], msg='Incorrect keyed merge order')
+		self.assertEqual(len(pulled), 5, msg='Merge should read ahead only one item per input')
+		self.assertEqual(list(merged), [ (3, 'a'), (4, 'c'), (5, 'a'), (5, 'b') ], msg='Incorrect keyed merge tail')
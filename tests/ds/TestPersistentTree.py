@@ -0,0 +1,117 @@
+import random
+import threading
+import unittest
+from localutils.ds.persistenttree import PersistentTreeBase, PersistentTreeMap, TreeSnapshot
+
+
+class PersistentTestBase(unittest.TestCase):
+
+	def balanceTestHelper(self, node) -> int:
+		if node is None:
+			return 0
+
+		lheight = self.balanceTestHelper(node.left)
+		rheight = self.balanceTestHelper(node.right)
+		self.assertLessEqual(abs(lheight - rheight), 1, msg=f'Unbalanced subtree on key {node.key}')
+		self.assertEqual(node.height, 1 + max(lheight, rheight), msg=f'Incorrect height on key {node.key}')
+		return node.height
+
+	def contentsTestHelper(self, tree: PersistentTreeBase, expected: dict):
+		self.assertEqual(list(tree.items()), sorted(expected.items()), msg='Incorrect tree items')
+		self.assertEqual(tree.size, len(expected), msg='Incorrect tree size')
+		self.balanceTestHelper(tree.root)
+
+
+### PersistentTreeMap tests ###
+
+class TestPersistentTree(PersistentTestBase):
+
+	def testInstantiation(self):
+		self.assertRaises(TypeError, PersistentTreeBase)
+
+	def testTraversal(self):
+		tree = PersistentTreeMap()
+		for i in range(10):
+			tree.add(i, i)
+
+		# same shapes as the TreeMap in-order insertion tests
+		self.assertEqual(tree.getKeys('preorder'), [ 3, 1, 0, 2, 7, 5, 4, 6, 8, 9 ], msg='Incorrect pre-order traversal')
+		self.assertEqual(tree.getKeys('postorder'), [ 0, 2, 1, 4, 6, 5, 9, 8, 7, 3 ], msg='Incorrect post-order traversal')
+		self.assertEqual(tree.getKeys('breadthfirst'), [ 3, 1, 7, 0, 2, 5, 8, 4, 6, 9 ], msg='Incorrect breadth-first traversal')
+		self.assertEqual([ node.key for node in tree.range(3, 7, reverse=True) ], [ 6, 5, 4, 3 ], msg='Incorrect reversed range')
+		self.assertEqual((tree.minimum().key, tree.maximum().key), (0, 9), msg='Incorrect tree minimum or maximum')
+		self.assertRaises(Exception, tree.getKeys, 'sideways')
+
+	def testUpdates(self):
+		rnd = random.Random(5)
+		tree = PersistentTreeMap.fromSorted((i, i) for i in range(0, 300, 3))
+		expected = { i: i for i in range(0, 300, 3) }
+		for step in range(3000):
+			key = rnd.randrange(300)
+			if rnd.random() < 0.5:
+				tree.add(key, step)
+				expected[key] = step
+			else:
+				self.assertEqual(tree.remove(key), expected.pop(key, None) is not None, msg=f'Incorrect removal of key {key}')
+
+			if step % 500 == 0:
+				tree.snapshot()
+
+		self.contentsTestHelper(tree, expected)
+		self.assertEqual(tree.find(next(iter(expected))).getValue(), expected[next(iter(expected))], msg='Incorrect value found')
+
+	def testSnapshotIsolation(self):
+		rnd = random.Random(6)
+		tree = PersistentTreeMap()
+		expected = {}
+		snapshots = []
+		for version in range(20):
+			for _ in range(100):
+				key = rnd.randrange(400)
+				if rnd.random() < 0.7:
+					tree.add(key, version)
+					expected[key] = version
+				elif tree.remove(key):
+					del expected[key]
+
+			snapshots.append((tree.snapshot(), dict(expected)))
+
+		for snapshot, contents in snapshots:
+			self.assertIsInstance(snapshot, TreeSnapshot)
+			self.contentsTestHelper(snapshot, contents)
+
+		# versions share every subtree the writer did not touch in between
+		last, _ = snapshots[-1]
+		self.assertIs(tree.snapshot().root, last.root, msg='Snapshot without writes should share the root')
+
+	def testConcurrentReaders(self):
+		tree = PersistentTreeMap()
+		failures = []
+		done = threading.Event()
+
+		def read():
+			while not done.is_set():
+				snapshot = tree.snapshot()
+				keys = list(snapshot.keys())
+				# the writer adds 0, 1, 2, ... in order, so every consistent version holds a prefix
+				if keys != list(range(len(keys))) or len(keys) != snapshot.size:
+					failures.append(len(keys))
+					return
+
+		readers = [ threading.Thread(target=read) for _ in range(3) ]
+		for reader in readers:
+			reader.start()
+
+		for i in range(5000):
+			tree.add(i, i)
+
+		done.set()
+		for reader in readers:
+			reader.join()
+
+		self.assertEqual(failures, [], msg='A reader saw an inconsistent snapshot')
+		self.contentsTestHelper(tree, { i: i for i in range(5000) })
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+import unittest
+from localutils.ds.heap import HeapType
+from localutils.ds.workqueue import AsyncPriorityWorkQueue, PriorityWorkQueue
+
+
+### PriorityWorkQueue tests ###
+
+class TestPriorityWorkQueue(unittest.TestCase):
+
+	def testOrdering(self):
+		queue = PriorityWorkQueue(HeapType.MaxHeap, key=lambda job: job[0])
+		for job in [ (2, 'b'), (5, 'e'), (1, 'a'), (5, 'f'), (3, 'c') ]:
+			self.assertTrue(queue.put(job), msg='Unbounded put should not block')
+
+		self.assertEqual(queue.get(), (5, 'e'), msg='Incorrect highest priority job')
+		self.assertEqual(queue.getMany(3), [ (5, 'f'), (3, 'c'), (2, 'b') ], msg='Incorrect batch of jobs')
+		self.assertEqual(queue.getMany(3), [ (1, 'a') ], msg='Batch should take what is left')
+		self.assertEqual(queue.size, 0, msg='Queue should be drained')
+
+	def testBlockingGet(self):
+		queue = PriorityWorkQueue()
+		start = time.monotonic()
+		self.assertIsNone(queue.get(timeout=0.05), msg='Get on an empty queue should time out')
+		self.assertEqual(queue.getMany(5, timeout=0.01), [], msg='Batch get on an empty queue should time out')
+		self.assertGreaterEqual(time.monotonic() - start, 0.05, msg='Get returned before its timeout')
+
+		results = []
+		consumers = [ threading.Thread(target=lambda: results.append(queue.get(timeout=5))) for _ in range(3) ]
+		for consumer in consumers:
+			consumer.start()
+		time.sleep(0.05)
+		for item in [ 3, 1, 2 ]:
+			queue.put(item)
+		for consumer in consumers:
+			consumer.join()
+
+		self.assertEqual(sorted(results), [ 1, 2, 3 ], msg='Every waiting consumer should get an item')
+
+	def testBackPressure(self):
+		queue = PriorityWorkQueue(maxsize=2)
+		self.assertTrue(queue.put(1) and queue.put(2), msg='Put below the maximum size should not block')
+		self.assertFalse(queue.put(3, timeout=0.05), msg='Put on a full queue should time out')
+
+		done = threading.Event()
+		producer = threading.Thread(target=lambda: (queue.put(0), done.set()))
+		producer.start()
+		self.assertFalse(done.wait(0.05), msg='Producer should wait for room')
+		self.assertEqual(queue.get(), 1, msg='Incorrect item taken from a full queue')
+		producer.join(1)
+		self.assertTrue(done.is_set(), msg='Producer should resume once an item is taken')
+		self.assertEqual(queue.getMany(5), [ 0, 2 ], msg='Incorrect items after back pressure')
+
+
+### AsyncPriorityWorkQueue tests ###
+
+class TestAsyncPriorityWorkQueue(unittest.TestCase):
+
+	def testAsyncOperations(self):
+		async def run():
+			queue = AsyncPriorityWorkQueue(PriorityWorkQueue(maxsize=3))
+			self.assertIsNone(await queue.get(timeout=0.02), msg='Async get on an empty queue should time out')
+
+			consumer = asyncio.create_task(queue.getMany(2))
+			await asyncio.sleep(0.01)
+			self.assertFalse(consumer.done(), msg='Async consumer should wait for items')
+			await queue.put(7)
+			self.assertEqual(await consumer, [ 7 ], msg='Async consumer should wake on the first item')
+
+			for item in [ 4, 6, 5 ]:
+				await queue.put(item)
+			self.assertFalse(await queue.put(1, timeout=0.02), msg='Async put on a full queue should time out')
+			producer = asyncio.create_task(queue.put(1))
+			await asyncio.sleep(0.01)
+			self.assertFalse(producer.done(), msg='Async producer should wait for room')
+			self.assertEqual(await queue.get(), 4, msg='Incorrect item taken from a full queue')
+			self.assertTrue(await producer, msg='Async producer should resume once an item is taken')
+			return await queue.getMany(10)
+
+		self.assertEqual(asyncio.run(run()), [ 1, 5, 6 ], msg='Incorrect items after async back pressure')
+
+	def testAbandonedWaiters(self):
+		async def run():
+			queue = AsyncPriorityWorkQueue(PriorityWorkQueue(maxsize=1))
+			for _ in range(100):
+				self.assertIsNone(await queue.get(timeout=0), msg='Async get on an empty queue should time out')
+			self.assertEqual(len(queue.queue.getters), 0, msg='Timed out getters should be removed from the queue')
+
+			cancelled = asyncio.create_task(queue.get())
+			await asyncio.sleep(0.01)
+			cancelled.cancel()
+			await asyncio.gather(cancelled, return_exceptions=True)
+			self.assertEqual(len(queue.queue.getters), 0, msg='Cancelled getters should be removed from the queue')
+
+			await queue.put(1)
+			for _ in range(100):
+				self.assertFalse(await queue.put(2, timeout=0), msg='Async put on a full queue should time out')
+			self.assertFalse(await queue.put(2, timeout=0.01), msg='Async put on a full queue should time out')
+			self.assertEqual(len(queue.queue.putters), 0, msg='Timed out putters should be removed from the queue')
+			return await queue.getMany(10)
+
+		self.assertEqual(asyncio.run(run()), [ 1 ], msg='Abandoned waiters should not change the queue contents')
+
+	def testThreadProducers(self):
+		async def run():
+			queue = AsyncPriorityWorkQueue(PriorityWorkQueue(maxsize=16))
+			# a consumer cancelled while it waits must not swallow an item or a wakeup
+			cancelled = asyncio.create_task(queue.get())
+			await asyncio.sleep(0.01)
+			cancelled.cancel()
+
+			producers = [ threading.Thread(target=lambda offset=offset: [ queue.queue.put(i) for i in range(offset, 2000, 4) ]) for offset in range(4) ]
+			for producer in producers:
+				producer.start()
+
+			consumed = []
+			while len(consumed) < 2000:
+				items = await queue.getMany(8, timeout=5)
+				if not items:
+					break
+				consumed.extend(items)
+
+			for producer in producers:
+				producer.join()
+			return consumed
+
+		self.assertEqual(sorted(asyncio.run(run())), list(range(2000)), msg='Items lost between producer threads and the event loop')
+
+
+if __name__ == '__main__':
+	unittest.main()